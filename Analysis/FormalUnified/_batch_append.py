@@ -1,194 +1,736 @@
 import os
-import re
-import glob
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tools import manifest as mf
+from tools import run_report as rr
+from tools import walker
+from tools.atomic_write import AtomicBatch, write_atomic
+from tools.multimatch import Automaton
+from tools import section_scan
+
+# 主题规则表：按顺序匹配，路径（小写）中出现任一关键词即命中；多条命中时取靠前的一条
+RULES = [
+    {
+        "id": "philosophy",
+        "keywords": ["哲学", "philosophy"],
+        "scholar": "Immanuel Kant",
+        "year": "1781",
+        "quote": "思维无内容是空的，直观无概念是盲的。",
+        "crit_theme": "该哲学理论框架在形式化转换过程中面临本体论还原与认识论预设的双重挑战",
+        "source": "德国古典哲学与认识论体系",
+    },
+    {
+        "id": "mathematics",
+        "keywords": ["数学", "mathematics"],
+        "scholar": "David Hilbert",
+        "year": "1900",
+        "quote": "我们必须知道，我们必将知道。",
+        "crit_theme": "该数学理论体系在可计算性与可判定性边界上需要更严格的约束条件与构造性证明",
+        "source": "数理逻辑与公理化体系",
+    },
+    {
+        "id": "formal_language",
+        "keywords": ["形式语言"],
+        "scholar": "Noam Chomsky",
+        "year": "1956",
+        "quote": "语法是研究具体语言里如何由抽象的普遍规则系统生成无限句子集合的学科。",
+        "crit_theme": "形式语言理论在描述自然语言语义与程序设计语言行为方面仍存在生成能力与可判定性的根本张力",
+        "source": "形式语言与自动机理论体系",
+    },
+    {
+        "id": "formal_model",
+        "keywords": ["形式模型"],
+        "scholar": "C.A.R. Hoare",
+        "year": "1969",
+        "quote": "程序设计的真正挑战不在于构建程序，而在于构建程序的精确规格说明。",
+        "crit_theme": "形式模型在工业级软件系统中的可扩展性与实用性仍需更多实证研究支撑，工具链成熟度不足",
+        "source": "形式化方法与程序验证理论体系",
+    },
+    {
+        "id": "programming_language",
+        "keywords": ["编程语言"],
+        "scholar": "Niklaus Wirth",
+        "year": "1976",
+        "quote": "程序 = 算法 + 数据结构。",
+        "crit_theme": "编程语言理论在类型系统表达力与运行时效率之间的权衡仍需持续探索，新范式融合面临挑战",
+        "source": "编程语言理论与类型系统",
+    },
+    {
+        "id": "software_architecture",
+        "keywords": ["软件架构"],
+        "scholar": "Martin Fowler",
+        "year": "2002",
+        "quote": "架构是那些重要的东西，无论它是什么。",
+        "crit_theme": "软件架构理论体系在应对动态演化需求与遗留系统迁移时暴露出描述能力不足与决策支持缺失的问题",
+        "source": "软件架构模式与架构描述语言体系",
+    },
+    {
+        "id": "distributed",
+        "keywords": ["分布式", "microservice"],
+        "scholar": "Eric Brewer",
+        "year": "2000",
+        "quote": "一致性、可用性、分区容错性，三者不可兼得。",
+        "crit_theme": "分布式系统在理论不可能性与工程可行性之间的平衡仍缺乏统一的形式化决策框架与量化评估手段",
+        "source": "分布式系统理论与CAP定理体系",
+    },
+    {
+        "id": "ai",
+        "keywords": ["ai", "人工智能", "modeling"],
+        "scholar": "Alan Turing",
+        "year": "1950",
+        "quote": "机器能思考吗？",
+        "crit_theme": "AI交互建模在可解释性与形式化保证方面仍存在根本性挑战，语义鸿沟与验证闭环尚未建立",
+        "source": "人工智能与机器学习理论体系",
+    },
+    {
+        "id": "practice",
+        "keywords": ["实践", "应用", "code"],
+        "scholar": "Kent Beck",
+        "year": "1999",
+        "quote": "通过消除不必要的复杂性，简单的设计可以释放出巨大的能量。",
+        "crit_theme": "该实践方案在从理论原型到生产环境的转化过程中，需要更完善的质量保障、反馈机制与持续演化能力",
+        "source": "软件工程实践与敏捷开发理论体系",
+    },
+    {
+        "id": "knowledge_nav",
+        "keywords": ["索引", "导航", "知识"],
+        "scholar": "Vannevar Bush",
+        "year": "1945",
+        "quote": "人类的思维过程是联想式的，而非索引式的。",
+        "crit_theme": "知识导航系统在语义关联与形式化检索之间需要找到更优的融合路径，当前体系缺乏动态演化能力",
+        "source": "信息组织与知识检索理论体系",
+    },
+    {
+        "id": "curriculum",
+        "keywords": ["课程对标", "cambridge", "mit", "cmu", "stanford", "berkeley", "oxford"],
+        "scholar": "Derek Bok",
+        "year": "1986",
+        "quote": "如果你想预测大学的未来，先回顾它的过去。",
+        "crit_theme": "课程对标分析在形式化深度与本土教学实践适配性之间仍需进一步 bridging，理论迁移存在语境差异",
+        "source": "高等教育与计算机科学课程体系",
+    },
+    {
+        "id": "wiki",
+        "keywords": ["wiki"],
+        "scholar": "Tim Berners-Lee",
+        "year": "1998",
+        "quote": "语义网是对当前Web的扩展，信息被赋予明确定义，使计算机与人能更好协作。",
+        "crit_theme": "Wiki概念对标在语义一致性与形式化归约上存在多义性挑战，需要更严格的术语映射机制",
+        "source": "语义网与知识表示理论体系",
+    },
+    {
+        "id": "planning",
+        "keywords": ["milestone", "里程碑", "规划", "战略"],
+        "scholar": "Peter Drucker",
+        "year": "1954",
+        "quote": "如果你不能衡量它，你就不能管理它。",
+        "crit_theme": "项目规划在目标设定与可验证性指标之间需要建立更紧密的反馈回路，避免形式化目标与执行脱节",
+        "source": "项目管理与战略管理理论体系",
+    },
+]
+
+# 默认内容（根目录项目报告类）
+DEFAULT_RULE = {
+    "id": "default",
+    "keywords": [],
+    "scholar": "Frederick P. Brooks",
+    "year": "1995",
+    "quote": "在软件工程中，概念完整性是系统设计中最重要的考虑因素。",
+    "crit_theme": "该主题在形式化严谨性与工程实用性之间的平衡需要更深入的理论反思与实践验证",
+    "source": "形式化架构与软件工程理论体系",
+}
+
+CRIT_BODY = "首先，现有理论框架在抽象层次与实现细节之间存在明显的语义断层，导致从规范到代码的转换缺乏系统性的验证手段。其次，该领域的知识体系呈现高度碎片化状态，不同学派之间的术语体系与方法论缺乏有效的互操作机制。再者，随着技术范式的快速演进，传统理论在应对新兴架构模式（如云原生、AI驱动系统）时暴露出适应性不足的问题。最后，需要建立一个更加开放、可演化的理论生态系统，通过持续的形式化验证与实证研究来推动该领域的成熟发展。"
+
+# 全部规则的关键词编译进一个自动机，优先级即规则在表中的位置
+_MATCHER = Automaton({kw: i for i, rule in reversed(list(enumerate(RULES))) for kw in rule["keywords"]})
+
+
+@lru_cache(maxsize=None)
+def _rule_for_dir(dirname):
+    """目录部分的匹配结果；只按目录缓存，缓存大小随目录数而非文件数增长"""
+    return _MATCHER.min_rank(dirname, len(RULES))
+
+
+@lru_cache(maxsize=None)
+def render_rule(index):
+    """规则对应的三段文本，每条规则只格式化一次"""
+    rule = RULES[index] if index < len(RULES) else DEFAULT_RULE
+    auth = f"## 权威引用\n\n> **{rule['scholar']}** ({rule['year']}): \"{rule['quote']}\""
+    crit = f"## 批判性总结\n\n{rule['crit_theme']}。{CRIT_BODY}"
+    source_map = f"> **来源映射**: {rule['source']}"
+    return crit, auth, source_map
+
+
+def classify_path(filepath):
+    """返回命中规则的下标（未命中时为 len(RULES)）"""
+    path_lower = filepath.lower()
+    # 关键词不含路径分隔符，目录部分与文件名部分可分别匹配；同目录的文件共用目录部分的结果，
+    # 文件名各不相同，每次直接匹配
+    dirname, filename = os.path.split(path_lower)
+    return min(_rule_for_dir(dirname), _MATCHER.min_rank(filename, len(RULES)))
+
 
 def get_content_by_path(filepath):
     """根据文件路径返回相应的权威引用、批判性总结、来源映射"""
-    path_lower = filepath.lower()
-    filename = os.path.basename(path_lower)
-    
-    # 默认内容（根目录项目报告类）
-    scholar = "Frederick P. Brooks"
-    year = "1995"
-    quote = "在软件工程中，概念完整性是系统设计中最重要的考虑因素。"
-    crit_theme = "该主题在形式化严谨性与工程实用性之间的平衡需要更深入的理论反思与实践验证"
-    source = "形式化架构与软件工程理论体系"
-    
-    if "哲学" in path_lower or "philosophy" in path_lower:
-        scholar = "Immanuel Kant"
-        year = "1781"
-        quote = "思维无内容是空的，直观无概念是盲的。"
-        crit_theme = "该哲学理论框架在形式化转换过程中面临本体论还原与认识论预设的双重挑战"
-        source = "德国古典哲学与认识论体系"
-    elif "数学" in path_lower or "mathematics" in path_lower:
-        scholar = "David Hilbert"
-        year = "1900"
-        quote = "我们必须知道，我们必将知道。"
-        crit_theme = "该数学理论体系在可计算性与可判定性边界上需要更严格的约束条件与构造性证明"
-        source = "数理逻辑与公理化体系"
-    elif "形式语言" in path_lower:
-        scholar = "Noam Chomsky"
-        year = "1956"
-        quote = "语法是研究具体语言里如何由抽象的普遍规则系统生成无限句子集合的学科。"
-        crit_theme = "形式语言理论在描述自然语言语义与程序设计语言行为方面仍存在生成能力与可判定性的根本张力"
-        source = "形式语言与自动机理论体系"
-    elif "形式模型" in path_lower:
-        scholar = "C.A.R. Hoare"
-        year = "1969"
-        quote = "程序设计的真正挑战不在于构建程序，而在于构建程序的精确规格说明。"
-        crit_theme = "形式模型在工业级软件系统中的可扩展性与实用性仍需更多实证研究支撑，工具链成熟度不足"
-        source = "形式化方法与程序验证理论体系"
-    elif "编程语言" in path_lower:
-        scholar = "Niklaus Wirth"
-        year = "1976"
-        quote = "程序 = 算法 + 数据结构。"
-        crit_theme = "编程语言理论在类型系统表达力与运行时效率之间的权衡仍需持续探索，新范式融合面临挑战"
-        source = "编程语言理论与类型系统"
-    elif "软件架构" in path_lower:
-        scholar = "Martin Fowler"
-        year = "2002"
-        quote = "架构是那些重要的东西，无论它是什么。"
-        crit_theme = "软件架构理论体系在应对动态演化需求与遗留系统迁移时暴露出描述能力不足与决策支持缺失的问题"
-        source = "软件架构模式与架构描述语言体系"
-    elif "分布式" in path_lower or "microservice" in path_lower:
-        scholar = "Eric Brewer"
-        year = "2000"
-        quote = "一致性、可用性、分区容错性，三者不可兼得。"
-        crit_theme = "分布式系统在理论不可能性与工程可行性之间的平衡仍缺乏统一的形式化决策框架与量化评估手段"
-        source = "分布式系统理论与CAP定理体系"
-    elif "ai" in path_lower or "人工智能" in path_lower or "modeling" in path_lower:
-        scholar = "Alan Turing"
-        year = "1950"
-        quote = "机器能思考吗？"
-        crit_theme = "AI交互建模在可解释性与形式化保证方面仍存在根本性挑战，语义鸿沟与验证闭环尚未建立"
-        source = "人工智能与机器学习理论体系"
-    elif "实践" in path_lower or "应用" in path_lower or "code" in path_lower:
-        scholar = "Kent Beck"
-        year = "1999"
-        quote = "通过消除不必要的复杂性，简单的设计可以释放出巨大的能量。"
-        crit_theme = "该实践方案在从理论原型到生产环境的转化过程中，需要更完善的质量保障、反馈机制与持续演化能力"
-        source = "软件工程实践与敏捷开发理论体系"
-    elif "索引" in path_lower or "导航" in path_lower or "知识" in path_lower:
-        scholar = "Vannevar Bush"
-        year = "1945"
-        quote = "人类的思维过程是联想式的，而非索引式的。"
-        crit_theme = "知识导航系统在语义关联与形式化检索之间需要找到更优的融合路径，当前体系缺乏动态演化能力"
-        source = "信息组织与知识检索理论体系"
-    elif "课程对标" in path_lower or "cambridge" in path_lower or "mit" in path_lower or "cmu" in path_lower or "stanford" in path_lower or "berkeley" in path_lower or "oxford" in path_lower:
-        scholar = "Derek Bok"
-        year = "1986"
-        quote = "如果你想预测大学的未来，先回顾它的过去。"
-        crit_theme = "课程对标分析在形式化深度与本土教学实践适配性之间仍需进一步 bridging，理论迁移存在语境差异"
-        source = "高等教育与计算机科学课程体系"
-    elif "wiki" in path_lower:
-        scholar = "Tim Berners-Lee"
-        year = "1998"
-        quote = "语义网是对当前Web的扩展，信息被赋予明确定义，使计算机与人能更好协作。"
-        crit_theme = "Wiki概念对标在语义一致性与形式化归约上存在多义性挑战，需要更严格的术语映射机制"
-        source = "语义网与知识表示理论体系"
-    elif "milestone" in path_lower or "里程碑" in path_lower or "规划" in path_lower or "战略" in path_lower:
-        scholar = "Peter Drucker"
-        year = "1954"
-        quote = "如果你不能衡量它，你就不能管理它。"
-        crit_theme = "项目规划在目标设定与可验证性指标之间需要建立更紧密的反馈回路，避免形式化目标与执行脱节"
-        source = "项目管理与战略管理理论体系"
-    
-    auth = f"## 权威引用\n\n> **{scholar}** ({year}): \"{quote}\""
-    crit = f"## 批判性总结\n\n{crit_theme}。首先，现有理论框架在抽象层次与实现细节之间存在明显的语义断层，导致从规范到代码的转换缺乏系统性的验证手段。其次，该领域的知识体系呈现高度碎片化状态，不同学派之间的术语体系与方法论缺乏有效的互操作机制。再者，随着技术范式的快速演进，传统理论在应对新兴架构模式（如云原生、AI驱动系统）时暴露出适应性不足的问题。最后，需要建立一个更加开放、可演化的理论生态系统，通过持续的形式化验证与实证研究来推动该领域的成熟发展。"
-    source_map = f"> **来源映射**: {source}"
-    
-    return crit, auth, source_map
+    return render_rule(classify_path(filepath))
 
 
-def main():
-    root = r'E:\_src\formal-architecture\Analysis\FormalUnified'
-    files = glob.glob(os.path.join(root, '**', '*.md'), recursive=True)
-    
-    # 排除脚本自身
-    files = [f for f in files if os.path.basename(f) != '_batch_append.py']
-    
-    stats = {
+# 追加顺序：来源映射、权威引用、批判性总结；载荷 ID 为 "<规则 id>/<部分>"
+PARTS = ("source", "auth", "crit")
+
+
+def missing_parts(flags):
+    """按追加顺序列出缺失的部分"""
+    have = {"source": flags["has_source"], "auth": flags["has_auth"], "crit": flags["has_crit"]}
+    return [part for part in PARTS if not have[part]]
+
+
+def rule_id(index):
+    return RULES[index]["id"] if index < len(RULES) else DEFAULT_RULE["id"]
+
+
+def payload_text(payload_id):
+    """载荷 ID 对应的文本"""
+    rid, part = payload_id.split('/')
+    index = next((i for i, rule in enumerate(RULES) if rule["id"] == rid), len(RULES))
+    if rule_id(index) != rid:
+        raise KeyError(f"未知规则: {rid}")
+    crit, auth, source_map = render_rule(index)
+    return {"crit": crit, "auth": auth, "source": source_map}[part]
+
+
+def append_bytes(texts):
+    """待追加的字节：与文本模式追加写入的内容一致（含平台换行符）"""
+    append_str = "\n\n---\n\n" + "\n\n".join(texts) + "\n"
+    return append_str.replace("\n", os.linesep).encode('utf-8')
+
+
+def new_stats():
+    return {
         "processed": 0,
         "skipped_size": 0,
         "skipped_complete": 0,
         "by_dir": {},
         "small_files": 0,
+        # 两阶段执行时：生成计划后内容已变化、拒绝写入的文件数
+        "refused": 0,
+        # 运行报告用：各阶段耗时/字节数/单文件耗时，以及最慢的文件 [(秒数, 路径)]
+        "phases": {},
+        "slowest": [],
     }
+
+
+def merge_stats(stats, part, top=rr.SLOWEST_N):
+    """把一个批次（或工作进程）的 stats 合并进总 stats，by_dir 按出现顺序累加"""
+    for key in ("processed", "skipped_size", "skipped_complete", "small_files", "refused"):
+        stats[key] += part[key]
+    for d, c in part["by_dir"].items():
+        stats["by_dir"][d] = stats["by_dir"].get(d, 0) + c
+    rr.merge_phases(stats["phases"], part["phases"])
+    stats["slowest"] = rr.keep_slowest(stats["slowest"], part["slowest"], top)
+
+
+def skip_reason(size, has_crit, has_auth, has_source):
+    """根据大小与检测标志判断是否跳过，返回 stats 中对应的计数键或 None"""
+    # 跳过规则：>5KB且已有批判性总结/权威引用
+    if size > 5 * 1024 and has_crit and has_auth:
+        return "skipped_size"
+    if has_crit and has_auth and has_source:
+        return "skipped_complete"
+    return None
+
+
+def process_batch(batch, root, track=False, top=rr.SLOWEST_N):
+    """顺序处理一批 (size, path)，返回该批的 stats、错误信息列表与清单记录（track 为真时才收集）"""
+    stats = new_stats()
+    phases = stats["phases"]
+    errors = []
+    records = []
+    clock = time.perf_counter
+    # 本批次的写入共用一个 AtomicBatch：每个文件原子替换，目录在批次结束时统一 fsync
+    with AtomicBatch() as writer:
+        for size, f in batch:
+            started = clock()
+            try:
+                # 映射文件并直接在字节上检测（先查末尾），只认标题与引用块中的章节，
+                # 代码块与正文中的字样不算；跳过的文件既不整体读入也不解码
+                with open(f, 'rb') as fh, section_scan.mapped(fh) as buf:
+                    flags = section_scan.scan_flags(buf)
+                    t = clock()
+                    rr.add_sample(phases, "detect", t - started, len(buf))
+                    has_crit = flags["has_crit"]
+                    has_auth = flags["has_auth"]
+                    has_source = flags["has_source"]
+                    reason = skip_reason(size, has_crit, has_auth, has_source)
+                    if reason:
+                        digest = mf.content_hash(buf) if track else None
+                    else:
+                        raw = bytes(buf)
+                        rr.add_sample(phases, "read", clock() - t, len(raw))
+                
+                if reason:
+                    stats[reason] += 1
+                    if track:
+                        records.append((f, os.stat(f), digest, flags))
+                    continue
+                
+                # 非 UTF-8 文件直接报错跳过，避免向其追加文本
+                raw.decode('utf-8')
+                
+                # 检查是否需要追加
+                needs = missing_parts(flags)
+                
+                if size < 3 * 1024:
+                    stats["small_files"] += 1
+                
+                t = clock()
+                crit_text, auth_text, source_text = get_content_by_path(f)
+                rr.add_sample(phases, "classify", clock() - t)
+                texts = {"source": source_text, "auth": auth_text, "crit": crit_text}
+                
+                # 与文本模式追加写入的字节一致（含平台换行符），但只打开一次并原子替换
+                t = clock()
+                new = raw + append_bytes([texts[part] for part in needs])
+                writer.write(f, new)
+                rr.add_sample(phases, "write", clock() - t, len(new))
+                
+                if track:
+                    flags = {"has_crit": True, "has_auth": True, "has_source": True}
+                    records.append((f, os.stat(f), mf.content_hash(new), flags))
+                
+                stats["processed"] += 1
+                dirname = os.path.dirname(f).replace(root, '').strip('\\') or '(root)'
+                stats["by_dir"][dirname] = stats["by_dir"].get(dirname, 0) + 1
+                
+            except Exception as e:
+                errors.append(f"Error processing {f}: {e}")
+            rr.push_slowest(stats["slowest"], clock() - started, f, top)
+        t = clock()
+    # 批次末尾的目录 fsync 计入 write 总耗时，不计入单文件耗时
+    if batch:
+        rr.add_sample(phases, "write", clock() - t, per_file=False)
+    return stats, errors, records
+
+
+def split_batches(files_with_size, batch_size):
+    """把已按大小排序的列表切成连续批次，批内仍保持小文件优先"""
+    return [files_with_size[i:i + batch_size] for i in range(0, len(files_with_size), batch_size)]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="为 FormalUnified 文档追加缺失的权威引用、批判性总结与来源映射")
+    parser.add_argument('--root', default=r'E:\_src\formal-architecture\Analysis\FormalUnified',
+                        help="扫描根目录")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="工作进程数，1 表示顺序执行")
+    parser.add_argument('--batch-size', type=int, default=64,
+                        help="每个进程任务包含的文件数")
+    parser.add_argument('--manifest', default=None,
+                        help="增量清单路径；size 与 mtime 未变的文件直接复用上次的检测结果")
+    parser.add_argument('--skip-unchanged-dirs', action='store_true',
+                        help="配合 --manifest：目录 mtime 未变的子树不再遍历（要求文件经改名方式写入）")
+    parser.add_argument('--stream', action='store_true',
+                        help="边遍历边处理，不先收集并排序全部文件（只在批内按大小排序）")
+    parser.add_argument('--report', default=None,
+                        help="JSON 运行报告路径（分阶段耗时、读写字节、单文件耗时分位数、最慢文件）")
+    parser.add_argument('--slowest', type=int, default=rr.SLOWEST_N,
+                        help="运行报告中列出的最慢文件数")
+    parser.add_argument('--profile', default=None,
+                        help="开启 cProfile 并把结果写入该 .prof 文件（仅主进程）")
+    parser.add_argument('--tracemalloc', type=int, default=0, metavar='N',
+                        help="开启 tracemalloc，输出内存峰值与分配最多的 N 行（仅主进程）")
+    args = parser.parse_args(argv)
+    if args.skip_unchanged_dirs and not args.manifest:
+        parser.error("--skip-unchanged-dirs 需要同时指定 --manifest")
+    return args
+
+
+def _skip_by_manifest(manifest, entry, stats):
+    """清单命中且判定为跳过的文件无需打开；命中时计数并返回 True"""
+    hit = mf.lookup(manifest, entry.path, entry) if manifest else None
+    if hit:
+        flags = hit["flags"]
+        reason = skip_reason(entry.st_size, flags["has_crit"], flags["has_auth"], flags["has_source"])
+        if reason:
+            stats[reason] += 1
+            return True
+    return False
+
+
+def run(args):
+    """执行一次扫描与追加，返回 (stats, 扫描文件数, 错误信息列表)"""
+    root = args.root
+    stats = new_stats()
+    phases = stats["phases"]
+    clock = time.perf_counter
     
-    # 按文件大小排序：优先处理小文件
-    files_with_size = []
-    for f in files:
-        try:
-            files_with_size.append((os.path.getsize(f), f))
-        except Exception:
-            pass
-    files_with_size.sort(key=lambda x: x[0])
+    t = clock()
+    manifest = mf.load_manifest(args.manifest) if args.manifest else None
+    if manifest is not None:
+        rr.add_sample(phases, "manifest", clock() - t, per_file=False)
+    # 目录 mtime 未变的子树不再 scandir/stat，目录记录与清单保存在一起
+    dir_state = manifest.setdefault("dirs", {}) if manifest is not None and args.skip_unchanged_dirs else None
+    entries = walker.walk(root, include=("*.md",), state=dir_state)
     
-    for size, f in files_with_size:
-        try:
-            with open(f, 'r', encoding='utf-8') as fh:
-                content = fh.read()
-            
-            has_crit = '批判性总结' in content
-            has_auth = bool(re.search(r'>\s*\*\*[^*]+\*\*.*\d{4}', content))
-            has_source = '来源映射' in content
-            
-            # 跳过规则：>5KB且已有批判性总结/权威引用
-            if size > 5 * 1024 and has_crit and has_auth:
-                stats["skipped_size"] += 1
-                continue
-            
-            # 检查是否需要追加
-            needs = []
-            if not has_source:
-                needs.append("source")
-            if not has_auth:
-                needs.append("auth")
-            if not has_crit:
-                needs.append("crit")
-            
-            if not needs:
-                stats["skipped_complete"] += 1
-                continue
-            
-            if size < 3 * 1024:
-                stats["small_files"] += 1
-            
-            crit_text, auth_text, source_text = get_content_by_path(f)
-            
-            append_parts = []
-            if "source" in needs:
-                append_parts.append(source_text)
-            if "auth" in needs:
-                append_parts.append(auth_text)
-            if "crit" in needs:
-                append_parts.append(crit_text)
-            
-            append_str = "\n\n---\n\n" + "\n\n".join(append_parts) + "\n"
-            
-            with open(f, 'a', encoding='utf-8') as fh:
-                fh.write(append_str)
-            
-            stats["processed"] += 1
-            dirname = os.path.dirname(f).replace(root, '').strip('\\') or '(root)'
-            stats["by_dir"][dirname] = stats["by_dir"].get(dirname, 0) + 1
+    track = manifest is not None
+    top = args.slowest
+    all_errors = []
+    scanned = 0
+    # 本次遍历到的文件；保存清单时删除其余记录
+    seen = set()
+    
+    def consume(result):
+        part, errors, records = result
+        for msg in errors:
+            print(msg)
+        all_errors.extend(errors)
+        merge_stats(stats, part, top)
+        for f, st, digest, flags in records:
+            mf.record(manifest, f, st, digest, flags)
+    
+    pool = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    in_flight = deque()
+    
+    def dispatch(batch):
+        batch.sort(key=lambda x: x[0])
+        if pool is None:
+            consume(process_batch(batch, root, track, top))
+            return
+        in_flight.append(pool.submit(process_batch, batch, root, track, top))
+        # 在途批次数有上限，结果按提交顺序合并
+        while len(in_flight) > 2 * args.workers:
+            consume(in_flight.popleft().result())
+    
+    try:
+        walk_time = 0.0
+        t = clock()
+        if args.stream:
+            # 流式：边遍历边按批处理，只在批内按大小排序，内存与语料规模无关
+            batch = []
+            for entry in entries:
+                scanned += 1
+                if track:
+                    seen.add(entry.path)
+                if not _skip_by_manifest(manifest, entry, stats):
+                    batch.append((entry.st_size, entry.path))
+                if len(batch) >= max(1, args.batch_size):
+                    walk_time += clock() - t
+                    dispatch(batch)
+                    batch = []
+                    t = clock()
+            walk_time += clock() - t
+            rr.add_sample(phases, "walk", walk_time, per_file=False)
+            if batch:
+                dispatch(batch)
+        else:
+            # 按文件大小排序：优先处理小文件
+            pending = []
+            for entry in entries:
+                scanned += 1
+                if track:
+                    seen.add(entry.path)
+                if not _skip_by_manifest(manifest, entry, stats):
+                    pending.append((entry.st_size, entry.path))
+            pending.sort(key=lambda x: x[0])
+            rr.add_sample(phases, "walk", clock() - t, per_file=False)
             
-        except Exception as e:
-            print(f"Error processing {f}: {e}")
+            # 每个文件只属于一个批次，批次之间互不依赖；按提交顺序合并结果，
+            # 使 by_dir 的插入顺序与错误输出顺序都与顺序执行完全一致
+            if pool and pending:
+                for batch in split_batches(pending, max(1, args.batch_size)):
+                    dispatch(batch)
+            else:
+                consume(process_batch(pending, root, track, top))
+        while in_flight:
+            consume(in_flight.popleft().result())
+    finally:
+        if pool:
+            pool.shutdown()
     
+    if track:
+        t = clock()
+        mf.prune(manifest, seen)
+        mf.save_manifest(args.manifest, manifest)
+        rr.add_sample(phases, "manifest", clock() - t, per_file=False)
+    return stats, scanned, all_errors
+
+
+def stats_report(root, workers, wall_seconds, stats, scanned, errors):
+    """运行报告的公共部分：计数与控制台汇总一致，另含分阶段耗时与最慢文件"""
+    return {
+        "version": rr.REPORT_VERSION,
+        "finished": time.strftime('%Y-%m-%d %H:%M:%S'),
+        "root": root,
+        "workers": workers,
+        "wall_seconds": wall_seconds,
+        "files_scanned": scanned,
+        "stats": {key: stats[key] for key in
+                  ("processed", "small_files", "skipped_size", "skipped_complete", "refused", "by_dir")},
+        "phases": rr.summarize_phases(stats["phases"]),
+        "slowest": [{"path": f, "seconds": round(sec, 6)} for sec, f in sorted(stats["slowest"], reverse=True)],
+        "errors": errors,
+    }
+
+
+def build_report(args, stats, scanned, errors, prof):
+    """机器可读的运行报告：计数与控制台汇总一致，另含分阶段耗时、最慢文件与剖析结果"""
+    report = stats_report(args.root, args.workers, prof["wall_seconds"], stats, scanned, errors)
+    for key in ("profile", "tracemalloc"):
+        if key in prof:
+            report[key] = prof[key]
+    return report
+
+
+def print_summary(stats, scanned):
     print(f"=" * 60)
     print(f"处理完成统计")
     print(f"=" * 60)
-    print(f"总扫描文件数: {len(files_with_size)}")
+    print(f"总扫描文件数: {scanned}")
     print(f"成功处理: {stats['processed']} 个文件")
     print(f"其中 <3KB 小文件: {stats['small_files']} 个")
     print(f"跳过 (>5KB 且已有内容): {stats['skipped_size']} 个")
     print(f"跳过 (内容已完整): {stats['skipped_complete']} 个")
+    if stats["refused"]:
+        print(f"拒绝 (生成计划后内容已变化): {stats['refused']} 个")
     print(f"\n各目录处理数量:")
     for d, c in sorted(stats["by_dir"].items(), key=lambda x: -x[1]):
         print(f"  {d}: {c}")
     print(f"=" * 60)
 
 
+# ---------------------------------------------------------------------------
+# 两阶段执行：plan 只读扫描并写出计划文件；apply 按确定的分片执行写入，多台机器或容器
+# 共享同一卷时可各取一个分片并行；merge 把各分片的 stats 合并成一份报告。
+#
+# 计划条目为 [相对路径, 大小, 前置哈希, [载荷 ID]]，按大小排序；载荷 ID 为 "<规则 id>/<部分>"，
+# 分类在生成计划时完成，apply 不依赖根目录的绝对路径。计划同时记录各载荷文本的哈希，
+# 规则表改动后 apply 整体拒绝执行；文件内容与前置哈希不符的条目逐个拒绝。
+
+PLAN_VERSION = 1
+
+
+def make_plan(root):
+    """只读扫描 root，返回计划 dict"""
+    skipped = {"skipped_size": 0, "skipped_complete": 0}
+    entries = []
+    errors = []
+    scanned = 0
+    for entry in walker.walk(root, include=("*.md",)):
+        scanned += 1
+        try:
+            with open(entry.path, 'rb') as fh, section_scan.mapped(fh) as buf:
+                flags = section_scan.scan_flags(buf)
+                reason = skip_reason(len(buf), flags["has_crit"], flags["has_auth"], flags["has_source"])
+                raw = None if reason else bytes(buf)
+            if reason:
+                skipped[reason] += 1
+                continue
+            raw.decode('utf-8')
+        except Exception as e:
+            errors.append(f"Error processing {entry.path}: {e}")
+            continue
+        rid = rule_id(classify_path(entry.path))
+        entries.append([entry.rel, len(raw), mf.content_hash(raw), [f"{rid}/{part}" for part in missing_parts(flags)]])
+    # 与 run 相同：小文件优先；分片按下标轮转分配，各分片的大小分布相近
+    entries.sort(key=lambda e: e[1])
+    payloads = sorted({pid for e in entries for pid in e[3]})
+    return {
+        "version": PLAN_VERSION,
+        "created": time.strftime('%Y-%m-%d %H:%M:%S'),
+        "root": root,
+        "files_scanned": scanned,
+        "skipped": skipped,
+        "payloads": {pid: mf.content_hash(payload_text(pid).encode('utf-8')) for pid in payloads},
+        "entries": entries,
+        "errors": errors,
+    }
+
+
+def load_plan(path):
+    """返回 (计划, 计划文件哈希)"""
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    plan = json.loads(data.decode('utf-8'))
+    if plan.get("version") != PLAN_VERSION:
+        raise ValueError(f"计划版本不符: {path}")
+    return plan, mf.content_hash(data)
+
+
+def parse_shard(text):
+    """"i/N"（i 从 1 起）→ (i, N)"""
+    try:
+        i, n = (int(x) for x in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"分片格式应为 i/N: {text}")
+    if not 1 <= i <= n:
+        raise argparse.ArgumentTypeError(f"分片序号应在 1..{n} 之间: {text}")
+    return i, n
+
+
+def apply_plan(plan, root, shard=(1, 1), top=rr.SLOWEST_N):
+    """执行计划中属于该分片的条目，返回 (stats, 错误信息列表)；第 1 个分片同时计入计划阶段的跳过数与错误"""
+    i, n = shard
+    texts = {}
+    for pid, digest in plan["payloads"].items():
+        text = payload_text(pid)
+        if mf.content_hash(text.encode('utf-8')) != digest:
+            raise ValueError(f"载荷 {pid} 与生成计划时不同，请重新生成计划")
+        texts[pid] = text
+    stats = new_stats()
+    phases = stats["phases"]
+    errors = []
+    if i == 1:
+        for key, count in plan["skipped"].items():
+            stats[key] += count
+        errors.extend(plan["errors"])
+    clock = time.perf_counter
+    with AtomicBatch() as writer:
+        for rel, size, digest, payload_ids in plan["entries"][i - 1::n]:
+            started = clock()
+            f = os.path.join(root, *rel.split('/'))
+            try:
+                with open(f, 'rb') as fh:
+                    raw = fh.read()
+                t = clock()
+                rr.add_sample(phases, "read", t - started, len(raw))
+                unchanged = len(raw) == size and mf.content_hash(raw) == digest
+                rr.add_sample(phases, "verify", clock() - t)
+                if not unchanged:
+                    stats["refused"] += 1
+                    errors.append(f"Refused (changed since plan): {f}")
+                    continue
+                if size < 3 * 1024:
+                    stats["small_files"] += 1
+                t = clock()
+                new = raw + append_bytes([texts[pid] for pid in payload_ids])
+                writer.write(f, new)
+                rr.add_sample(phases, "write", clock() - t, len(new))
+                stats["processed"] += 1
+                dirname = os.path.dirname(f).replace(root, '').strip('\\') or '(root)'
+                stats["by_dir"][dirname] = stats["by_dir"].get(dirname, 0) + 1
+            except Exception as e:
+                errors.append(f"Error processing {f}: {e}")
+            rr.push_slowest(stats["slowest"], clock() - started, f, top)
+    return stats, errors
+
+
+def plan_main(argv):
+    parser = argparse.ArgumentParser(prog="_batch_append.py plan", description="只读扫描并写出追加计划")
+    parser.add_argument('--root', default=r'E:\_src\formal-architecture\Analysis\FormalUnified',
+                        help="扫描根目录")
+    parser.add_argument('--output', default='batch_append.plan.json', help="计划文件路径")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    plan = make_plan(args.root)
+    write_atomic(args.output, json.dumps(plan, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    for msg in plan["errors"]:
+        print(msg)
+    print(f"计划: {args.output}")
+    print(f"扫描 {plan['files_scanned']} 个文件，待追加 {len(plan['entries'])} 个，"
+          f"跳过 {sum(plan['skipped'].values())} 个，载荷 {len(plan['payloads'])} 种，"
+          f"耗时 {time.perf_counter() - started:.2f}s")
+
+
+def apply_main(argv):
+    parser = argparse.ArgumentParser(prog="_batch_append.py apply", description="按分片执行追加计划")
+    parser.add_argument('plan', help="计划文件路径")
+    parser.add_argument('--root', default=None, help="根目录（默认取计划中的根目录；共享卷挂载点不同时指定）")
+    parser.add_argument('--shard', type=parse_shard, default=(1, 1), metavar='i/N',
+                        help="只执行第 i 个分片（共 N 个，i 从 1 起）")
+    parser.add_argument('--stats-out', default=None,
+                        help="分片 stats 输出路径，默认 <计划>.shard-i-of-N.json，供 merge 合并")
+    parser.add_argument('--slowest', type=int, default=rr.SLOWEST_N, help="记录的最慢文件数")
+    args = parser.parse_args(argv)
+    plan, plan_hash = load_plan(args.plan)
+    root = args.root or plan["root"]
+    i, n = args.shard
+    started = time.perf_counter()
+    stats, errors = apply_plan(plan, root, args.shard, args.slowest)
+    wall = time.perf_counter() - started
+    for msg in errors:
+        print(msg)
+    print_summary(stats, plan["files_scanned"] if i == 1 else 0)
+    out = args.stats_out or f"{args.plan}.shard-{i}-of-{n}.json"
+    rr.write_report(out, {
+        "version": PLAN_VERSION,
+        "plan": plan_hash,
+        "root": root,
+        "shard": [i, n],
+        "files_scanned": plan["files_scanned"] if i == 1 else 0,
+        "wall_seconds": round(wall, 6),
+        "stats": stats,
+        "errors": errors,
+    })
+    print(f"分片 {i}/{n} stats: {out}")
+    return 1 if stats["refused"] else 0
+
+
+def merge_main(argv):
+    parser = argparse.ArgumentParser(prog="_batch_append.py merge", description="合并各分片的 stats")
+    parser.add_argument('parts', nargs='+', help="apply 写出的分片 stats 文件")
+    parser.add_argument('--report', default=None, help="合并后的 JSON 运行报告路径")
+    parser.add_argument('--slowest', type=int, default=rr.SLOWEST_N, help="报告中列出的最慢文件数")
+    args = parser.parse_args(argv)
+    parts = []
+    for path in args.parts:
+        with open(path, 'r', encoding='utf-8') as fh:
+            parts.append(json.load(fh))
+    parts.sort(key=lambda p: p["shard"][0])
+    if len({p["plan"] for p in parts}) != 1:
+        raise SystemExit("分片来自不同的计划")
+    n = parts[0]["shard"][1]
+    got = [p["shard"][0] for p in parts]
+    if any(p["shard"][1] != n for p in parts) or got != list(range(1, n + 1)):
+        raise SystemExit(f"分片不完整或重复：共 {n} 个，收到 {got}")
+    stats = new_stats()
+    errors = []
+    for p in parts:
+        merge_stats(stats, p["stats"], args.slowest)
+        errors.extend(p["errors"])
+    scanned = sum(p["files_scanned"] for p in parts)
+    print_summary(stats, scanned)
+    if args.report:
+        wall = max(p["wall_seconds"] for p in parts)
+        report = stats_report(parts[0]["root"], n, wall, stats, scanned, errors)
+        report["shards"] = [{"shard": f"{p['shard'][0]}/{n}", "root": p["root"],
+                             "wall_seconds": p["wall_seconds"], "processed": p["stats"]["processed"],
+                             "refused": p["stats"]["refused"]} for p in parts]
+        rr.write_report(args.report, report)
+        print(f"运行报告: {args.report}")
+    return 1 if stats["refused"] else 0
+
+
+COMMANDS = {"plan": plan_main, "apply": apply_main, "merge": merge_main}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+    args = parse_args(argv)
+    with rr.profiling(args.profile, args.tracemalloc) as prof:
+        stats, scanned, errors = run(args)
+    
+    print_summary(stats, scanned)
+    
+    if args.report:
+        rr.write_report(args.report, build_report(args, stats, scanned, errors, prof))
+        print(f"运行报告: {args.report}")
+    if args.profile:
+        print(f"cProfile 结果: {args.profile}")
+    if args.tracemalloc:
+        print(f"内存峰值: {prof['tracemalloc']['peak_bytes'] / 1024 / 1024:.1f} MB")
+        for line in prof["tracemalloc"]["top"]:
+            print(f"  {line}")
+
+
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -2,389 +2,242 @@
 """
 批量为09-理论增强与完善下的Markdown文件追加缺失的四个部分。
 处理20个核心文件（01-03/01-05/01-03等）。
+各文件的追加内容见 _batch_append_catalog.json，按需读取与渲染。
+写入前用 tools.tex_check 校验追加内容中的公式，有错误的文件不写入。
 """
 import os
 import re
+import json
+import argparse
+from functools import lru_cache
+
+from tools import manifest as mf
+from tools.atomic_write import AtomicBatch, write_atomic
+from tools.journal import open_journal, journal_add, close_journal, rollback
+from tools.section_index import build_index
+from tools.tex_check import FormulaError, check_text
 
 BASE = r"E:\_src\formal-architecture\Modern\09-理论增强与完善"
 
-# 权威引用素材库
-QUOTES = {
-    "formal": """> **C. A. R. Hoare** (1969): "An Axiomatic Basis for Computer Programming." *Communications of the ACM*, 12(10), 576–580.
->
-> **Yves Bertot & Pierre Castéran** (2004): *Interactive Theorem Proving and Program Development: Coq'Art*. Springer.
->
-> **John Harrison** (1996): "HOL Light: A Tutorial Introduction." *Formal Methods in Computer-Aided Design*, Springer, 265–269.""",
-    "empirical": """> **Barbara Kitchenham, Tore Dybå & Magne Jørgensen** (2004): "Evidence-based Software Engineering." *Proc. 26th ICSE*, IEEE, 273–281.
->
-> **Victor R. Basili & David M. Weiss** (1984): "A Methodology for Collecting Valid Software Engineering Data." *IEEE TSE*, SE-10(6), 728–738.
->
-> **Per Runeson, Martin Höst & Austen Rainer** (2012): *Case Study Research in Software Engineering: Guidelines and Examples*. Wiley.""",
-    "mda": """> **Miller, J. & Mukerji, J.** (2003): *MDA Guide Version 1.0.1*. Object Management Group (OMG).
->
-> **Eric Evans** (2003): *Domain-Driven Design: Tackling Complexity in the Heart of Software*. Addison-Wesley.
->
-> **Thomas Gruber** (1993): "A Translation Approach to Portable Ontology Specifications." *Knowledge Acquisition*, 5(2), 199–220.""",
-    "philosophy": """> **Ludwig Wittgenstein** (1922): *Tractatus Logico-Philosophicus*. Routledge & Kegan Paul.
->
-> **Thomas Gruber** (1993): "An ontology is an explicit specification of a conceptualization." *Knowledge Acquisition*, 5(2), 199–220.
->
-> **Martin Heidegger** (1927): *Sein und Zeit* (Being and Time). Niemeyer.""",
-    "validation": """> **Karl Popper** (1959): *The Logic of Scientific Discovery*. Hutchinson.
->
-> **Thomas S. Kuhn** (1962): *The Structure of Scientific Revolutions*. University of Chicago Press.
->
-> **Imre Lakatos** (1970): "Falsification and the Methodology of Scientific Research Programmes." In *Criticism and the Growth of Knowledge*, Cambridge.""",
-}
-
-SOURCE_MAP = {
-    "formal": """> **来源映射**: Hoare逻辑 (1969) → 程序验证公理化基础；Floyd (1967) → 流程图语义；Coq/Lean证明助手 → 现代交互式定理证明；范畴论 (Mac Lane, 1971) → 结构同构数学基础。""",
-    "empirical": """> **来源映射**: Basili GQM (1984) → 实验设计目标-问题-度量框架；Kitchenham EBSE (2004) → 循证软件工程方法论；Runeson案例研究 (2012) → 软件工程案例研究规范。""",
-    "mda": """> **来源映射**: OMG MDA标准 (2003) → 平台无关/特定模型分离；Evans DDD (2003) → 领域驱动设计与限界上下文；Gruber本体论 (1993) → 语义概念显式化规范。""",
-    "philosophy": """> **来源映射**: Wittgenstein逻辑原子论 (1922) → 最小语义原子概念；Plato理念论 → 双世界假说哲学原型；Heidegger存在论 (1927) → 此在与情境性；Whitehead过程哲学 → 事件本体论优先。""",
-    "validation": """> **来源映射**: Popper可证伪性 (1959) → 科学理论检验标准；Kuhn范式理论 (1962) → 理论演化与革命；Lakatos研究纲领 (1970) → 理论修正与保护带；Fisher统计推断 → 假设检验与置信区间。""",
-}
-
-def make_append(key, title, critical_text, formal_text):
-    """生成要追加的完整文本"""
+CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_batch_append_catalog.json')
+JOURNAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_batch_append.journal')
+
+
+@lru_cache(maxsize=None)
+def load_catalog(path=CATALOG):
+    """权威引用、来源映射与各目标文件的追加内容都在 JSON 目录中，首次使用时才读取"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def make_append(key, title, critical_text, formal_text, catalog=None, check=True):
+    """生成要追加的完整文本；check 为真时校验其中的公式，有错误抛出 FormulaError"""
+    catalog = catalog or load_catalog()
     parts = []
     parts.append(f"\n\n## 批判性总结\n\n{critical_text}")
-    parts.append(f"\n\n## 权威引用\n\n{QUOTES[key]}")
+    parts.append(f"\n\n## 权威引用\n\n{catalog['quotes'][key]}")
     parts.append(f"\n\n## 形式化定义\n\n{formal_text}")
-    parts.append(f"\n\n## 来源映射\n\n{SOURCE_MAP[key]}")
-    return "\n".join(parts)
-
-# 为20个文件定义追加内容
-APPENDS = {}
-
-# ========== 01-形式化证明增强 ==========
-APPENDS[os.path.join(BASE, "01-形式化证明增强", "01-结构同构定律的存在性与唯一性证明.md")] = make_append(
-    "formal",
-    "结构同构定律的存在性与唯一性证明",
-    """本文档通过范畴论框架证明了业务语义模型与技术实现模型之间双射的存在性与唯一性，填补了理论体系中最核心的形式化空白。证明采用构造性方法，定义了语义范畴$\\mathcal{S}$与技术范畴$\\mathcal{T}$，并构造了实现函子$F: \\mathcal{S} \\to \\mathcal{T}$，进而证明其为同构函子。这一证明路径在数学上是自洽的，但仍存在若干值得批判审视的维度。首先，唯一性证明依赖于"语义保真约束"这一强假设，该假设在文档中定义为$\\forall e \\in M_{semantic}, \\text{sem}(e) = \\text{sem}(f(e))$，然而"语义"$\\text{sem}(x)$本身并未给出独立于实现的形式化定义，这使得唯一性证明在某种意义上是循环的。其次，边界情况讨论虽然提到了不可计算元素和非确定性语义，但仅给出了启发式解决方案，未证明这些方案不会破坏同构性。第三，范畴论要求对象和态射的严格定义，但技术实现模型$M_{technical}$的边界模糊——它是否包含框架代码、配置、基础设施即代码？若包含，则映射的满射性可能不成立；若不包含，则"技术实现"的概念过于狭窄，难以覆盖现代云原生系统的完整技术栈。此外，唯一性"在给定技术栈下成立"的弱化虽然务实，但也削弱了定律的普适性声明。""",
-    """**定义 F.1** (结构同构映射)
-设 $\\mathcal{S} = \\langle Ob(\\mathcal{S}), Hom(\\mathcal{S}), \\circ, id \\rangle$ 为语义范畴，$\\mathcal{T} = \\langle Ob(\\mathcal{T}), Hom(\\mathcal{T}), \\circ, id \\rangle$ 为技术范畴。若存在函子 $F: \\mathcal{S} \\to \\mathcal{T}$ 满足：
-1. **对象映射**：$\\forall M_{semantic} \\in Ob(\\mathcal{S}), \\exists! M_{technical} \\in Ob(\\mathcal{T}): F(M_{semantic}) = M_{technical}$
-2. **态射满射**：$\\forall g \\in Hom(\\mathcal{T}), \\exists f \\in Hom(\\mathcal{S}): F(f) = g$
-3. **态射单射**：$\\forall f_1, f_2 \\in Hom(\\mathcal{S}), F(f_1) = F(f_2) \\Rightarrow f_1 = f_2$
-则称 $F$ 为**结构同构映射**，记作 $\\mathcal{S} \\cong \\mathcal{T}$。"""
-)
-
-APPENDS[os.path.join(BASE, "01-形式化证明增强", "02-语义熵的严格数学定义与性质.md")] = make_append(
-    "formal",
-    "语义熵的严格数学定义与性质",
-    """本文档将香农信息论中的熵概念迁移到语义空间，提出了语义熵$H(S) = -\\sum_{s \\in S} P(s) \\log_2 P(s)$的严格数学定义，并证明了非负性、最大值、可加性与凸性四条核心性质。这一迁移在理论构建上具有启发性，但也面临深层的批判性挑战。首要问题是**概率分布的客观性**：语义概率$P(s)$被定义为"出现频率"或"业务重要性权重"，这两种定义在操作层面存在本质张力——频率是客观的统计量，而业务权重是主观的专家判断。若采用频率定义，则语义熵退化为代码统计复杂度（如Halstead度量）；若采用权重定义，则熵值随评估者而变，丧失了跨团队可比性。其次，熵的可加性定理要求子空间独立，但业务语义空间的高度耦合性使得独立分解往往不成立。例如，"订单"实体与"支付事件"在业务上紧密关联，强行分解会导致联合概率$P(s_1, s_2) \\neq P(s_1)P(s_2)$，从而破坏可加性。第三，语义熵作为"复杂度度量"的实用价值尚未得到实证验证：高熵系统是否确实更难维护？熵的演化（$\\Delta H$）是否能有效预警架构腐化？这些预测需要对照实验支撑，目前仍是理论假设。最后，文档将语义复杂度归一化为$H(S)/\\log_2|S|$，但该归一化假设了均匀分布为"最复杂"状态，这在软件工程语境下缺乏先验理由。""",
-    """**定义 F.2** (语义熵)
-设 $S$ 为有限语义空间，$P: S \\to [0,1]$ 为语义概率分布，满足 $\\sum_{s \\in S} P(s) = 1$。语义熵 $H(S)$ 定义为：
-$$H(S) = -\\sum_{s \\in S} P(s) \\log_2 P(s)$$
-其中约定 $0 \\cdot \\log_2 0 = 0$。
-
-**定义 F.3** (语义联合熵)
-设 $S_1, S_2$ 为两个语义空间，$P(s_1, s_2)$ 为联合概率分布。语义联合熵定义为：
-$$H(S_1, S_2) = -\\sum_{s_1 \\in S_1} \\sum_{s_2 \\in S_2} P(s_1, s_2) \\log_2 P(s_1, s_2)$$
-
-**定义 F.4** (语义条件熵)
-$$H(S_2 | S_1) = H(S_1, S_2) - H(S_1)$$
-当且仅当 $S_1$ 与 $S_2$ 统计独立时，$H(S_1, S_2) = H(S_1) + H(S_2)$。"""
-)
-
-APPENDS[os.path.join(BASE, "01-形式化证明增强", "03-MSMFIT最小性的不可约简性证明.md")] = make_append(
-    "formal",
-    "MSMFIT最小性的不可约简性证明",
-    """本文档运用反证法与奥卡姆剃刀原则，论证了MSMFIT四要素$\\{E, R, V, C\\}$的独立性与完备性，试图证明其"不可约简性"。证明结构清晰，但从严格逻辑角度审视仍存在显著薄弱点。首先，独立性证明采用了反证法，其核心逻辑是：假设某要素可由其余三要素推导，然后构造一个反例场景说明推导失败。然而，这种反例论证只能证明"在特定场景下不能推导"，而非"在所有可能的形式系统中不能推导"。例如，实体$E$的独立性证明依赖于"关系需要主体和客体"，但若允许高阶关系（即关系的主体可以是另一关系），则$E$可能嵌入$R$的定义中。其次，完备性证明将所有业务语义信息归类为静态结构、动态行为、环境约束三类，然后分别对应$E/R$、$V$、$C$。这一归类的完备性本身是一个归纳断言，而非演绎证明——文档未排除存在第四类语义信息的可能性。第三，五要素冗余性证明依赖"四要素足以描述所有业务系统"这一前提，但该前提正是需要证明的结论，形成了潜在的循环论证。此外，奥卡姆剃刀原则（"如无必要，勿增实体"）是启发性原则而非逻辑必然性，不能作为数学证明的演绎依据。维特根斯坦的逻辑原子主义虽然被引用为哲学基础，但其"原子事实"概念在当代哲学中已被质疑，直接映射到软件工程领域需要更多中介论证。""",
-    """**定义 F.5** (MSMFIT最小性)
-设 $\\mathcal{M} = \\{E, R, V, C\\}$ 为MSMFIT四要素集合。$\\mathcal{M}$ 是**最小充分**的，当且仅当：
-1. **独立性**：$\\forall x \\in \\mathcal{M}, x \\not\\in \\text{Cl}(\\mathcal{M} \\setminus \\{x\\})$，其中 $\\text{Cl}(\\cdot)$ 表示在给定形式系统中的逻辑闭包。
-2. **完备性**：$\\forall B \\in \\textbf{BusinessSystems}, \\exists f: B \\to \\mathcal{M}$，使得 $B$ 的所有语义信息可经 $f$ 编码为 $\\mathcal{M}$ 的实例。
-3. **最小性**：$\\nexists \\mathcal{M}' \\subset \\mathcal{M}$ 满足上述完备性条件。"""
-)
-
-# ========== 02-实证研究与验证 ==========
-APPENDS[os.path.join(BASE, "02-实证研究与验证", "01-实验设计框架.md")] = make_append(
-    "empirical",
-    "实验设计框架",
-    """本文档构建了一个对照实验（RCT）框架，试图以随机分配、控制变量、统计假设检验的方式验证语义驱动架构（SMDD）的效果。框架在方法论层面遵循了循证软件工程的基本规范，设计了实验组与对照组、定义了$t_{c2c}$、$D_{debt}$、$R_{dup}$、$T_{recovery}$等测量指标，并引入了Cohen's d效应量。然而，该框架在实际可执行性上面临严峻挑战。首要问题是**随机分配的可行性**：在真实工业环境中，项目团队无法像医学试验那样随机分配到"使用SMDD"或"不使用SMDD"的组别中；团队的技术栈选择、管理决策、历史债务均非随机变量，导致选择偏差（selection bias）几乎不可避免。其次，控制变量表中列出的"项目规模、团队经验、技术栈、业务复杂度"在实际操作中极难精确匹配——两个项目的"业务复杂度"如何量化到可比较的程度？文档未提供经过验证的复杂度量表。第三，效应量解释直接套用心理学领域的Cohen's d阈值（0.2/0.5/0.8），但软件工程中的效应分布可能与此不同，直接迁移可能产生误导。Kitchenham等人早已指出软件工程实验中的统计实践存在严重问题，包括样本量不足、多重比较未校正、p值滥用等。本框架虽然提到了显著性水平$\\alpha=0.05$，但未讨论统计功效（power）分析，也未提及预注册（pre-registration）机制，这在当代开放科学实践中已成为基本要求。""",
-    """**定义 E.1** (对照实验设计)
-设 $T$ 为处理（SMDD），$C$ 为对照（传统架构）。对照实验 $\\mathcal{E}$ 定义为四元组：
-$$\\mathcal{E} = \\langle P, R, V, H \\rangle$$
-其中：
-- $P = \\{(p_i, a_i) \\mid p_i \\in \\text{Projects}, a_i \\in \\{T, C\\}\\}$ 为项目-分配对集合；
-- $R: \\text{Projects} \\to \\mathbb{R}^n$ 为控制变量匹配函数；
-- $V = \\{v_1, v_2, \\dots, v_m\\}$ 为测量指标集合；
-- $H_0: \\mu_T = \\mu_C$ 为零假设，$H_1: \\mu_T \\neq \\mu_C$ 为备择假设。
-
-**定义 E.2** (效应量)
-$$d = \\frac{\\bar{x}_T - \\bar{x}_C}{s_{pooled}}, \\quad s_{pooled} = \\sqrt{\\frac{(n_T-1)s_T^2 + (n_C-1)s_C^2}{n_T + n_C - 2}}$$
-当 $|d| \\geq 0.5$ 时，认为存在具有工程实践意义的效应。"""
-)
-
-APPENDS[os.path.join(BASE, "02-实证研究与验证", "02-案例研究收集与分析.md")] = make_append(
-    "empirical",
-    "案例研究收集与分析",
-    """本文档建立了案例研究的收集、分析与模板框架，涵盖小型（<10人月）、中型（10-50人月）、大型（>50人月）项目，并设计了描述性分析、对比分析与因素分析三种方法。框架在结构上是完整的，但其批判性弱点在于**证据质量控制的缺失**。Runeson等人在软件工程案例研究指南中强调，案例研究必须明确其有效性威胁（validity threats），包括构念效度、内部效度、外部效度和可靠性。本文档虽然提到了数据质量控制和隐私保护，但未系统性地识别和缓解这些效度威胁。例如，案例选择中的"代表性"原则要求涵盖成功与失败案例，但在实际收集中，失败案例往往因组织政治原因难以获取，导致幸存者偏差。其次，对比分析中使用的$\\Delta T = T_{traditional} - T_{sda}$等指标隐含了一个强假设：传统项目与SMDD项目在其他条件上完全可比。然而，选择SMDD的团队往往是技术前瞻性较强的团队，其本身可能具有更高的基线效率，这种自选择效应会混淆SMDD的真实因果效应。第三，因素分析中提到的"相关性分析"和"回归分析"需要足够大的样本量，但文档目标仅收集5-7个案例，远不足以支撑多变量回归的稳定估计。Basili的GQM方法要求每个度量都必须追溯到明确的研究问题，但本文档中的部分指标（如"扩展认知成本"$C_{cognitive}$）的操作定义仍显模糊。""",
-    """**定义 E.3** (案例研究有效性)
-案例研究 $\\mathcal{C}$ 的有效性 threatened by：
-- **构念效度** $\\theta_{con}$：测量指标是否真实反映了理论构念；
-- **内部效度** $\\theta_{int}$：观察到的因果关系中是否存在混淆变量；
-- **外部效度** $\\theta_{ext}$：结论能否推广到其他项目、组织或领域；
-- **可靠性** $\\theta_{rel}$：在相同条件下重复研究是否得到一致结果。
-
-**定义 E.4** (因果效应估计)
-设 $Y_i(1)$ 为项目 $i$ 采用SMDD的潜在结果，$Y_i(0)$ 为采用传统架构的潜在结果。平均处理效应（ATE）为：
-$$\\tau = \\frac{1}{n} \\sum_{i=1}^{n} [Y_i(1) - Y_i(0)]$$
-由于 $Y_i(1)$ 与 $Y_i(0)$ 不可同时观测，需通过匹配或工具变量法估计。"""
-)
-
-APPENDS[os.path.join(BASE, "02-实证研究与验证", "03-数据验证机制.md")] = make_append(
-    "empirical",
-    "数据验证机制",
-    """本文档设计了预测准确性评估、置信区间计算、异常值分析与统计显著性检验的完整数据验证机制，试图建立理论预测与实际结果之间的可追溯对比链条。方法论上，文档引入了MAE、RMSE、MAPE等标准预测误差度量，以及Bootstrap和非参数方法等稳健统计技术，体现了一定的严谨性。然而，该机制在哲学层面存在一个根本性张力：**频率学派与贝叶斯学派的冲突**。文档采用频率学派框架（p值、置信区间），但软件工程实践中的预测往往涉及先验信息（如历史项目的类似指标），贝叶斯方法可能更合适。更关键的是，文档中的示例数据（如"开发时间减少50%"vs"实际45%"）是假设性的，未注明来源，这恰恰违背了文档自身旨在解决的"量化指标缺乏可验证来源"问题。其次，异常值处理策略中提出的"保留、修正、删除、分组"四种方法虽然全面，但缺乏明确的决策规则——何时选择删除而非保留？文档建议"如果异常值严重影响结论则删除"，但这一标准高度主观。第三，统计功效（power）计算虽然出现在文档中，但目标功效$\\geq 0.80$的要求在软件工程实验中极难达到；Kitchenham和Madeyski的研究表明，由于软件工程效应量通常较小且方差较大，达到80%功效所需的样本量往往超出工业合作的可行范围。最后，误差分析将系统性误差归因于"理论假设不准确"，但未提供区分系统性误差与模型误差的统计检验方法。""",
-    """**定义 E.5** (预测准确性)
-设 $\\hat{y}_i$ 为理论预测值，$y_i$ 为实际观测值。预测准确性定义为：
-$$\\text{Accuracy} = 1 - \\frac{1}{n} \\sum_{i=1}^{n} \\frac{|\\hat{y}_i - y_i|}{|\\hat{y}_i|}$$
-
-**定义 E.6** (统计功效)
-设 $\\delta$ 为最小可检测效应量，$\\sigma$ 为总体标准差，$\\alpha$ 为显著性水平，$n$ 为样本量。单侧检验的统计功效为：
-$$\\text{Power} = 1 - \\Phi\\left(z_{1-\\alpha} - \\frac{\\delta\\sqrt{n}}{\\sigma}\\right)$$
-其中 $\\Phi$ 为标准正态CDF。在给定 $\\text{Power} \\geq 0.80$ 约束下，可反解所需样本量 $n$。"""
-)
-
-# ========== 03-国际对标深化 ==========
-APPENDS[os.path.join(BASE, "03-国际对标深化", "01-MDA深度对比分析.md")] = make_append(
-    "mda",
-    "MDA深度对比分析",
-    """本文档对OMG的模型驱动架构（MDA）与SMDD进行了多维度深度对比，识别出核心载体（UML vs DSL）、抽象层级（三层PIM→PSM→Code vs 两层语义→代码）、语义保障（OCL附加约束 vs 语义模型即规范）和可逆性（单向 vs 双向）四项实质性差异。对比分析在结构上是系统的，但在批判性层面存在几个值得警惕的倾向。首先，对比表格中的部分结论带有一定的**价值判断色彩**——例如将MDA的"技术导向"标注为"业务人员参与度低"，将SMDD的"业务导向"标注为"参与度高"，但这种参与度差异并未经过实证测量，而是基于DSL文本"可能更易读"的推测。事实上，MPS等投影编辑器可以让业务人员以表格/表单方式编辑DSL，但同样的，UML配置文件（UML Profile）也可以被业务人员理解，两种载体的可读性差异并非必然。其次，文档将MDA的"不支持可逆性"作为关键差异，但MDA的QVT标准中的 Relations 语言确实支持双向转换，只是工业实现成熟度不足。将标准能力与实现成熟度混为一谈，可能低估了MDA生态的潜在能力。第三，"融合路径"部分提出的分层融合策略（SMDD DSL → MDA UML → Code）在概念上合理，但未讨论两层可视化之间的同步一致性问题——当DSL和UML同时作为"单一事实来源"的不同视图时，若出现视图间不一致，应以何者为准？文档未提供冲突解决机制。最后，对MDA工具链成熟度的承认（Enterprise Architect、MagicDraw等）与SMDD工具链的相对薄弱形成对比，但文档未量化这种成熟度差距对采纳决策的实际影响。""",
-    """**定义 M.1** (MDA抽象层级)
-OMG MDA定义三层抽象模型：
-- **PIM** (Platform-Independent Model): $M_{PIM} = \\langle C, A, O \\rangle$，其中 $C$ 为类集合，$A$ 为关联集合，$O$ 为OCL约束集合；
-- **PSM** (Platform-Specific Model): $M_{PSM} = \\langle C', A', O', P \\rangle$，其中 $P$ 为平台描述模型；
-- **Code**: $M_{Code} = \\langle T, D, I \\rangle$，其中 $T$ 为类型系统，$D$ 为数据声明，$I$ 为指令序列。
-转换关系为 $T_{PIM\\to PSM}: M_{PIM} \\to M_{PSM}$ 和 $T_{PSM\\to Code}: M_{PSM} \\to M_{Code}$。"""
-)
-
-APPENDS[os.path.join(BASE, "03-国际对标深化", "02-语义网映射关系.md")] = make_append(
-    "mda",
-    "语义网映射关系",
-    """本文档建立了MSMFIT与RDF/OWL之间的映射表，并论证了MSMFIT相对于直接使用OWL的简化性、业务导向、可逆性与性能优势。映射表在技术细节上是有帮助的，但批判性审视 reveals several oversimplifications. 首先，映射表将MSMFIT的$E$（实体）直接映射到$owl:Class$，$R$映射到$owl:ObjectProperty$，这种一一对应忽略了OWL本体的丰富表达能力。OWL支持类表达式（如$owl:Restriction$）、属性特征（如传递性、对称性、功能性）和复杂的公理（如$owl:disjointWith$、$owl:equivalentClass$），这些能力在MSMFIT中完全没有对应物，而文档将其简单归类为"非必需"——但这一归类本身就需要论证：哪些业务场景确实不需要这些表达能力？其次，性能考虑的论证指出"OWL推理开销大"，但MSMFIT同样可以在需要时调用外部推理引擎；将MSMFIT与无推理的OWL子集对比是不对称的。第三，SPARQL集成方案中给出的查询示例是标准SPARQL，但文档声称将MSMFIT查询"重写为优化的SPARQL查询"，未给出具体的重写规则和代价模型。最后，可逆性论证声称OWL"不支持代码生成"，但OWL与代码生成之间并无本质障碍——多个框架（如Apache Jena的代码生成工具）已实现从OWL Schema到Java类的生成。MSMFIT的真正优势可能不在于OWL不能做什么，而在于MSMFIT为特定领域（业务系统）做了预设的语义设计选择，从而降低了建模者的决策负担。""",
-    """**定义 M.2** (MSMFIT ↔ OWL映射)
-设 $\\mathcal{M} = \\langle E, R, V, C \\rangle$ 为MSMFIT模型，$\\mathcal{O} = \\langle C_{owl}, P_{obj}, P_{data}, A \\rangle$ 为OWL本体。映射函数 $\\Phi: \\mathcal{M} \\to \\mathcal{O}$ 定义为：
-- $\\Phi_E(e) = \\langle owl:Class(URI_e), owl:DatatypeProperty(URI_{attr}) \\rangle$
-- $\\Phi_R(r) = owl:ObjectProperty(URI_r)$，满足 $dom(URI_r) = URI_{subj}$，$range(URI_r) = URI_{obj}$
-- $\\Phi_V(v) = owl:Class(URI_v) \\sqcap \\exists hasTimestamp.xsd:dateTime$
-- $\\Phi_C(c) = owl:AnnotationProperty(URI_c)$
-映射保持语义当且仅当 $\\forall m \\in \\mathcal{M}, \\text{sem}(m) \\approx \\text{sem}(\\Phi(m))$。"""
-)
-
-APPENDS[os.path.join(BASE, "03-国际对标深化", "03-DDD融合深化.md")] = make_append(
-    "mda",
-    "DDD融合深化",
-    """本文档提供了从DDD到SMDD的迁移指南，重点讨论了限界上下文的自动识别和两种方法的互补关系。迁移指南的步骤描述清晰，DSL示例有助于理解，但文档在几个关键问题上过于乐观。首先是**限界上下文自动识别**的算法可行性：文档提出的基于实体关系图聚类的方法（K-means或层次聚类）面临一个根本困难——限界上下文的边界不仅是技术问题，更是组织问题和政治问题。Evans在原始DDD著作中反复强调，限界上下文的划分需要领域专家和开发团队的深度协作与共识，而非单纯从技术结构推导。一个关系密度高的模块可能因组织原因被拆分到不同团队，而关系稀疏的模块可能因安全合规要求被强制合并。算法无法捕捉这些非技术约束。其次，"互补关系"的论述倾向于将DDD定位为"战略设计"、SMDD定位为"战术实现"，这种分工虽然便利，但可能过度简化了DDD的战术设计价值——DDD的聚合、值对象、领域服务等战术模式不仅是实现细节，更是深刻的设计智慧，SMDD的自动生成是否能等价替代这些模式仍需证明。第三，迁移指南中的DSL示例将统一语言直接映射为entity/relation/event结构，但DDD的统一语言包含丰富的行为描述（如"订单在支付后进入待发货状态"），这些状态机行为在DSL中如何表达？文档未给出对应的状态迁移形式化机制。最后，互补关系的论证缺少实证支撑：有多少团队成功实践了"DDD战略 + SMDD战术"的分层方法？文档未引用任何案例。""",
-    """**定义 M.3** (限界上下文自动识别)
-设 $G = (E, R, w)$ 为带权实体关系图，其中 $w: R \\to \\mathbb{R}^+$ 为关系强度函数。限界上下文识别为图划分问题：
-$$\\text{Find } \\{BC_1, BC_2, \\dots, BC_k\\} \\text{ s.t. } \\bigcup_{i=1}^k BC_i = E, \\quad BC_i \\cap BC_j = \\emptyset (i \\neq j)$$
-最小化跨上下文关系权重和：
-$$\\min \\sum_{i \\neq j} \\sum_{\\substack{e_p \\in BC_i \\text{ or } e_q \\in BC_j}} w(r_{pq})$$
-约束条件：$|BC_i| \\leq \\tau_{max}$（上下文规模上限），$\\text{density}(BC_i) \\geq \\delta_{min}$（内部密度下限）。"""
-)
-
-APPENDS[os.path.join(BASE, "03-国际对标深化", "04-DDD战术战略模式深度对比.md")] = make_append(
-    "mda",
-    "DDD战术战略模式深度对比",
-    """本文档对DDD的战略设计模式（限界上下文、上下文映射、子域划分）和战术模式（实体、值对象、聚合、领域服务、领域事件）进行了与MSMFIT/SMDD的逐项深度对比，并提供了模式映射矩阵和迁移决策树。这种系统性对比在架构迁移决策中具有较高的实用价值，但也存在一些批判性盲点。首先，映射矩阵将DDD的"仓储"（Repository）映射为"生成或防腐层"，将"工厂"（Factory）映射为"生成"，这种映射过于粗糙——仓储的本质是聚合的持久化抽象，它不仅是代码生成问题，更涉及事务边界、乐观锁、查询优化等深层技术决策，SMDD的生成器是否能自动处理这些复杂性？文档未给出证据。其次，决策树中"遗留代码存在？→ 是 → 防腐层 + 渐进式迁移"的分支虽然合理，但"遗留代码存在"这一节点的判断标准未定义——是代码行数>10万行？是技术债务密度>阈值？还是团队对遗留系统的知识流失程度？缺乏可操作的标准使得决策树在实际中难以落地。第三，战术模式对比中，DDD的"不变式"（Invariant）被映射为"DSL验证规则、SHACL"，但SHACL是W3C的约束语言，主要用于RDF数据验证，与业务层不变式（如"订单金额必须大于0"）的抽象层级不同。将两者等同可能掩盖了从业务规则到SHACL约束的语义距离。最后，文档未讨论DDD的战略模式中最具争议的"核心域识别"问题——SMDD是否有方法辅助判断哪个子域应被识别为核心域？这一战略决策对企业的资源分配至关重要。""",
-    """**定义 M.4** (模式映射保真性)
-设 $\\mathcal{D}$ 为DDD模式集合，$\\mathcal{S}$ 为SMDD构造集合。模式映射 $\\Psi: \\mathcal{D} \\to \\mathcal{S} \\cup \\{	ext{保留}, \\text{混合}\\}$ 满足**保真性**当且仅当：
-$$\\forall d \\in \\mathcal{D}, \\quad \\text{behaviour}(d) \\subseteq \\text{behaviour}(\\Psi(d))$$
-即SMDD构造的行为语义包含原DDD模式的行为语义。映射的**保真度**定义为：
-$$\\text{Fidelity}(\\Psi) = \\frac{|\\{d \\in \\mathcal{D} \\mid \\text{behaviour}(d) = \\text{behaviour}(\\Psi(d))\\}|}{|\\mathcal{D}|}$$
-当前目标：$\\text{Fidelity}(\\Psi) \\geq 0.85$。"""
-)
-
-APPENDS[os.path.join(BASE, "03-国际对标深化", "05-MDA工具链与实践案例对比.md")] = make_append(
-    "mda",
-    "MDA工具链与实践案例对比",
-    """本文档对比了MDA与SMDD的工具链成熟度，并提供了实践案例对比矩阵和选型决策矩阵。工具链对比在事实层面基本准确——Xtext、MPS、Nop Platform等确实代表了SMDD生态的主流工具，而Enterprise Architect、Acceleo等是MDA的典型代表。然而，文档在案例对比维度上存在严重的**可验证性危机**。对比表中列出的"概念到代码：MDA 2-4周 vs SMDD 1-3天"、"需求变更响应：MDA 3-7天 vs SMDD 2-8小时"等数据没有提供任何引用来源或方法论说明。这些数据若是基于作者个人经验，则应明确标注为"经验估计"而非"典型值"；若是基于文献，则应给出具体引用。在学术写作中，这种缺乏来源的量化对比会严重损害文档的可信度。其次，"代码生成率"的对比（MDA 30-60% vs SMDD 60-90%）存在定义模糊问题——"代码生成率"是按行数计算还是按功能点计算？是否包含测试代码、配置代码、基础设施代码？不同计算方式下结果可能截然不同。第三，选型决策矩阵虽然提供了场景化建议，但建议的置信度未量化。例如，"遗留UML资产多 → MDA或防腐层+SMDD"这一建议在什么程度的遗留资产下适用？如果遗留资产占总代码库的80% vs 20%，策略是否应该不同？文档未提供阈值。最后，实践案例对比中提到的"中兴Nop Platform"等案例虽然是真实存在的工业实践，但未公开披露经过审计的量化数据，难以作为严格的科学证据。""",
-    """**定义 M.5** (工具链成熟度)
-设工具 $t$ 的成熟度 $M(t)$ 由以下维度加权计算：
-$$M(t) = w_1 \\cdot S_{stable} + w_2 \\cdot S_{docs} + w_3 \\cdot S_{community} + w_4 \\cdot S_{ecosystem}$$
-其中：
-- $S_{stable} \\in [0,1]$：API稳定性与向后兼容性得分；
-- $S_{docs} \\in [0,1]$：官方文档完整性与示例丰富度得分；
-- $S_{community} \\in [0,1]$：社区活跃度（GitHub stars、StackOverflow标签数、年会议数）；
-- $S_{ecosystem} \\in [0,1]$：插件/扩展/第三方集成丰富度。
-权重满足 $w_1 + w_2 + w_3 + w_4 = 1$。工具链整体成熟度为 $\\bar{M} = \\frac{1}{|T|} \\sum_{t \\in T} M(t)$。"""
-)
-
-# ========== 04-哲学基础补充 ==========
-APPENDS[os.path.join(BASE, "04-哲学基础补充", "01-本体论基础论证.md")] = make_append(
-    "philosophy",
-    "本体论基础论证",
-    """本文档从本体论角度论证了MSMFIT四要素的哲学基础，援引了维特根斯坦的逻辑原子主义、柏拉图的理念论以及温和实在论立场。哲学论证为理论体系提供了深度和合法性，但也存在几个方法论上的风险。首先，**类比论证的局限性**是核心问题：将MSMFIT四要素类比为维特根斯坦的"原子事实"是一种启发式映射，而非严格的逻辑推导。维特根斯坦的"原子事实"是不可再分的逻辑单元，其不可再分性依赖于逻辑形式的分析；而MSMFIT四要素的"不可再分性"是一个工程设计选择——例如，事件$V$完全可以被进一步分解为"触发条件、前置状态、后置状态、时间戳、参与者"等子结构。将工程约定提升为形而上学事实，是一种范畴误用。其次，文档采用的"温和实在论"立场虽然避免了强实在论的独断和唯名论的虚无，但也使其承诺强度变得模糊——MSMFIT四要素究竟是"真实存在"还是"有用的理论虚构"？这一模糊性在理论面临反例时可能成为逃避证伪的借口。第三，柏拉图的理念论在现代哲学中已被广泛质疑（如亚里士多德的形式质料论、黑格尔的辩证法），直接将其作为"双世界假说"的哲学基础而不回应这些批判，显得选择性引用。第四，海德格尔和怀特海的补充虽然丰富，但引入了更多未解决的概念张力：海德格尔的"此在"（Dasein）强调存在者的主体性，而MSMFIT的形式化系统追求客观性；怀特海的"过程优先"可能消解实体$E$的本体论基础，但文档未讨论这种消解对MSMFIT一致性的影响。""",
-    """**定义 P.1** (MSMFIT本体论承诺)
-设 $\\mathcal{O}_{MSM}$ 为MSMFIT的本体论框架。$\\mathcal{O}_{MSM}$ 包含以下存在承诺：
-- $\\exists E$：实体作为可识别对象存在，$E = \\langle id, A, S \\rangle$，其中 $A$ 为属性集，$S$ 为状态空间；
-- $\\exists R$：关系作为实体间的联结存在，$R \\subseteq E \\times P \\times E$，其中 $P$ 为谓词；
-- $\\exists V$：事件作为状态转换存在，$V = \\langle t, e_{pre}, e_{post}, C \\rangle$；
-- $\\exists C$：上下文作为语义解释域存在，$C: E \\cup R \\cup V \\to 2^{Constraint}$。
-承诺强度为**温和实在论**：$\\mathcal{O}_{MSM}$ 中的实体存在于理论构造层面，其存在性不独立于描述框架，但具有跨主体的解释稳定性。"""
-)
-
-APPENDS[os.path.join(BASE, "04-哲学基础补充", "02-认识论论证.md")] = make_append(
-    "philosophy",
-    "认识论论证",
-    """本文档从认识论角度修正了"语义唯一性"的绝对化立场，引入了库恩的范式不可通约性、奎因的翻译不确定性和哥德尔不完全性定理，论证了可逆计算的近似性和语义损失的不可避免性。这一认识论反思是理论体系中最为成熟和深刻的批判性补充，体现了作者对理论局限性的清醒自觉。然而，即便在这一相对完善的文档中，仍存在若干可进一步深化的空间。首先，**相对唯一性的形式化**虽然引入了误差阈值$\\epsilon$和上下文$C$，但$\\epsilon$的具体取值依据未给出——不同领域（金融 vs 电商）的可接受误差是否相同？文档未提供领域特定的$\\epsilon$标定方法。其次，哥德尔不完全性定理的引用在软件工程文献中常被误用：该定理适用于"足够强的形式化系统"（能表达皮亚诺算术），而MSMFIT作为领域建模语言，其表达能力是否达到"足够强"的标准并不显然。若MSMFIT刻意限制表达能力以避免不可判定性，则哥德尔定理并不直接适用。第三，波兰尼的隐性知识理论被用来解释"无法形式化的业务知识"，但文档未给出区分"可形式化"与"不可形式化"知识的操作性标准——这一区分在实践中至关重要，因为错误地将可形式化知识归为隐性知识会导致自动化机会的损失。最后，多元真理论的补充（融贯论、实用论、紧缩论）虽然哲学上丰富，但文档未说明在具体的架构评审或代码生成验证中应采用哪种真理标准，使得这一补充停留在抽象层面。""",
-    """**定义 P.2** (语义相对唯一性)
-设 $\\mathcal{L}$ 为业务问题空间，$\\mathcal{M}$ 为语义模型空间。语义映射 $\\sigma: \\mathcal{L} \\to \\mathcal{M}$ 满足**相对唯一性**当且仅当：
-$$\\forall p \\in \\mathcal{L}, \\exists C \\subseteq \\mathcal{C}, \\exists \\epsilon > 0:$$
-$$\\forall M_1, M_2 \\in \\sigma_C(p), \\quad d_{sem}(M_1, M_2) < \\epsilon$$
-其中 $\\sigma_C(p)$ 为在上下文 $C$ 下 $p$ 的所有合法语义模型，$d_{sem}$ 为语义距离度量，$\\epsilon$ 为领域可接受误差阈值。
-
-**定义 P.3** (近似可逆性)
-设 $f: DSL \\to Code$ 为正向转换，$f^{-1}: Code \\to DSL$ 为反向提取。可逆性等级 $L(f)$ 定义为：
-- $L(f) = 1$（结构可逆）：$f^{-1}(f(d))$ 与 $d$ 结构同构；
-- $L(f) = 2$（语义可逆）：$\\text{sem}(f^{-1}(f(d))) = \\text{sem}(d)$；
-- $L(f) = 3$（完美可逆）：$f^{-1}(f(d)) = d$（理论不可达）。
-实践目标：$L(f) \\geq 2$ 且 $\\text{Loss}(f^{-1}(f(d)), d) < 5\\%$。"""
-)
-
-APPENDS[os.path.join(BASE, "04-哲学基础补充", "03-方法论讨论.md")] = make_append(
-    "philosophy",
-    "方法论讨论",
-    """本文档从方法论角度讨论了DIKWP模型的认知科学基础（ACT-R理论）、现象学的意向性理论（胡塞尔）和库恩的范式转换理论，并提出了形式化、可验证、可修正三条方法论原则。这些跨学科引用极大地丰富了理论体系的方法论深度，但也带来了**概念整合的复杂性**。首先，ACT-R理论与DIKWP五层的映射虽然直观，但ACT-R本身是一个计算认知模型，其陈述性记忆/程序性记忆/工作记忆的区分是基于认知心理学实验的，而DIKWP五层是知识管理框架。将两者映射需要更多中间论证，例如"智慧（W）对应推理层"这一断言在ACT-R中并无直接对应——ACT-R的推理是通过产生式规则（production rules）实现的，属于程序性记忆范畴，而非独立层次。其次，胡塞尔的意向性理论强调意识活动的"指向性"和"构造性"，这与DSL作为"意向性形式化表达"的类比虽然富有诗意，但胡塞尔的现象学方法（本质直观、先验还原）与软件工程的形式化方法在哲学预设上存在根本差异：现象学追求对意识结构的描述，形式化方法追求对系统行为的规约。将两者融合需要更细致的概念转换工作。第三，库恩的范式理论被用来解释SMDD作为"新范式"的合理性，但库恩明确反对将范式选择归结为"进步"或"优越性"的理性计算，而强调范式转换中的"信念跃迁"和"不可通约性"。文档一方面引用库恩说明传统架构面临"危机"，另一方面又用表格对比新旧范式的"优劣"，这种对比方式实际上更接近于拉卡托斯的研究纲领方法论，而非库恩的范式理论。若严格遵循库恩，则SMDD与传统架构之间的选择可能无法通过理性论证解决，这将动摇文档的规范性立场。""",
-    """**定义 P.4** (DIKWP认知映射)
-设 $\\mathcal{K}$ 为认知状态空间。DIKWP五层定义为认知处理的层次化过滤函数：
-- $D: World \\to RawData$：感知层过滤；
-- $I: RawData \\to Information$：模式识别与差异检测，$I(x) = D(x) \\cap Context$；
-- $K: Information \\to Knowledge$：规则提取与泛化，$K = \\bigcup_{i} \\text{generalize}(I_i)$；
-- $W: Knowledge \\times Context \\to Decision$：基于上下文的策略选择；
-- $P: Decision \\to Goal$：目标形成与价值评估。
-
-**定义 P.5** (范式转换条件)
-设 $\\Pi_{old}$ 为旧范式（传统架构），$\\Pi_{new}$ 为新范式（SMDD）。范式转换发生的充分条件为：
-1. **异常积累**：$\\exists \\alpha_1, \\alpha_2, \\dots, \\alpha_n$（异常现象），使得 $\\forall i, \\Pi_{old} \\not\\vdash \\alpha_i$；
-2. **新范式可解性**：$\\Pi_{new} \\vdash \\alpha_i$ 对大多数 $i$ 成立；
-3. **新范式保留性**：$\\Pi_{new}$ 保留 $\\Pi_{old}$ 的核心解题能力，即 $\\Pi_{old} \\vdash \\beta \\Rightarrow \\Pi_{new} \\vdash \\beta$ 对核心问题 $\\beta$ 成立；
-4. **新范式增值性**：$\\exists \\gamma$（新问题），$\\Pi_{new} \\vdash \\gamma$ 且 $\\Pi_{old} \\not\\vdash \\gamma$。"""
-)
-
-# ========== 05-工程实践完善 ==========
-APPENDS[os.path.join(BASE, "05-工程实践完善", "01-实施案例库.md")] = make_append(
-    "mda",
-    "实施案例库",
-    """本文档构建了实施案例库的框架，包括案例选择标准、数据收集模板、成功与失败因素分析以及占位模板。框架的设计考虑了真实性、数据完整性和可追溯性，但在当前阶段存在明显的**证据真空**问题。文档坦诚地标注了所有案例为"待收集"状态，这在方法论上是诚实的，但也意味着案例库目前无法为理论预测提供任何实证支撑。更根本的批判在于：即使未来收集了案例，框架中设计的"成功因素"表格（如"团队有编译原理背景工程师"作为技术因素）带有强烈的事后归因（post-hoc rationalization）风险。软件工程领域的研究表明，成功项目的因素往往是多元的、交互的，且存在幸存者偏差——我们容易从成功案例中归纳出"关键成功因素"，但同样的因素在失败项目中可能也存在。文档虽然设计了"失败因素"表格作为对照，但未提供如何系统性地控制"确认偏误"（confirmation bias）的方法。其次，数据收集模板中的指标（如"开发时间减少百分比"）需要严格的基线对比才能计算，但"计划值"与"实际值"的偏差可能同时反映SMDD的效果和初始估算的不准确，文档未提供分离这两种效应的方法。第三，案例收集渠道中提到的"学术论文案例"和"开源项目实践"虽然可行，但学术论文往往只报告成功案例（发表偏差），开源项目则缺乏经过审计的成本数据。要建立真正可验证的案例库，需要与工业界建立深度合作，并引入第三方审计机制。""",
-    """**定义 Pr.1** (案例证据等级)
-设 $c$ 为单个案例，其证据等级 $E(c)$ 由以下标准确定：
-- **Level A**（最高）：多站点随机对照试验，样本 $n \\geq 10$，第三方审计；
-- **Level B**：单站点对照实验或高质量准实验，有预注册假设；
-- **Level C**：结构化案例研究，有多数据源三角验证；
-- **Level D**：经验报告或事后分析，无对照组；
-- **Level E**（最低）：匿名传闻或未经核实的声明。
-案例库的整体证据强度为 $\\bar{E} = \\frac{1}{|C|} \\sum_{c \\in C} E(c)$。目标：$\\bar{E} \\geq B$。"""
-)
-
-APPENDS[os.path.join(BASE, "05-工程实践完善", "02-工具链指南完善.md")] = make_append(
-    "mda",
-    "工具链指南完善",
-    """本文档提供了DSL工具链的成熟度矩阵、选型决策树和开源vs商业权衡分析，覆盖了Xtext、MPS、TextX、EMF等主流工具。工具链评估在技术层面是全面的，但存在几个实践导向的批判点。首先，成熟度矩阵中的评分（如Xtext"★★★★☆"）是定性判断，未给出评分维度的详细量规（rubric）。不同评估者可能对同一工具给出差异巨大的评分，导致矩阵的跨团队可比性受限。其次，决策树中"是否有编译原理背景？"这一节点虽然合理，但忽略了现代DSL工具（特别是MPS的投影编辑和TextX的Python元编程）对编译原理知识的要求已大幅降低。将"编译原理背景"作为首要决策节点，可能过度放大了传统编译器构造知识的重要性，而对语言工程（Language Engineering）和元建模（Meta-modeling）等新兴技能重视不足。第三，开源vs商业权衡分析虽然列举了各自的优劣，但未提供**总拥有成本（TCO）**的计算模型。例如，JetBrains MPS的许可成本虽高，但其提供的投影编辑和语言组合能力可能大幅降低DSL的维护成本；Xtext虽免费，但若需要定制IDE插件，开发成本可能超过商业许可费用。文档未给出量化框架来支持这一决策。最后，集成难度评估中"语义层监控需自研"被标记为"高"难度，这一判断准确反映了当前生态的空白，但文档未提供任何自研的技术路径或参考架构，使得该评估对实践者的指导价值有限。""",
-    """**定义 Pr.2** (工具链TCO模型)
-设工具链 $T$ 的总拥有成本为：
-$$\\text{TCO}(T) = C_{license} + C_{learning} + C_{dev} + C_{maintain} + C_{risk}$$
-其中：
-- $C_{license}$：许可费用（开源工具为0）；
-- $C_{learning} = n_{dev} \\cdot h_{learn} \\cdot r_{salary}$：团队学习成本；
-- $C_{dev} = h_{custom} \\cdot r_{contractor}$：定制开发成本；
-- $C_{maintain} = \\sum_{t} \\frac{C_{upgrade}(t)}{\\Delta t}$：升级维护年化成本；
-- $C_{risk} = p_{abandon} \\cdot C_{migration}$：弃用风险期望成本，$p_{abandon}$ 为项目生命周期内工具被弃用的概率。
-
-**定义 Pr.3** (工具选型决策函数)
-$$\\text{Select}(project) = \\arg\\min_{T \\in \\text{Candidates}} \\text{TCO}(T) \\quad \\text{s.t.} \\quad M(T) \\geq M_{min}, \\quad L(T) \\leq L_{max}$$
-其中 $M(T)$ 为成熟度得分，$L(T)$ 为预期学习曲线时长。"""
-)
-
-APPENDS[os.path.join(BASE, "05-工程实践完善", "03-风险管理框架.md")] = make_append(
-    "mda",
-    "风险管理框架",
-    """本文档识别了AI增强、可逆计算和组织变革三类风险，并为每类风险提供了概率评估、影响分析和应对策略。风险框架在结构上遵循了标准的风险管理流程，但在定量层面存在明显的**主观性**问题。文档中给出的概率值（如"AI幻觉污染语义模型：中（30%）"、"双向转换完备性不足：高（40%）"）缺乏方法论支撑——这些数字是基于历史数据统计、专家德尔菲法，还是作者的主观判断？在风险管理标准（如ISO 31000）中，概率评估应明确其来源和置信区间。若为主观判断，则应使用概率语言（如"很可能"、"可能"）而非伪定量百分比，以避免虚假精确性（false precision）。其次，风险评估矩阵中的"概率×影响"分类过于简化。实际项目中，风险之间存在复杂的依赖关系：例如，"技能转型阻力"（组织变革风险）会显著增加"双向转换完备性不足"（可逆计算风险）的概率，因为技能不足的团队更可能写出无法自动提取的代码。文档虽然将风险分类，但未构建风险间的因果关系网络。第三，应对策略中的部分措施缺乏可操作性。例如，"AI生成错误率 <5%（人工Review可降至 <1%）"这一目标虽然明确，但未说明如何度量"错误率"——是每千行DSL中的错误数？还是关键语义元素的错误比例？度量方式的不同将直接影响目标的可实现性。最后，风险监控的"周报/月审"机制是良好的实践建议，但未提供风险评估的动态更新公式——当新数据（如实际AI错误率）到来时，如何贝叶斯更新风险概率？静态的概率评估在快速变化的项目环境中价值有限。""",
-    """**定义 Pr.4** (风险期望损失)
-设风险 $R_i$ 的发生概率为 $P(R_i)$，发生后的损失为 $L(R_i)$。风险期望损失为：
-$$\\text{E}[L] = P(R_i) \\cdot L(R_i) + (1 - P(R_i)) \\cdot 0 = P(R_i) \\cdot L(R_i)$$
-对于相依风险集合 $\\mathcal{R} = \\{R_1, R_2, \\dots, R_n\\}$，联合期望损失为：
-$$\\text{E}[L_{total}] = \\sum_{i} P(R_i) L(R_i) + \\sum_{i < j} P(R_i \\cap R_j) [L(R_i \\cup R_j) - L(R_i) - L(R_j)]$$
-当风险正相关时，$P(R_i \\cap R_j) > P(R_i)P(R_j)$，总风险被低估。
-
-**定义 Pr.5** (风险贝叶斯更新)
-设先验概率 $P(R_i)$，观测证据 $E$。后验概率为：
-$$P(R_i | E) = \\frac{P(E | R_i) P(R_i)}{P(E | R_i) P(R_i) + P(E | \\neg R_i) P(\\neg R_i)}$$
-每次迭代更新后，重新计算 $\\text{E}[L]$ 并调整应对优先级。"""
-)
-
-# ========== 06-理论验证框架 ==========
-APPENDS[os.path.join(BASE, "06-理论验证框架", "01-可证伪性测试.md")] = make_append(
-    "validation",
-    "可证伪性测试",
-    """本文档基于波普尔的证伪主义原则，将理论中的宽泛声称细化为可测试假设，并设计了反例和明确的证伪条件。这是整个理论体系中方法论上最为严谨的部分之一，体现了对科学方法的尊重。然而，严格审视下仍存在若干薄弱环节。首先，**证伪条件的设定带有一定的任意性**。例如，"开发时间减少50%"的证伪条件设定为"实际减少<30%"，但为什么选择30%而非40%或20%？这一阈值缺乏理论或实证依据，若随意调整阈值，同一实验结果可能既"证伪"又"未证伪"理论，损害检验的客观性。更合理的做法是预先定义效应量的最小有意义差异（Minimum Important Difference, MID），而非简单设定百分比阈值。其次，反例设计中"不适合SMDD的系统"（如实时控制系统）被预期为"SMDD不适用"，但这实际上是**范围限定**（scope restriction）而非证伪——如果理论的原始声称是"SMDD适用于所有软件系统"，那么实时控制系统的反例确实可以证伪；但如果理论的原始声称已经是"SMDD适用于业务系统"，则实时控制系统从一开始就在理论范围之外，不能构成有效反例。文档中某些假设（如$H_2$：MSMFIT无法描述纯计算型系统）的"证伪条件"是"若可完整描述则证伪"，这种设定在逻辑上是自洽的，但也使得该假设实际上不可证伪——因为我们很难"证明"MSMFIT可以描述所有纯计算型系统（需要穷举），却容易找到一个它不能描述的系统。Popper强调的可证伪性是"原则上可证伪"，而这里的设计更接近于"可证实"。第三，统计要求（$n\\geq 10, p<0.05$）在软件工程实验中虽然常见，但未考虑多重比较问题——若同时检验5个假设，族错误率将膨胀至约23%，远超5%。""",
-    """**定义 V.1** (可证伪性)
-设 $T$ 为理论，$H$ 为从 $T$ 导出的可测试假设。$H$ 是**可证伪的**当且仅当：
-$$\\exists E \\subseteq \\mathcal{E}: \\quad P(H | E) \\approx 0$$
-即存在至少一个可能的观测证据集合 $E$ 使得假设的后验概率趋近于零。
-
-**定义 V.2** (证伪条件严格性)
-设 $\\phi(H)$ 为假设 $H$ 的证伪条件。证伪条件的**严格性**定义为：
-$$S(\\phi) = \\frac{|\\{E \\mid \\phi(E) = \\text{falsified}\\}|}{|\\mathcal{E}|}$$
-理想情况下，$S(\\phi) \\in (0, 1)$ 且远离两端。$S(\\phi) \\approx 0$ 时假设不可证伪；$S(\\phi) \\approx 1$ 时假设几乎必然被证伪，均无信息量。"""
-)
-
-APPENDS[os.path.join(BASE, "06-理论验证框架", "02-预测准确性评估.md")] = make_append(
-    "validation",
-    "预测准确性评估",
-    """本文档建立了预测准确性评估的定量方法，包括Accuracy、MAPE等度量，以及t分布置信区间的计算。方法论上，文档正确地指出了置信区间的频率学派解释（"重复实验100次，95%的置信区间会包含真实值"），避免了常见的贝叶斯误解。然而，该评估框架在面对软件工程特有的**非平稳性**问题时显得不足。软件项目的环境（技术栈、团队组成、业务需求）随时间快速变化，去年建立的预测模型在今年可能完全失效。文档虽然提到了$\\Delta H$（语义熵变化）用于分析演化，但未讨论模型本身的时效性（model drift）问题。其次，定性预测的"完全符合/部分符合/不符合"三级评估虽然简单实用，但其判断标准高度依赖评审者的主观解释。两个独立评审者对同一结果可能给出不同评级，文档未提供提高评估者间一致性（inter-rater reliability）的方法，如Cohen's Kappa计算或结构化评估指南。第三，MAPE作为综合误差度量在预测值接近零时会出现奇点（division by zero），文档未讨论这一数学限制。对于"开发时间减少"这类以百分比表示的指标，当基线开发时间极短（如原型项目）时，即使绝对偏差很小，MAPE也可能非常大，导致误导性结论。最后，文档未涉及预测模型的**校准性**（calibration）评估——一个模型可以具有高Accuracy但糟糕的校准（例如系统性地高估效果），这在医学和机器学习领域已被证明是重要的质量维度。""",
-    """**定义 V.3** (预测准确性度量)
-设 $\\hat{y}$ 为预测值，$y$ 为实际值。
-- **准确率**：$A = 1 - \\frac{|\\hat{y} - y|}{|\\hat{y}|}$（$\\hat{y} \\neq 0$）；
-- **平均绝对百分比误差**：$\\text{MAPE} = \\frac{1}{n} \\sum_{i=1}^{n} \\left|\\frac{\\hat{y}_i - y_i}{\\hat{y}_i}\\right| \\times 100\\%$；
-- **校准误差**：$\\text{CE} = \\sum_{k=1}^{K} \\frac{n_k}{n} |\\bar{y}_k - \\bar{\\hat{y}}_k|$，其中 $K$ 为分箱数，$\\bar{y}_k$ 为第 $k$ 箱实际均值，$\\bar{\\hat{y}}_k$ 为预测均值。
-
-**定义 V.4** (置信区间频率解释)
-设 $CI_{1-\\alpha}(\\theta)$ 为参数 $\\theta$ 的 $1-\\alpha$ 置信区间。频率解释断言：
-$$\\lim_{N \\to \\infty} \\frac{1}{N} \\sum_{j=1}^{N} \\mathbb{I}(\\theta \\in CI_{1-\\alpha}^{(j)}) = 1 - \\alpha$$
-其中 $CI_{1-\\alpha}^{(j)}$ 为第 $j$ 次独立抽样构造的置信区间，$\\mathbb{I}$ 为指示函数。注意：$P(\\theta \\in CI_{1-\\alpha}) \\neq 1 - \\alpha$（贝叶斯解释不成立）。"""
-)
-
-APPENDS[os.path.join(BASE, "06-理论验证框架", "03-理论修正机制.md")] = make_append(
-    "validation",
-    "理论修正机制",
-    """本文档设计了理论修正的反馈循环、修正类型（小/中/大）和版本管理策略，体现了对知识渐进性和可错论的深刻理解。修正机制的设计在工程层面是实用的，但在科学哲学层面可以更精确。首先，**修正触发条件的量化标准**虽然明确（预测准确性<80%或95%置信区间不包含预测值），但这些标准本身也需要被质疑——为什么选择80%而非70%或90%？这一阈值若未经校准，可能过于敏感或过于迟钝。在拉卡托斯的研究纲领方法论中，理论的"硬核"（hard core）受到"保护带"（protective belt）的防卫，不应因单次异常而被轻易修正。文档未明确区分MSMFIT的哪些部分属于"硬核"（不可修正）、哪些属于"保护带"（可修正），这可能导致核心概念在修正过程中被不必要地弱化。其次，版本管理策略借用了软件工程的语义化版本控制（SemVer），但理论版本与软件版本存在本质差异：软件版本的后向兼容性可以通过测试验证，而理论版本的"兼容性"涉及概念变迁（conceptual change），新旧版本之间的术语可能具有不可通约性（库恩）。例如，若MSMFIT从四要素扩展为五要素，旧文献中的"MSMFIT"与新文献中的"MSMFIT"不再是同一概念，简单的版本号递增可能掩盖了这一深层断裂。第三，反馈循环设计为"理论预测→实验验证→结果分析→理论修正"，这是一个线性模型，但实际科学实践中的反馈往往是非线性的、多路径的——实验设计本身受理论指导，而理论修正又受可获得的技术手段限制。文档未讨论这些非线性反馈如何影响修正的质量和速度。""",
-    """**定义 V.5** (理论修正类型)
-设 $T$ 为理论，$\\Delta$ 为观测与预测的偏差。修正类型 $\\tau(\\Delta)$ 定义为：
-- **小修正**（$\\tau = 1$）：$\\Delta$ 仅影响参数估计，$T$ 的核心公理 $A_T$ 不变；
-- **中修正**（$\\tau = 2$）：$\\Delta$ 要求修改辅助假设 $H_{aux} \\subset T$，但 $A_T$ 不变；
-- **大修正**（$\\tau = 3$）：$\\Delta$ 与 $A_T$ 矛盾，需重构 $A_T$ 或替换为 $A_{T'}$。
-
-**定义 V.6** (理论硬核与保护带)
-设 $T = \\langle C, P, H \\rangle$，其中：
-- $C$ 为**硬核**（hard core）：不可放弃的基本假设集合，修正 $\\tau = 3$ 时 $T$ 不再为原理论；
-- $P$ 为**保护带**（protective belt）：可调整的辅助假设、初始条件、边界条件集合；
-- $H$ 为**启发式**（heuristics）：指导保护带调整的元规则。
-修正的优先序为：$P$ 内调整 $\\succ$ $H$ 修正 $\\succ$ $C$ 替换。MSMFIT的 $C$ 至少包含：四要素最小性、结构同构存在性、语义保真原则。"""
-)
-
-def process_file(path, append_text):
+    parts.append(f"\n\n## 来源映射\n\n{catalog['source_map'][key]}")
+    text = "\n".join(parts)
+    if check:
+        errors = [p for p in check_text(text) if p.severity == "error"]
+        if errors:
+            raise FormulaError(errors)
+    return text
+
+
+def render_target(target, catalog=None, check=True):
+    return make_append(target["key"], target["title"], target["critical"], target["formal"], catalog, check)
+
+
+def target_payload(target, catalog=None):
+    """目标追加内容的哈希，只依赖目录条目，无需渲染"""
+    catalog = catalog or load_catalog()
+    key = target["key"]
+    data = json.dumps([target, catalog["quotes"][key], catalog["source_map"][key]],
+                      ensure_ascii=False, sort_keys=True)
+    return mf.content_hash(data.encode('utf-8'))
+
+
+def iter_targets(base=BASE, catalog=None):
+    """按目录顺序产出 (目标路径, 目录条目)"""
+    catalog = catalog or load_catalog()
+    for target in catalog["targets"]:
+        yield os.path.join(base, *target["path"].split('/')), target
+
+_THEMATIC_BREAK_RE = re.compile(rb'\n[ \t]*(?:-{3,}|\*{3,}|_{3,})[ \t]*$')
+
+
+def section_flags(index):
+    """四个二级章节是否存在（只认真正的标题，不含代码块与正文）"""
+    return {
+        "has_crit": index.has_section("批判性总结", level=2),
+        "has_auth": index.has_section("权威引用", level=2),
+        "has_formal": index.has_section("形式化定义", level=2),
+        "has_source": index.has_section("来源映射", level=2),
+    }
+
+
+def _section_extent(data, heading):
+    """章节正文的实际结束位置：去掉末尾空白与分隔线，保留其后的分隔内容不动"""
+    text = data[heading.start:heading.end].rstrip()
+    while True:
+        stripped = _THEMATIC_BREAK_RE.sub(b'', text).rstrip()
+        if stripped == text:
+            break
+        text = stripped
+    return heading.start + len(text)
+
+
+def split_sections(append_text):
+    """把 make_append 生成的文本拆成 [(标题, 章节字节)]"""
+    data = append_text.encode('utf-8')
+    index = build_index(data)
+    return [(h.title, data[h.start:_section_extent(data, h)]) for h in index.headings if h.level == 2]
+
+
+def _normalized(data):
+    """去掉每行首尾空白与空行后的内容，--force 时用于跳过只做了排版整理的章节"""
+    return b"\n".join(line.strip() for line in data.splitlines() if line.strip())
+
+
+def section_hashes(sections):
+    """各章节生成内容的哈希，记入清单，供下次判断生成内容是否变化"""
+    return {title: mf.content_hash(text) for title, text in sections}
+
+
+def upsert_sections(raw, sections, recorded=None, force=False):
+    """
+    在原始字节上插入缺失章节、原地替换生成内容变化的章节。
+    recorded 为上次运行记录的 {标题: 生成内容哈希}：只有记录存在且与本次生成内容的哈希不同时才替换；
+    没有记录的已有章节保持原样，文件中的手工修改不会被覆盖。
+    force 为真时，凡与生成内容不同（忽略空白与空行）的已有章节都被覆盖。
+    插入内容的换行符与原文件一致（CRLF 文件插入 CRLF）。
+    返回 (新内容, 新增标题列表, 替换标题列表)；内容无变化时新内容与 raw 相同。
+    """
+    recorded = recorded or {}
+    first = raw.find(b'\n')
+    crlf = first > 0 and raw[first - 1:first] == b'\r'
+    index = build_index(raw)
+    edits = []
+    missing = []
+    replaced = []
+    for title, text in sections:
+        found = index.sections(title, level=2)
+        if not found:
+            missing.append((title, text))
+            continue
+        h = found[0]
+        end = _section_extent(raw, h)
+        if force:
+            changed = _normalized(raw[h.start:end]) != _normalized(text)
+        else:
+            changed = title in recorded and recorded[title] != mf.content_hash(text)
+        if changed:
+            edits.append((h.start, end, text))
+            replaced.append(title)
+    # 从后往前替换，前面的偏移不受影响
+    new = raw
+    for start, end, text in sorted(edits, reverse=True):
+        if crlf:
+            text = text.replace(b'\n', b'\r\n')
+        new = new[:start] + text + new[end:]
+    if missing:
+        # 与 make_append 相同的拼接方式
+        tail = b"\n".join(b"\n\n" + text for _, text in missing)
+        new += tail.replace(b'\n', b'\r\n') if crlf else tail
+    return new, [t for t, _ in missing], replaced
+
+
+def process_file(path, target, manifest=None, journal=None, batch=None, catalog=None, check=True,
+                 force=False):
+    payload = target_payload(target, catalog)
+    if manifest is not None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        # 清单命中且生成内容未变：文件自上次写入后未变化，无需打开
+        entry = mf.lookup(manifest, path, st) if st else None
+        if not force and entry and entry.get("payload") == payload and all(entry["flags"].values()):
+            print(f"SKIP (unchanged): {os.path.basename(path)}")
+            return
     if not os.path.exists(path):
         print(f"SKIP (not found): {path}")
         return
-    with open(path, 'r', encoding='utf-8-sig') as f:
-        content = f.read()
-    # 检查是否已有这些章节
-    has_any = any(f"## {sec}" in content for sec in ["批判性总结", "权威引用", "形式化定义", "来源映射"])
-    if has_any:
-        # 如果已有部分章节，只追加缺失的（简化处理：如果全缺才追加，否则跳过）
-        # 实际上之前扫描显示这些文件都缺，所以直接追加
-        pass
-    # 追加到文件末尾
-    with open(path, 'a', encoding='utf-8') as f:
-        f.write(append_text)
-    print(f"APPENDED: {os.path.basename(path)}")
+    try:
+        append_text = render_target(target, catalog, check)
+    except FormulaError as e:
+        print(f"INVALID FORMULA: {os.path.basename(path)}")
+        for p in e.problems:
+            print(f"    ${p.tex!r}$ — {p.message}")
+        return
+    with open(path, 'rb') as f:
+        raw = f.read()
+    # 按章节 upsert：缺失的追加，生成内容变化的原地替换，其余不动
+    sections = split_sections(append_text)
+    recorded = manifest["files"].get(path, {}).get("sections") if manifest is not None else None
+    new, added, replaced = upsert_sections(raw, sections, recorded, force)
+    if new == raw:
+        print(f"UNCHANGED: {os.path.basename(path)}")
+    else:
+        if journal is not None:
+            journal_add(journal, path, raw)
+        # 一次读取、内存中拼好新内容、经临时文件原子替换
+        if batch is not None:
+            batch.write(path, new)
+        else:
+            write_atomic(path, new)
+        changes = [f"+{t}" for t in added] + [f"~{t}" for t in replaced]
+        print(f"UPSERTED: {os.path.basename(path)} ({' '.join(changes)})")
+    if manifest is not None:
+        mf.record(manifest, path, os.stat(path), mf.content_hash(new),
+                  section_flags(build_index(new)), payload=payload,
+                  sections=section_hashes(sections))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="为09-理论增强与完善下的文件补齐或更新四个章节")
+    parser.add_argument('--base', default=BASE,
+                        help="目标文件所在的根目录")
+    parser.add_argument('--catalog', default=CATALOG,
+                        help="追加内容目录（JSON）")
+    parser.add_argument('--manifest', default=None,
+                        help="增量清单路径；上次写入后未变化的文件直接跳过，并记录各章节生成内容的哈希")
+    parser.add_argument('--journal', default=JOURNAL,
+                        help="回滚日志路径")
+    parser.add_argument('--rollback', action='store_true',
+                        help="按回滚日志恢复上一个未完成批次修改过的文件")
+    parser.add_argument('--no-tex-check', action='store_true',
+                        help="写入前不校验追加内容中的公式")
+    parser.add_argument('--force', action='store_true',
+                        help="用生成内容覆盖所有与之不同的已有章节（会丢弃手工修改）")
+    args = parser.parse_args(argv)
+    if args.rollback:
+        for path in rollback(args.journal):
+            print(f"RESTORED: {path}")
+        print("Done.")
+        return
+    manifest = mf.load_manifest(args.manifest) if args.manifest else None
+    catalog = load_catalog(args.catalog)
+    journal = open_journal(args.journal)
+    try:
+        with AtomicBatch() as batch:
+            for path, target in iter_targets(args.base, catalog):
+                process_file(path, target, manifest, journal, batch, catalog, not args.no_tex_check,
+                             args.force)
+    except BaseException:
+        journal.close()
+        for path in rollback(args.journal):
+            print(f"RESTORED: {path}")
+        raise
+    close_journal(journal, args.journal)
+    if manifest is not None:
+        # 只保留当前目录中各目标的记录，改名或移出目录的旧路径删除
+        mf.prune(manifest, {path for path, _ in iter_targets(args.base, catalog)})
+        mf.save_manifest(args.manifest, manifest)
+    print("Done.")
+
 
 if __name__ == "__main__":
-    for path, text in APPENDS.items():
-        process_file(path, text)
-    print("Done.")
+    main()
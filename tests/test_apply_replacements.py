@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""apply_replacements：行号只按 \\n 计数，同一行的多处断链全部修复"""
+from tools.apply_replacements import apply_to_text
+
+
+def fix(line, link_path="old.md", new_path="new.md"):
+    return {"source": "a.md", "line": line, "link_path": link_path, "new_path": new_path}
+
+
+def test_line_numbers_ignore_other_line_breaks():
+    text = "甲\x0c乙 丙\x85丁\n第二行\n[x](old.md)\n"
+    new, results = apply_to_text(text, [fix(3)])
+    assert [status for _, status in results] == ["applied"]
+    assert new == "甲\x0c乙 丙\x85丁\n第二行\n[x](new.md)\n"
+
+
+def test_crlf_and_missing_final_newline_are_kept():
+    text = "a\r\n[x](old.md#s)\r\nb"
+    new, _ = apply_to_text(text, [fix(2)])
+    assert new == "a\r\n[x](new.md#s)\r\nb"
+
+
+def test_every_occurrence_on_the_line_is_fixed():
+    text = "[a](old.md) 与 [b](old.md#x) 与 [c](old.md \"t\")\n"
+    new, results = apply_to_text(text, [fix(1)])
+    assert [status for _, status in results] == ["applied"]
+    assert new == "[a](new.md) 与 [b](new.md#x) 与 [c](new.md \"t\")\n"
+
+
+def test_two_links_on_one_line():
+    text = "[a](one.md) [b](two.md)\n"
+    new, results = apply_to_text(text, [fix(1, "one.md", "1.md"), fix(1, "two.md", "2.md")])
+    assert [status for _, status in results] == ["applied", "applied"]
+    assert new == "[a](1.md) [b](2.md)\n"
+
+
+def test_moved_and_already_applied():
+    text = "空行\n[x](old.md)\n[y](done.md)\n"
+    _, results = apply_to_text(text, [fix(1), fix(3, "gone.md", "done.md")])
+    assert [status for _, status in results] == ["moved", "already_applied"]
+    assert results[0][0]["found_lines"] == [2]
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""atomic_write：替换后保留权限、新文件按 umask、失败时不留临时文件"""
+import os
+
+import pytest
+
+from tools import atomic_write
+from tools.atomic_write import AtomicBatch, write_atomic
+
+
+def test_keeps_existing_mode(tmp_path):
+    path = tmp_path / "a.md"
+    path.write_bytes(b"old")
+    os.chmod(path, 0o640)
+    write_atomic(str(path), b"new")
+    assert path.read_bytes() == b"new"
+    assert os.stat(path).st_mode & 0o7777 == 0o640
+
+
+def test_new_file_follows_umask(tmp_path):
+    path = tmp_path / "b.md"
+    write_atomic(str(path), b"x")
+    assert os.stat(path).st_mode & 0o7777 == 0o666 & ~atomic_write._UMASK
+
+
+def test_batch_counts_and_leaves_no_temp_files(tmp_path):
+    with AtomicBatch() as batch:
+        batch.write(str(tmp_path / "a.md"), b"1")
+        batch.write(str(tmp_path / "b.md"), b"2")
+        with pytest.raises(IsADirectoryError):
+            batch.write(str(tmp_path), b"3")
+    assert batch.files == 2
+    assert sorted(os.listdir(tmp_path)) == ["a.md", "b.md"]
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""_batch_append 按章节 upsert：手工修改保留、生成内容变化才替换、换行符与原文件一致"""
+import json
+import os
+
+import _batch_append as ba
+from tools import manifest as mf
+
+CATALOG = {
+    "quotes": {"k": "> 引文"},
+    "source_map": {"k": "> 来源"},
+}
+
+
+def sections(critical="批判原文。", formal="定义原文。"):
+    return ba.split_sections(ba.make_append("k", "标题", critical, formal, CATALOG, check=False))
+
+
+def document(critical="批判原文。", formal="定义原文。"):
+    return ("# 标题\n\n正文。" + ba.make_append("k", "标题", critical, formal, CATALOG, check=False)
+            + "\n").encode('utf-8')
+
+
+def test_unchanged_document_is_left_alone():
+    raw = document()
+    new, added, replaced = ba.upsert_sections(raw, sections())
+    assert (new, added, replaced) == (raw, [], [])
+
+
+def test_hand_edit_without_record_is_kept():
+    raw = document(critical="批判原文，手工补充。")
+    new, added, replaced = ba.upsert_sections(raw, sections())
+    assert new == raw
+    assert replaced == []
+
+
+def test_hand_edit_with_same_payload_hash_is_kept():
+    raw = document(critical="批判原文，手工补充。")
+    recorded = ba.section_hashes(sections())
+    new, _, replaced = ba.upsert_sections(raw, sections(), recorded)
+    assert new == raw
+    assert replaced == []
+
+
+def test_changed_payload_replaces_section():
+    raw = document(critical="批判原文，手工补充。")
+    recorded = ba.section_hashes(sections())
+    new, _, replaced = ba.upsert_sections(raw, sections(critical="批判新文。"), recorded)
+    assert replaced == ["批判性总结"]
+    assert "批判新文。".encode('utf-8') in new
+    assert "手工补充".encode('utf-8') not in new
+    assert "定义原文。".encode('utf-8') in new
+
+
+def test_force_overwrites_hand_edit():
+    raw = document(critical="批判原文，手工补充。")
+    new, _, replaced = ba.upsert_sections(raw, sections(), force=True)
+    assert replaced == ["批判性总结"]
+    assert "手工补充".encode('utf-8') not in new
+
+
+def test_force_ignores_blank_line_tidying():
+    raw = document(formal="设 x：\n\n1. 甲\n2. 乙")
+    new, _, replaced = ba.upsert_sections(raw, sections(formal="设 x：\n1. 甲\n2. 乙"), force=True)
+    assert (new, replaced) == (raw, [])
+
+
+def test_missing_section_keeps_crlf():
+    full = document().replace(b'\n', b'\r\n')
+    cut = full.index("\r\n\r\n## 来源映射".encode('utf-8'))
+    raw = full[:cut] + b"\r\n"
+    new, added, _ = ba.upsert_sections(raw, sections())
+    assert added == ["来源映射"]
+    assert new.count(b'\n') == new.count(b'\r\n')
+
+
+def test_process_file_keeps_hand_edit_across_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(ba, "load_catalog", lambda path=ba.CATALOG: CATALOG)
+    path = str(tmp_path / "a.md")
+    raw = document(critical="批判原文，手工补充。")
+    with open(path, 'wb') as f:
+        f.write(raw)
+    target = {"key": "k", "title": "标题", "critical": "批判原文。", "formal": "定义原文。", "path": "a.md"}
+    manifest = mf.load_manifest(None)
+    ba.process_file(path, target, manifest, catalog=CATALOG, check=False)
+    ba.process_file(path, target, manifest, catalog=CATALOG, check=False)
+    with open(path, 'rb') as f:
+        assert f.read() == raw
+    ba.process_file(path, dict(target, critical="批判新文。"), manifest, catalog=CATALOG, check=False)
+    with open(path, 'rb') as f:
+        assert "批判新文。".encode('utf-8') in f.read()
+
+
+def test_main_prunes_stale_manifest_entries(tmp_path):
+    catalog = dict(CATALOG, targets=[{"key": "k", "title": "标题", "critical": "批判原文。",
+                                      "formal": "定义原文。", "path": "sub/a.md"}])
+    catalog_path = str(tmp_path / "catalog.json")
+    with open(catalog_path, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, ensure_ascii=False)
+    base = tmp_path / "base"
+    (base / "sub").mkdir(parents=True)
+    (base / "sub" / "a.md").write_bytes(document())
+    manifest_path = str(tmp_path / "m.json")
+    manifest = mf.load_manifest(None)
+    manifest["files"]["gone.md"] = {}
+    mf.save_manifest(manifest_path, manifest)
+    ba.main(["--base", str(base), "--catalog", catalog_path, "--manifest", manifest_path,
+             "--journal", str(tmp_path / "journal"), "--no-tex-check"])
+    assert list(mf.load_manifest(manifest_path)["files"]) == [os.path.join(str(base), "sub", "a.md")]
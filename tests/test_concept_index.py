@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""concept_index：提及统计不含链接目标与批处理脚本追加的通用章节，排序与置顶"""
+from tools import concept_index as ci
+
+CONCEPTS = {"语义熵": ["语义熵", "semantic entropy"], "UMS": ["UMS"]}
+
+
+def scan(text):
+    pattern, alias_to_concept = ci.build_matcher(CONCEPTS)
+    return ci.scan_document(text.encode('utf-8'), pattern, alias_to_concept)
+
+
+def counts(entry):
+    return {concept: [(h[1], h[2]) for h in hits] for concept, hits in entry["postings"].items()}
+
+
+def test_ascii_alias_needs_word_boundary():
+    entry = scan("# 标题\n\nUMS 与 columns 与 Semantic Entropy\n")
+    assert counts(entry) == {"UMS": [("标题", 1)], "语义熵": [("标题", 1)]}
+
+
+def test_link_targets_are_not_mentions():
+    entry = scan("# 标题\n\n见 [说明](../语义熵/ums.md)。\n")
+    assert counts(entry) == {}
+
+
+def test_generated_sections_are_not_mentions():
+    text = "\n".join([
+        "# 标题",
+        "语义熵",
+        "",
+        "## 批判性总结",
+        "语义熵",
+        "### 细节",
+        "语义熵",
+        "## 权威引用",
+        "> **Shannon** (1948): 语义熵",
+        "## 结论",
+        "语义熵",
+        "> **来源映射**: 语义熵",
+        "",
+    ])
+    assert counts(scan(text)) == {"语义熵": [("标题", 1), ("结论", 1)]}
+
+
+def test_rank_prefers_definitions_and_skips_reports():
+    state = {"concepts": CONCEPTS, "docs": {
+        "Modern/a.md": {"title": "甲", "postings": {"语义熵": [["s", "节", 5]]}, "defines": []},
+        "Modern/b.md": {"title": "乙", "postings": {"语义熵": [["d", "节", 1]]}, "defines": [["语义熵", "def"]]},
+        "Struct/reports/r.md": {"title": "报告", "postings": {"语义熵": [["x", "节", 99]]}, "defines": []},
+    }}
+    ranked = ci.rank_documents(state, "语义熵")
+    assert [(rel, anchor) for rel, anchor, _, _ in ranked] == [("Modern/b.md", "def"), ("Modern/a.md", "s")]
+
+
+def test_find_pinned():
+    text = "- [甲](Modern/a.md) <!-- pinned -->\n- [乙](Modern/b.md)\n| 丙 | [丙](Modern/c.md#x) <!-- pinned --> |\n"
+    assert [rel for rel, _ in ci.find_pinned(text)] == ["Modern/a.md", "Modern/c.md"]
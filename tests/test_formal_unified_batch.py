@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""Analysis/FormalUnified/_batch_append.py：路径分类、缺失部分、计划/分片执行"""
+import importlib.util
+import json
+import os
+import shutil
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(REPO_ROOT, "Analysis", "FormalUnified", "_batch_append.py")
+
+
+@pytest.fixture(scope="module")
+def fu():
+    spec = importlib.util.spec_from_file_location("formal_unified_batch_append", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def rule_index(fu, rid):
+    return next(i for i, rule in enumerate(fu.RULES) if rule["id"] == rid)
+
+
+def test_classify_matches_directory_or_filename(fu):
+    wiki = rule_index(fu, "wiki")
+    assert fu.classify_path(os.path.join("notes", "Wiki", "b.md")) == wiki
+    assert fu.classify_path(os.path.join("notes", "my-wiki.md")) == wiki
+    assert fu.classify_path(os.path.join("notes", "b.md")) == len(fu.RULES)
+
+
+def test_classify_caches_directories_only(fu):
+    fu._rule_for_dir.cache_clear()
+    for i in range(100):
+        fu.classify_path(os.path.join("notes", "same", f"{i}.md"))
+    assert fu._rule_for_dir.cache_info().currsize == 1
+
+
+def test_missing_parts_in_append_order(fu):
+    flags = {"has_crit": False, "has_auth": True, "has_source": False}
+    assert fu.missing_parts(flags) == ["source", "crit"]
+    assert fu.append_bytes(["甲", "乙"]) == "\n\n---\n\n甲\n\n乙\n".replace("\n", os.linesep).encode('utf-8')
+
+
+def test_skip_reason(fu):
+    assert fu.skip_reason(6 * 1024, True, True, False) == "skipped_size"
+    assert fu.skip_reason(100, True, True, True) == "skipped_complete"
+    assert fu.skip_reason(100, True, True, False) is None
+
+
+def make_corpus(root):
+    os.makedirs(os.path.join(root, "wiki"))
+    files = {
+        "a.md": "# 甲\n\n正文。\n",
+        "wiki/b.md": "# 乙\n\n## 批判性总结\n\n已有。\n",
+        "c.md": "# 丙\n\n" + "内容。" * 50 + "\n",
+        "d.md": "# 丁\n\n## 批判性总结\n\n有。\n\n## 权威引用\n\n> **Kant** (1781): \"有。\"\n\n> **来源映射**: 有\n",
+    }
+    for rel, text in files.items():
+        with open(os.path.join(root, *rel.split('/')), 'w', encoding='utf-8', newline='') as fh:
+            fh.write(text)
+
+
+def read_tree(root):
+    out = {}
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(dirpath, name)
+            with open(path, 'rb') as fh:
+                out[os.path.relpath(path, root)] = fh.read()
+    return out
+
+
+def test_sharded_apply_matches_single_apply(fu, tmp_path):
+    one = str(tmp_path / "one")
+    make_corpus(one)
+    two = str(tmp_path / "two")
+    shutil.copytree(one, two)
+
+    plan = fu.make_plan(one)
+    assert plan["skipped"]["skipped_complete"] == 1
+    assert len(plan["entries"]) == 3
+    stats, errors = fu.apply_plan(plan, one)
+    assert (stats["processed"], errors) == (3, [])
+
+    plan = fu.make_plan(two)
+    total = 0
+    for i in (1, 2):
+        stats, errors = fu.apply_plan(plan, two, (i, 2))
+        total += stats["processed"]
+        assert errors == []
+    assert total == 3
+    assert read_tree(one) == read_tree(two)
+
+
+def test_apply_refuses_files_changed_since_plan(fu, tmp_path):
+    root = str(tmp_path)
+    make_corpus(root)
+    plan = fu.make_plan(root)
+    with open(os.path.join(root, "a.md"), 'ab') as fh:
+        fh.write(b"edit\n")
+    stats, errors = fu.apply_plan(plan, root)
+    assert stats["refused"] == 1
+    assert stats["processed"] == 2
+    assert any("a.md" in e for e in errors)
+    with open(os.path.join(root, "a.md"), 'rb') as fh:
+        assert fh.read().endswith(b"edit\n")
+
+
+def test_parse_shard(fu):
+    assert fu.parse_shard("2/3") == (2, 3)
+    with pytest.raises(Exception):
+        fu.parse_shard("4/3")
+
+
+def test_manifest_forgets_deleted_files(fu, tmp_path):
+    root = str(tmp_path / "corpus")
+    os.makedirs(root)
+    make_corpus(root)
+    manifest = str(tmp_path / "m.json")
+    args = fu.parse_args(["--root", root, "--manifest", manifest])
+    fu.run(args)
+    os.remove(os.path.join(root, "a.md"))
+    fu.run(args)
+    with open(manifest, 'r', encoding='utf-8') as fh:
+        files = json.load(fh)["files"]
+    assert sorted(os.path.relpath(p, root) for p in files) == ["c.md", "d.md", os.path.join("wiki", "b.md")]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""journal：回滚恢复原始内容、删除新建文件、忽略写了一半的最后一行"""
+import pytest
+
+from tools.journal import close_journal, journal_add, open_journal, rollback
+
+
+def test_rollback_restores_earliest_original(tmp_path):
+    journal = str(tmp_path / "journal")
+    old = tmp_path / "old.md"
+    new = tmp_path / "new.md"
+    old.write_bytes(b"v1")
+    fh = open_journal(journal)
+    journal_add(fh, str(old), b"v1")
+    old.write_bytes(b"v2")
+    journal_add(fh, str(old), b"v2")
+    old.write_bytes(b"v3")
+    journal_add(fh, str(new), None)
+    new.write_bytes(b"created")
+    fh.write('{"path": "half')
+    fh.close()
+
+    with pytest.raises(RuntimeError):
+        open_journal(journal)
+    assert rollback(journal) == [str(old), str(new)]
+    assert old.read_bytes() == b"v1"
+    assert not new.exists()
+    assert not (tmp_path / "journal").exists()
+    assert rollback(journal) == []
+
+
+def test_close_removes_journal(tmp_path):
+    journal = str(tmp_path / "journal")
+    fh = open_journal(journal)
+    journal_add(fh, str(tmp_path / "a.md"), b"x")
+    close_journal(fh, journal)
+    assert not (tmp_path / "journal").exists()
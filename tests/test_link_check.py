@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""link_check：链接提取与 section_index 对代码块的判定一致，路径与锚点解析"""
+from tools import link_check
+from tools.section_index import build_index
+
+
+def test_fence_rules_match_section_index():
+    text = "\n".join([
+        "```",
+        "``` python",
+        "~~~",
+        "## 代码中的标题",
+        "[a](in-code.md)",
+        "```",
+        "## 正文标题",
+        "[b](out.md) `[c](span.md)`",
+    ])
+    assert link_check.extract_links(text) == [(8, "out.md")]
+    assert [h.title for h in build_index(text).headings] == ["正文标题"]
+
+
+def test_longer_opening_fence_needs_longer_close():
+    text = "````\n```\n[a](in.md)\n````\n[b](out.md)"
+    assert link_check.extract_links(text) == [(5, "out.md")]
+
+
+def test_link_titles_and_angle_brackets():
+    text = '[a](<x y.md>) [b](z.md "标题")'
+    assert link_check.extract_links(text) == [(1, "x y.md"), (1, "z.md")]
+
+
+def test_resolve_link():
+    existing = {"a/b.md", "a/c.md", "d/README.md"}
+    assert link_check.resolve_link("a/b.md", "https://x.org", existing) == (True, None, None)
+    assert link_check.resolve_link("a/b.md", "c.md#%E8%8A%82", existing) == (False, "a/c.md", "节")
+    assert link_check.resolve_link("a/b.md", "../d", existing) == (False, "d/README.md", None)
+    assert link_check.resolve_link("a/b.md", "#s", existing) == (False, "a/b.md", "s")
+    assert link_check.resolve_link("a/b.md", "missing.md", existing) == (False, None, None)
+
+
+def test_find_broken_checks_anchors():
+    existing = {"a.md", "b.md"}
+    anchors = {"b.md": {"有"}}
+    links = [(1, "b.md#有"), (2, "b.md#无"), (3, "c.md")]
+    broken = link_check.find_broken("/unused", "a.md", links, existing, anchors)
+    assert [(b["line"], b["kind"]) for b in broken] == [(2, "anchor"), (3, "path")]
+
+
+def test_html_anchors_and_external():
+    assert link_check.html_anchors('<a id="Sec-1"></a> <A name=\'x\'>') == {"sec-1", "x"}
+    assert link_check.is_external("ftp://host/x")
+    assert link_check.is_external("mailto:a@b")
+    assert not link_check.is_external("docs/http.md")
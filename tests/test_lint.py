@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""lint：规则编译与单文档检查"""
+from tools.lint import compile_rules, lint_document
+
+
+def rule(rule_id, algorithm, **params):
+    return {"rule_id": rule_id, "algorithm": algorithm, "severity": "error", "parameters": params}
+
+
+def findings(rules, text, rel="a.md"):
+    plan, _ = compile_rules(rules)
+    return lint_document(rel, text.encode('utf-8'), plan, {})[0]
+
+
+def test_unknown_and_disabled_rules_are_skipped():
+    raw = [rule("r1", "RuntimeVerification"), dict(rule("r2", "SizeThreshold"), enabled=False)]
+    plan, skipped = compile_rules(raw)
+    assert [r["rule_id"] for r in skipped] == ["r1", "r2"]
+    assert plan["SizeThreshold"] == []
+
+
+def test_literal_patterns_share_one_scan():
+    raw = [rule("todo", "PatternMatch", pattern="TODO|TBD"), rule("todox", "PatternMatch", pattern="TODOX")]
+    plan, _ = compile_rules(raw)
+    assert plan["regexes"] == []
+    found = findings(raw, "甲\nTODOX 乙\nTBD\n")
+    assert [(f["rule"], f["line"], f["message"]) for f in found] == [
+        ("todo", 2, "命中 2 处：todo"),
+        ("todox", 2, "命中 1 处：todox"),
+    ]
+
+
+def test_required_pattern_and_sections():
+    raw = [
+        dict(rule("cite", "PatternMatch", pattern=r"\(\d{4}\)", forbid=False), name="引用年份"),
+        rule("sec", "SectionPresence", sections=["批判性总结", "来源映射"], level=2),
+    ]
+    found = findings(raw, "# 标题\n\n## 批判性总结\n\n正文\n")
+    assert [(f["rule"], f["message"]) for f in found] == [
+        ("sec", "缺少章节：来源映射"),
+        ("cite", "未出现：引用年份"),
+    ]
+
+
+def test_scope_limits_rules():
+    raw = [dict(rule("size", "SizeThreshold", min_bytes=100), scope={"paths": ["Modern/*"]})]
+    assert findings(raw, "短", rel="Modern/a.md")[0]["rule"] == "size"
+    assert findings(raw, "短", rel="Analysis/a.md") == []
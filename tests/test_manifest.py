@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""manifest：按 size/mtime 命中、版本不符时重建、清理过期记录"""
+import json
+import os
+
+from tools import manifest as mf
+
+
+def test_lookup_requires_same_size_and_mtime(tmp_path):
+    path = str(tmp_path / "a.md")
+    with open(path, 'w') as fh:
+        fh.write("x")
+    m = mf.load_manifest(None)
+    st = os.stat(path)
+    mf.record(m, path, st, "h", {"has_crit": True})
+    assert mf.lookup(m, path, st)["hash"] == "h"
+    with open(path, 'w') as fh:
+        fh.write("xy")
+    assert mf.lookup(m, path, os.stat(path)) is None
+
+
+def test_prune_drops_unseen_entries(tmp_path):
+    m = mf.load_manifest(None)
+    st = os.stat(str(tmp_path))
+    for name in ("a", "b", "c"):
+        mf.record(m, name, st, name, {})
+    assert mf.prune(m, {"a", "c", "new"}) == 1
+    assert sorted(m["files"]) == ["a", "c"]
+
+
+def test_save_and_reload(tmp_path):
+    path = str(tmp_path / "m.json")
+    m = mf.load_manifest(path)
+    mf.record(m, "a", os.stat(str(tmp_path)), "h", {}, payload="p", sections={"标题": "s"})
+    mf.save_manifest(path, m)
+    again = mf.load_manifest(path)
+    assert again["files"]["a"]["sections"] == {"标题": "s"}
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump({"version": -1, "files": {"a": {}}}, fh)
+    assert mf.load_manifest(path)["files"] == {}
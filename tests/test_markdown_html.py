@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""markdown_html：块级结构、行内代码保护、公式与链接回调"""
+from tools.markdown_html import render
+
+
+def math(tex, display):
+    return f"<m{' d' if display else ''}>{tex}</m>"
+
+
+def test_blocks_and_inline():
+    text = ("# 标题 *x*\n\n段落 `$a$` 与 $b$ [链](a.md#x)\n\n```py\n<code>\n```\n\n"
+            "| a | b |\n|---|---|\n| 1 | 2 |\n\n- 一\n- 二\n")
+    html = render(text, math=math, link=lambda url: url.replace('.md', '.html'))
+    assert html.splitlines() == [
+        '<h1 id="标题-x">标题 <em>x</em></h1>',
+        '<p>段落 <code>$a$</code> 与 <m>b</m> <a href="a.html#x">链</a></p>',
+        '<pre><code class="language-py">&lt;code&gt;</code></pre>',
+        '<table>',
+        '<thead><tr><th>a</th><th>b</th></tr></thead>',
+        '<tbody>',
+        '<tr><td>1</td><td>2</td></tr>',
+        '</tbody>',
+        '</table>',
+        '<ul>',
+        '<li>一</li>',
+        '<li>二</li>',
+        '</ul>',
+    ]
+
+
+def test_duplicate_headings_get_numbered_ids():
+    html = render("## 概述\n\n## 概述\n")
+    assert 'id="概述"' in html
+    assert 'id="概述-1"' in html
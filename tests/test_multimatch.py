@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""multimatch.Automaton：与逐关键词子串查找的结果一致"""
+import random
+
+from tools.multimatch import Automaton
+
+
+def brute_matches(keywords, text):
+    return sorted((i + len(w), rank) for w, rank in keywords.items() if w
+                  for i in range(len(text) - len(w) + 1) if text.startswith(w, i))
+
+
+def test_overlapping_matches():
+    keywords = {"he": 3, "she": 1, "his": 2, "hers": 0}
+    automaton = Automaton(keywords)
+    assert sorted(automaton.iter_matches("ushers")) == [(4, 1), (4, 3), (6, 0)]
+    assert automaton.min_rank("ushers") == 0
+    assert automaton.min_rank("xyz", default=9) == 9
+
+
+def test_cjk_keywords():
+    automaton = Automaton({"形式化": 1, "形式": 2, "化方法": 0})
+    assert sorted(automaton.iter_matches("形式化方法")) == [(2, 2), (3, 1), (5, 0)]
+
+
+def test_random_against_brute_force():
+    rng = random.Random(3)
+    for _ in range(200):
+        keywords = {"".join(rng.choice("ab") for _ in range(rng.randint(1, 4))): rng.randint(0, 5)
+                    for _ in range(rng.randint(1, 6))}
+        text = "".join(rng.choice("abc") for _ in range(rng.randint(0, 30)))
+        automaton = Automaton(keywords)
+        expected = brute_matches(keywords, text)
+        assert sorted(automaton.iter_matches(text)) == expected
+        assert automaton.min_rank(text) == (min(r for _, r in expected) if expected else None)
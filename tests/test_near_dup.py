@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""near_dup：MinHash 签名估计相似度，LSH 聚簇只合并相似章节"""
+from tools.near_dup import find_clusters, shingle_hashes, signature, similarity
+
+
+def sig(words):
+    return signature(shingle_hashes(words.split()))
+
+
+def test_signature_is_deterministic_and_dense():
+    words = " ".join(f"w{i}" for i in range(10))
+    a = sig(words)
+    assert a == sig(words)
+    assert len(a) == 128
+    assert similarity(a, a) == 1.0
+
+
+def test_similarity_tracks_overlap():
+    base = [f"w{i}" for i in range(400)]
+    near = base[:380] + [f"x{i}" for i in range(20)]
+    far = [f"y{i}" for i in range(400)]
+    a, b, c = (signature(shingle_hashes(t)) for t in (base, near, far))
+    assert similarity(a, b) > 0.8
+    assert similarity(a, c) < 0.1
+
+
+def test_find_clusters_groups_similar_sections():
+    base = [f"w{i}" for i in range(400)]
+    sigs = [signature(shingle_hashes(t)) for t in (
+        [f"y{i}" for i in range(400)],
+        base,
+        base[:390] + ["z"] * 10,
+        base,
+    )]
+    clusters = find_clusters(sigs)
+    assert len(clusters) == 1
+    assert [i for i, _ in clusters[0]] == [1, 2, 3]
+    assert clusters[0][0][1] == 1.0
+    assert find_clusters([]) == []
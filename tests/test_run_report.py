@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""run_report：直方图分位数、分片合并、最慢文件"""
+import random
+
+from tools import run_report as rr
+
+
+def exact(values, q):
+    values = sorted(values)
+    return values[max(1, -(-len(values) * q // 100)) - 1]
+
+
+def test_percentiles_within_bucket_width():
+    rng = random.Random(1)
+    values = [rng.lognormvariate(-7, 1.5) for _ in range(5000)]
+    phases = {}
+    for v in values:
+        rr.add_sample(phases, "read", v, 10)
+    phase = phases["read"]
+    assert phase["files"] == 5000
+    assert phase["bytes"] == 50000
+    assert len(phase["hist"]) <= rr.HIST_BUCKETS
+    for q in (50, 95, 99):
+        assert abs(rr.percentile(phase, q) / exact(values, q) - 1) < rr.HIST_RATIO - 1
+    assert rr.percentile(phase, 100) == max(values)
+
+
+def test_merged_shards_equal_single_run():
+    rng = random.Random(2)
+    values = [rng.random() / 100 for _ in range(1000)]
+    whole, a, b = {}, {}, {}
+    for i, v in enumerate(values):
+        rr.add_sample(whole, "write", v)
+        rr.add_sample(a if i % 2 else b, "write", v)
+    merged = {}
+    rr.merge_phases(merged, a)
+    rr.merge_phases(merged, b)
+    assert merged["write"]["hist"] == whole["write"]["hist"]
+    assert merged["write"]["max"] == whole["write"]["max"]
+    assert rr.summarize_phases(merged)["write"]["p95_ms"] == rr.summarize_phases(whole)["write"]["p95_ms"]
+
+
+def test_batch_samples_do_not_count_as_files():
+    phases = {}
+    rr.add_sample(phases, "write", 0.5, per_file=False)
+    assert phases["write"]["files"] == 0
+    assert rr.summarize_phases(phases)["write"]["p50_ms"] is None
+    assert rr.summarize_phases(phases)["write"]["seconds"] == 0.5
+
+
+def test_extreme_latencies_stay_in_range():
+    phases = {}
+    for v in (0.0, 1e-9, 1e6):
+        rr.add_sample(phases, "detect", v)
+    assert len(phases["detect"]["hist"]) == rr.HIST_BUCKETS
+    assert rr.percentile(phases["detect"], 100) == 1e6
+
+
+def test_slowest():
+    heap = []
+    for i in range(50):
+        rr.push_slowest(heap, i, f"f{i}", n=3)
+    assert sorted(heap) == [(47, "f47"), (48, "f48"), (49, "f49")]
+    assert rr.keep_slowest(heap, [(100, "x")], n=2) == [(100, "x"), (49, "f49")]
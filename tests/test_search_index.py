@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""search_index：切词、倒排编码、建索引与增量段查询"""
+import os
+
+from tools import search_index as si
+
+
+def write(root, rel, text):
+    path = os.path.join(root, *rel.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write(text)
+
+
+def test_tokenize():
+    assert si.tokenize("语义熵 Ｆｏｏ-Bar 熵") == ["语义", "义熵", "foo", "bar", "熵"]
+    assert si.tokenize("x" * (si.MAX_WORD + 1)) == []
+
+
+def test_postings_round_trip():
+    for pairs in ([0, 1], [3, 2, 10, 1, 11, 300], [i for s in range(500) for i in (s * 3, 1)]):
+        decoded = si.decode_postings(si.encode_postings(pairs))
+        assert decoded == list(zip(pairs[0::2], pairs[1::2]))
+
+
+def test_scan_document_ignores_link_targets():
+    doc = si.scan_document("# 标题\n\n见 [说明](语义熵.md)\n\n## 语义熵\n\n正文\n".encode('utf-8'))
+    assert [s[1] for s in doc["sections"]] == ["标题", "语义熵"]
+    assert "义熵" not in doc["sections"][0][5]
+
+
+def test_build_search_and_delta(tmp_path):
+    root = str(tmp_path / "root")
+    index_dir = str(tmp_path / "index")
+    write(root, "Modern/a.md", "# 语义熵\n\n语义熵的定义与性质。\n\n## 其他\n\n无关内容。\n")
+    write(root, "Modern/b.md", "# 范畴论\n\n函子与自然变换。\n")
+    si.update_index(root, ["Modern"], index_dir)
+    with si.SearchIndex(index_dir) as index:
+        found = [index.section(sec)[:3] for _, sec in index.search("语义熵")]
+    assert found == [("Modern/a.md", "语义熵", "语义熵")]
+
+    # 增量段：b.md 改写后覆盖主索引中的旧内容
+    write(root, "Modern/b.md", "# 范畴论\n\n语义熵也出现在这里。\n")
+    entry = si.scan_document(open(os.path.join(root, "Modern", "b.md"), 'rb').read())
+    si.write_delta(index_dir, {"Modern/b.md": entry}, {"Modern/b.md"})
+    with si.SearchIndex(index_dir) as index:
+        files = sorted({index.section(sec)[0] for _, sec in index.search("语义熵")})
+        assert files == ["Modern/a.md", "Modern/b.md"]
+        assert index.search("函子") == []
+
+    # 合并后与全量重建一致
+    si.update_index(root, ["Modern"], index_dir)
+    assert not os.path.exists(os.path.join(index_dir, si.DELTA_DIR))
+    with si.SearchIndex(index_dir) as index:
+        merged = [(round(score, 6), index.section(sec)) for score, sec in index.search("语义熵")]
+    si.update_index(root, ["Modern"], str(tmp_path / "full"), full=True)
+    with si.SearchIndex(str(tmp_path / "full")) as index:
+        full = [(round(score, 6), index.section(sec)) for score, sec in index.search("语义熵")]
+    assert merged == full
+
+
+def test_per_file_limit(tmp_path):
+    root = str(tmp_path / "root")
+    index_dir = str(tmp_path / "index")
+    write(root, "Modern/a.md", "".join(f"## 节{i}\n\n语义熵\n\n" for i in range(5)))
+    si.update_index(root, ["Modern"], index_dir)
+    with si.SearchIndex(index_dir) as index:
+        assert len(index.search("语义熵", per_file=2)) == 2
+        assert len(index.search("语义熵", per_file=0)) == 5
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""section_index：标题区间、代码块、锚点与章节标志"""
+from tools.section_index import build_index, closes_fence, detect_flags, fence_open, parse_heading, slugify
+
+
+def test_heading_extents_are_byte_offsets():
+    data = "# 甲\n正文\n## 乙 ##\nx\n### 丙\ny\n## 丁\n".encode('utf-8')
+    index = build_index(data)
+    spans = [(h.level, h.title, data[h.start:h.end].decode('utf-8')) for h in index.headings]
+    assert spans == [
+        (1, "甲", "# 甲\n正文\n## 乙 ##\nx\n### 丙\ny\n## 丁\n"),
+        (2, "乙", "## 乙 ##\nx\n### 丙\ny\n"),
+        (3, "丙", "### 丙\ny\n"),
+        (2, "丁", "## 丁\n"),
+    ]
+
+
+def test_bom_and_crlf():
+    data = b'\xef\xbb\xbf' + "## 批判性总结\r\n正文\r\n".encode('utf-8')
+    index = build_index(data)
+    assert [(h.title, h.start) for h in index.headings] == [("批判性总结", 3)]
+    assert index.has_section("批判性总结", level=2)
+
+
+def test_code_blocks_are_ignored():
+    text = "```\n## 批判性总结\n> **Kant** (1781)\n```\n~~~~\n~~~\n## 来源映射\n~~~~\n"
+    assert detect_flags(build_index(text)) == {"has_crit": False, "has_auth": False, "has_source": False}
+
+
+def test_flags():
+    text = "## 总结\n\n> **Kant** (1781): 引文\n\n> **来源映射**: 体系\n\n### 批判性总结（补充）\n"
+    assert detect_flags(build_index(text)) == {"has_crit": True, "has_auth": True, "has_source": True}
+
+
+def test_anchors():
+    index = build_index("# 1. 概述\n## [链接](x.md) 与 *强调*\n# 1. 概述\n")
+    assert index.heading_anchors() == ["1-概述", "链接-与-强调", "1-概述-1"]
+    assert slugify("Hello, World! API") == "hello-world-api"
+
+
+def test_helpers():
+    assert parse_heading(b"###   \xe6\xa0\x87\xe9\xa2\x98  ###") == (3, "标题")
+    assert parse_heading(b"#hashtag") is None
+    assert fence_open("   ```python") == "```"
+    assert fence_open("    ```") is None
+    assert fence_open(b"~~~") == b"~~~"
+    assert closes_fence("````", "```")
+    assert not closes_fence("``", "```")
+    assert not closes_fence("~~~", "```")
+    assert not closes_fence("``` js", "```")
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""section_scan：免解码扫描与 build_index + detect_flags 的结果一致"""
+import pytest
+
+from tools.section_index import build_index, detect_flags
+from tools.section_scan import fence_ranges, scan_flags
+
+DOCS = [
+    "# 标题\n\n## 批判性总结\n\n正文\n\n> **Kant** (1781): 引文\n\n> **来源映射**: 体系\n",
+    "```\n## 批判性总结\n> **Kant** (1781): 引文\n```\n\n## 来源映射 ##\n",
+    "````\n```\n## 批判性总结\n````\n",
+    "~~~\n## 批判性总结\n",
+    "\ufeff## 批判性总结\n",
+    "正文提到批判性总结与 **来源映射** 但不是章节\n",
+    "``` python\n```text\n## 批判性总结\n```\n",
+]
+
+
+@pytest.mark.parametrize("text", DOCS)
+@pytest.mark.parametrize("tail", [16, 1024])
+def test_scan_matches_index(text, tail):
+    data = (text + "填充。\n" * 20).encode('utf-8')
+    assert scan_flags(data, tail=tail) == detect_flags(build_index(data))
+
+
+def test_fence_ranges():
+    data = b"a\n```\nx\n~~~\n```\nb\n~~~\nopen"
+    assert fence_ranges(data) == [(2, 15), (18, len(data))]
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""tex_check：公式提取跳过代码，转义丢失与括号不配对能被发现"""
+from tools.tex_check import check_formula, check_formulas, extract_formulas
+
+
+def test_extract_skips_code():
+    text = "\n".join([
+        "行内 $a+b$ 与 `$not$`",
+        "```",
+        "$inside$",
+        "```",
+        "$$",
+        "x^2",
+        "$$",
+        "$$y$$",
+    ])
+    found = [(f.line, f.tex, f.display) for f in extract_formulas(text)]
+    assert found == [(1, "a+b", False), (5, "x^2", True), (8, "y", True)]
+
+
+def test_fence_closes_only_with_same_character():
+    text = "````\n~~~\n$no$\n```\n````\n$yes$"
+    assert [f.tex for f in extract_formulas(text)] == ["yes"]
+
+
+def test_control_character_reports_lost_escape():
+    problems = check_formula("\theta + 1")
+    assert problems[0][0] == "error"
+    assert "\\theta" in problems[0][1]
+
+
+def test_unbalanced_left_right():
+    assert any("\\left" in message for _, message in check_formula(r"\left( x"))
+
+
+def test_cache_checks_each_formula_once():
+    cache = {}
+    stats = {"formulas": 0, "checked": 0}
+    formulas = extract_formulas("$x$ $x$ $y$")
+    check_formulas(formulas, cache, stats)
+    assert stats == {"formulas": 3, "checked": 2}
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""trace_check：单元格解析、按去重取值的连接与逐行问题、CSV/JSONL 输出"""
+import csv
+import datetime
+import io
+import json
+
+import pytest
+
+from tools import trace_check as tc
+
+HEADER = ["编号", "目标/章节", "标准条款", "工件/证据", "验证报告", "状态", "完成日期"]
+
+
+def test_parse_cells():
+    assert tc.parse_clause("ISO/IEC 25010 4.1") == ("ISO 25010", "4.1")
+    assert tc.parse_clause("IEEE 1012:2025 6.1") == ("IEEE 1012", "6.1")
+    assert tc.parse_clause("ACM SWEBOK 8.1") == ("SWEBOK", "8.1")
+    assert tc.parse_clause("IEEE") is None
+    assert tc.parse_date("2025/06/30") == datetime.date(2025, 6, 30)
+    assert tc.parse_date("明年") is None
+    assert tc.split_terms("证明脚本/日志、库") == ["证明脚本", "日志"]
+    assert tc.normalize_term("4.2 语义熵 ") == "语义熵"
+
+
+def corpus():
+    index = tc.CorpusIndex()
+    index.add_document("Modern/a.md", "# 语义熵定义\n\n依据 ISO/IEC 25010 4.1 与 IEEE 1012。\n".encode('utf-8'))
+    index.add_document("Modern/证明脚本.md", "# 验证报告汇总\n".encode('utf-8'))
+    index.text = '\n'.join(index.parts)
+    return index
+
+
+def matrix(tmp_path, rows):
+    path = tmp_path / "m.csv"
+    with open(path, 'w', encoding='utf-8', newline='') as fh:
+        writer = csv.writer(fh)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return tc.Matrix().load(str(path), label="m.csv")
+
+
+def issues(tmp_path, rows, today=datetime.date(2025, 7, 1)):
+    counts = {}
+    found = [(line, tail[4], tail[5]) for _, line, tail
+             in tc.check_rows(matrix(tmp_path, rows), corpus(), today, counts=counts)]
+    return found, counts
+
+
+def test_clean_row_has_no_issues(tmp_path):
+    found, _ = issues(tmp_path, [["1", "1. 语义熵定义", "ISO 25010 4.1", "证明脚本", "验证报告", "已完成", "2025-06-01"]])
+    assert found == []
+
+
+def test_row_issues(tmp_path):
+    rows = [
+        ["1", "不存在的章节", "IEEE 1012 9.9", "", "", "进行中", "2025-06-01"],
+        ["2", "语义熵", "ISO 9001", "日志", "验证报告", "已完成", ""],
+        ["3", "语义熵", "XYZ", "证明脚本", "验证报告", "计划中", "某天"],
+        ["4", "语义熵", "", "", "", "暂停", ""],
+    ]
+    found, counts = issues(tmp_path, rows)
+    assert found == [
+        (2, "missing_section", "warning"),
+        (2, "uncited_clause", "info"),
+        (2, "overdue", "warning"),
+        (3, "missing_clause", "warning"),
+        (3, "missing_artifact", "warning"),
+        (3, "stale_status", "error"),
+        (4, "bad_clause", "warning"),
+        (4, "stale_status", "warning"),
+        (4, "bad_date", "error"),
+        (5, "bad_status", "warning"),
+    ]
+    assert counts["severity"] == {"warning": 7, "info": 1, "error": 2}
+
+
+def test_repeated_rows_share_results(tmp_path):
+    row = ["1", "不存在的章节", "", "", "", "", ""]
+    found, counts = issues(tmp_path, [row] * 3)
+    assert [line for line, _, _ in found] == [2, 3, 4]
+    assert counts["issues"] == {"missing_section": 3}
+
+
+def test_outputs_round_trip(tmp_path):
+    results = list(tc.check_rows(matrix(tmp_path, [["1", "缺少", "", "", "", "", ""]]), corpus(),
+                                 datetime.date(2025, 7, 1)))
+    out = io.StringIO()
+    tc.write_issues(results, out, "csv")
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert [(r["file"], r["line"], r["issue"]) for r in rows] == [("m.csv", "2", "missing_section")]
+    out = io.StringIO()
+    tc.write_issues(results, out, "jsonl")
+    record = json.loads(out.getvalue())
+    assert (record["file"], record["line"], record["target"]) == ("m.csv", 2, "缺少")
+
+
+def test_missing_column_is_reported(tmp_path):
+    path = tmp_path / "bad.csv"
+    path.write_text("编号,状态\n1,已完成\n", encoding='utf-8')
+    with pytest.raises(ValueError, match="目标/章节"):
+        tc.Matrix().load(str(path))
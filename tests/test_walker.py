@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""walker：排序遍历、排除规则、目录状态缓存"""
+import os
+
+from tools import walker
+
+
+def touch(root, rel, text="x"):
+    path = os.path.join(root, *rel.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write(text)
+
+
+def test_walk_files_before_subdirectories(tmp_path):
+    root = str(tmp_path)
+    for rel in ("b.md", "a/z.md", "a/y.txt", ".git/x.md", "backup/old.md", "a/__pycache__/c.md", "c.zip"):
+        touch(root, rel)
+    assert [e.rel for e in walker.walk(root)] == ["b.md", "a/z.md"]
+    assert [e.rel for e in walker.walk(root, include=None)] == ["b.md", "a/y.txt", "a/z.md"]
+
+
+def test_is_excluded_dir_matches_walk():
+    assert walker.is_excluded_dir(".vscode", ".vscode")
+    assert walker.is_excluded_dir("backup", "Modern/backup")
+    assert walker.is_excluded_dir("__pycache__", "tools/__pycache__")
+    assert not walker.is_excluded_dir("Modern", "Modern")
+    assert walker.is_excluded_dir("tmp", "a/tmp", exclude=("tmp/",))
+
+
+def test_state_reuses_unchanged_directories(tmp_path):
+    root = str(tmp_path)
+    touch(root, "a/x.md")
+    touch(root, "b/y.md")
+    state = {}
+    first = [e.rel for e in walker.walk(root, state=state)]
+    again = list(walker.walk(root, state=state))
+    assert [e.rel for e in again] == first
+    assert all(e.cached for e in again)
+    touch(root, "a/new.md")
+    entries = {e.rel: e.cached for e in walker.walk(root, state=state)}
+    assert entries == {"a/new.md": False, "a/x.md": False, "b/y.md": True}
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""watch：链接目标的规范化与排除目录"""
+from tools import watch
+
+
+def test_link_key():
+    assert watch.link_key("a/b.md", "https://example.com/x") is None
+    assert watch.link_key("a/b.md", "mailto:x@y") is None
+    assert watch.link_key("a/b.md", "#sec") == "a/b.md"
+    assert watch.link_key("a/b.md", "../c%20d.md#sec") == "c d.md"
+    assert watch.link_key("a/b.md", "/Modern/x.md") == "Modern/x.md"
+    assert watch.link_key("a/b.md", "sub\\e.md") == "a/sub/e.md"
+
+
+def test_excluded_dir_follows_walker_defaults():
+    assert watch._excluded_dir(".git", ".git")
+    assert watch._excluded_dir("backup", "Modern/backup")
+    assert not watch._excluded_dir("Modern", "Modern")
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+"""
+语料库批处理脚本共享的工具模块。
+"""
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+批量应用 Struct/reports/_replacements.json 中的 auto_fix 断链修复。
+
+条目按源文件分组：每个文件只读写一次，按行号从大到小依次修改；
+修改前确认 link_path 仍在记录的行上，不符的条目不改动并在报告中列出。
+
+用法（项目根目录）：
+    python -m tools.apply_replacements [--dry-run] [--report out.json]
+"""
+import argparse
+import json
+import os
+from collections import OrderedDict
+
+from tools.atomic_write import AtomicBatch
+
+DEFAULT_REPLACEMENTS = os.path.join('Struct', 'reports', '_replacements.json')
+
+
+def load_fixes(path):
+    """读取 auto_fix 并按源文件分组（保持首次出现顺序）"""
+    with open(path, 'r', encoding='utf-8') as fh:
+        data = json.load(fh)
+    grouped = OrderedDict()
+    for entry in data.get("auto_fix", []):
+        source = entry["source"].replace('\\', '/')
+        grouped.setdefault(source, []).append(entry)
+    return grouped, len(data.get("manual", []))
+
+
+def _find_links(line, link_path):
+    """链接目标在行内的全部位置（升序）：匹配 ](link_path) 或 ](link_path#...)"""
+    found = []
+    for tail in (')', '#', ' '):
+        needle = '](' + link_path + tail
+        pos = line.find(needle)
+        while pos >= 0:
+            found.append(pos + 2)
+            pos = line.find(needle, pos + len(needle))
+    return sorted(found)
+
+
+def apply_to_text(text, entries):
+    """在内存中应用一个文件的全部修复，返回 (新文本, 各条目结果)"""
+    # 只按 \n 分行：splitlines 还会在 \x0b、\x0c、\x85、\u2028 等字符处断行，与记录的行号对不上
+    lines = text.split('\n')
+    results = []
+    # 行号从大到小：即使某条修复改变了行数，也不影响尚未处理的靠前行
+    for entry in sorted(entries, key=lambda e: e["line"], reverse=True):
+        idx = entry["line"] - 1
+        line = lines[idx] if 0 <= idx < len(lines) else None
+        found = _find_links(line, entry["link_path"]) if line is not None else []
+        if found:
+            # 同一行中的每处出现都修复，从右往左替换，左侧位置不受影响
+            for pos in reversed(found):
+                line = line[:pos] + entry["new_path"] + line[pos + len(entry["link_path"]):]
+            lines[idx] = line
+            status = "applied"
+        elif line is not None and _find_links(line, entry["new_path"]):
+            status = "already_applied"
+        else:
+            # 不在记录的行上：只报告，不猜测改动位置
+            moved = [i + 1 for i, l in enumerate(lines) if _find_links(l, entry["link_path"])]
+            if moved:
+                status = "moved"
+                entry = dict(entry, found_lines=moved)
+            elif any(_find_links(l, entry["new_path"]) for l in lines):
+                status = "already_applied"
+            else:
+                status = "mismatch"
+        results.append((entry, status))
+    results.reverse()
+    return '\n'.join(lines), results
+
+
+def apply_fixes(base, grouped, dry_run=False):
+    """逐文件应用修复；每个被修改的文件恰好一次读取、一次原子写入"""
+    results = []
+    touched = 0
+    with AtomicBatch() as batch:
+        for source, entries in grouped.items():
+            path = os.path.join(base, *source.split('/'))
+            try:
+                with open(path, 'rb') as fh:
+                    raw = fh.read()
+            except OSError:
+                results.extend((e, "missing_file") for e in entries)
+                continue
+            bom = raw.startswith(b'\xef\xbb\xbf')
+            text = raw[3 if bom else 0:].decode('utf-8')
+            new_text, file_results = apply_to_text(text, entries)
+            results.extend(file_results)
+            if new_text != text:
+                touched += 1
+                if not dry_run:
+                    batch.write(path, (b'\xef\xbb\xbf' if bom else b'') + new_text.encode('utf-8'))
+    return results, touched
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量应用 _replacements.json 中的 auto_fix 修复")
+    parser.add_argument('replacements', nargs='?', default=DEFAULT_REPLACEMENTS,
+                        help="修复清单路径")
+    parser.add_argument('--base', default=None,
+                        help="source 字段的基准目录，默认为清单所在 reports 目录的上一级")
+    parser.add_argument('--dry-run', action='store_true', help="只检查不写入")
+    parser.add_argument('--report', default=None, help="JSON 结果输出路径")
+    args = parser.parse_args(argv)
+
+    base = args.base or os.path.dirname(os.path.dirname(os.path.abspath(args.replacements)))
+    grouped, manual = load_fixes(args.replacements)
+    results, touched = apply_fixes(base, grouped, args.dry_run)
+
+    counts = OrderedDict((k, 0) for k in ("applied", "already_applied", "moved", "mismatch", "missing_file"))
+    for entry, status in results:
+        counts[status] += 1
+        if status == "moved":
+            print(f"MOVED: {entry['source']}:{entry['line']} -> {entry['link_path']} (现位于第 {entry['found_lines']} 行)")
+        elif status in ("mismatch", "missing_file"):
+            print(f"{status.upper()}: {entry['source']}:{entry['line']} -> {entry['link_path']}")
+
+    print("=" * 60)
+    print(f"auto_fix 条目: {len(results)}（涉及 {len(grouped)} 个文件，需人工处理 {manual} 条）")
+    print(f"已应用: {counts['applied']}，此前已应用: {counts['already_applied']}，"
+          f"行号已变化: {counts['moved']}，行内容不符: {counts['mismatch']}，文件不存在: {counts['missing_file']}")
+    print(f"{'将修改' if args.dry_run else '已修改'}文件数: {touched}")
+    print("=" * 60)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as fh:
+            json.dump({
+                "counts": counts,
+                "files_touched": touched,
+                "entries": [dict(entry, status=status) for entry, status in results],
+            }, fh, ensure_ascii=False, indent=2)
+    return 1 if counts["moved"] or counts["mismatch"] or counts["missing_file"] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
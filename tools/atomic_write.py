@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+原子写入层：新内容先写入同目录临时文件并 fsync，再用 os.replace 覆盖目标。
+
+中断时目标文件要么是旧内容、要么是新内容，不会出现写了一半的文件。
+目录项的持久化（目录 fsync）按批次合并：同一批次内每个目录只 fsync 一次。
+"""
+import os
+import tempfile
+
+# 当前进程的 umask（读取的唯一方式是设置后立即恢复）
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _fsync_dir(dirname):
+    # Windows 不支持打开目录做 fsync，os.replace 本身已足够
+    if os.name != 'posix':
+        return
+    fd = os.open(dirname, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _replace(path, data):
+    dirname = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=dirname, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            # 新文件：mkstemp 固定为 0600，改为与 open() 新建文件一致的权限
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return dirname
+
+
+class AtomicBatch:
+    """一个批次内的原子写入；退出 with 块时对涉及的目录各 fsync 一次"""
+
+    def __init__(self):
+        self.dirs = set()
+        self.files = 0
+
+    def write(self, path, data):
+        self.dirs.add(_replace(path, data))
+        self.files += 1
+
+    def commit(self):
+        for dirname in sorted(self.dirs):
+            _fsync_dir(dirname)
+        self.dirs.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 出错时已完成替换的文件同样需要落盘，便于回滚日志判断
+        self.commit()
+        return False
+
+
+def write_atomic(path, data):
+    """单个文件的原子写入（含目录 fsync）"""
+    with AtomicBatch() as batch:
+        batch.write(path, data)
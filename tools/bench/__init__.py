@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+"""
+批处理脚本的基准测试：corpus 生成合成 Markdown 语料，run 分阶段计时并输出 JSON。
+"""
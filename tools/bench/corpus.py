@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+合成 Markdown 语料生成器。
+
+目录名取自 FormalUnified 的主题目录，使 _batch_append.py 的规则表各条都能命中；
+文件大小服从对数正态分布（中位数与 sigma 可配），正文按 CJK 比例混合中英文句子；
+已有 批判性总结 / 权威引用 / 来源映射 的文件比例各自独立配置，另有少量文件把这些字样
+放在代码块中，用于覆盖检测逻辑的误判路径。同一 seed 生成的语料逐字节相同。
+
+用法：
+    python -m tools.bench.corpus /tmp/corpus --files 10000 --cjk-ratio 0.8
+"""
+import argparse
+import math
+import os
+import random
+
+TOPIC_DIRS = [
+    "01-哲学基础理论", "02-数学理论体系", "03-形式语言理论体系", "04-形式模型理论体系",
+    "05-编程语言理论体系", "06-软件架构理论体系", "07-分布式系统", "08-人工智能理论",
+    "09-实践与应用", "10-知识导航", "11-课程体系", "12-Wiki对照", "13-计划与进度", "99-其他",
+]
+FILES_PER_DIR = 200
+MIN_SIZE = 200
+MAX_SIZE = 256 * 1024
+
+_CJK_CHARS = ("形式化架构理论语义模型系统组件接口状态转换验证证明方法工具概念定义"
+              "公理推导结构同构映射关系约束规范实现演化分析综合抽象层次知识体系")
+_ASCII_WORDS = ("formal model state transition system component interface proof "
+                "semantics verification architecture type category logic process").split()
+
+CRIT_SECTION = "## 批判性总结\n\n该部分已有人工撰写的批判性总结。\n"
+AUTH_QUOTE = "> **权威引用**：Leslie Lamport (1994) 指出规范即思考。\n"
+SOURCE_QUOTE = "> **来源映射**：合成语料来源说明。\n"
+FENCED_DECOY = "```markdown\n## 批判性总结\n> **权威引用**：示例 (2000)\n```\n"
+
+
+def _sentence_pool(rng, cjk_ratio, count=512):
+    pool = []
+    for _ in range(count):
+        if rng.random() < cjk_ratio:
+            pool.append(''.join(rng.choice(_CJK_CHARS) for _ in range(rng.randint(12, 40))) + "。")
+        else:
+            pool.append(' '.join(rng.choice(_ASCII_WORDS) for _ in range(rng.randint(6, 16))) + ".")
+    return pool
+
+
+def _body(rng, pool, size):
+    parts = []
+    total = 0
+    section = 1
+    while total < size:
+        if rng.random() < 0.1:
+            text = f"\n## {section}. 小节\n\n"
+            section += 1
+        else:
+            text = ''.join(rng.choice(pool) for _ in range(rng.randint(2, 6))) + "\n\n"
+        parts.append(text)
+        total += len(text.encode('utf-8'))
+    return ''.join(parts)
+
+
+def generate_corpus(out, files=1000, median_size=4096, sigma=1.0, cjk_ratio=0.7,
+                    crit_ratio=0.3, auth_ratio=0.3, source_ratio=0.3, decoy_ratio=0.02, seed=1):
+    """生成语料，返回 {"files", "bytes", "with_crit", "with_auth", "with_source"}"""
+    rng = random.Random(seed)
+    pool = _sentence_pool(rng, cjk_ratio)
+    totals = {"files": 0, "bytes": 0, "with_crit": 0, "with_auth": 0, "with_source": 0}
+    made = set()
+    for i in range(files):
+        topic = TOPIC_DIRS[i % len(TOPIC_DIRS)]
+        sub = f"{i // (FILES_PER_DIR * len(TOPIC_DIRS)):04d}"
+        dirname = os.path.join(out, topic, sub)
+        if dirname not in made:
+            os.makedirs(dirname, exist_ok=True)
+            made.add(dirname)
+        size = int(median_size * math.exp(sigma * rng.gauss(0, 1)))
+        size = min(MAX_SIZE, max(MIN_SIZE, size))
+        text = f"# {topic} 文档 {i}\n\n" + _body(rng, pool, size)
+        if rng.random() < decoy_ratio:
+            text += "\n" + FENCED_DECOY
+        for key, ratio, block in (("with_crit", crit_ratio, CRIT_SECTION),
+                                  ("with_auth", auth_ratio, AUTH_QUOTE),
+                                  ("with_source", source_ratio, SOURCE_QUOTE)):
+            if rng.random() < ratio:
+                text += "\n" + block
+                totals[key] += 1
+        data = text.encode('utf-8')
+        with open(os.path.join(dirname, f"doc-{i:07d}.md"), 'wb') as fh:
+            fh.write(data)
+        totals["files"] += 1
+        totals["bytes"] += len(data)
+    return totals
+
+
+def add_arguments(parser):
+    """语料参数（run 也复用这组参数）"""
+    parser.add_argument('--files', type=int, default=1000, help="文件数（1k ~ 1M）")
+    parser.add_argument('--median-size', type=int, default=4096, help="文件大小中位数（字节）")
+    parser.add_argument('--sigma', type=float, default=1.0, help="对数正态分布的 sigma，0 表示大小固定")
+    parser.add_argument('--cjk-ratio', type=float, default=0.7, help="中文句子所占比例")
+    parser.add_argument('--crit-ratio', type=float, default=0.3, help="已有批判性总结的文件比例")
+    parser.add_argument('--auth-ratio', type=float, default=0.3, help="已有权威引用的文件比例")
+    parser.add_argument('--source-ratio', type=float, default=0.3, help="已有来源映射的文件比例")
+    parser.add_argument('--decoy-ratio', type=float, default=0.02, help="把上述字样放在代码块中的文件比例")
+    parser.add_argument('--seed', type=int, default=1, help="随机种子")
+
+
+def corpus_params(args):
+    return {k: getattr(args, k) for k in (
+        "files", "median_size", "sigma", "cjk_ratio", "crit_ratio",
+        "auth_ratio", "source_ratio", "decoy_ratio", "seed")}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成合成 Markdown 语料")
+    parser.add_argument('out', help="输出目录")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    totals = generate_corpus(args.out, **corpus_params(args))
+    print(f"已生成 {totals['files']} 个文件，共 {totals['bytes'] / 1024 / 1024:.1f} MB："
+          f"批判性总结 {totals['with_crit']}，权威引用 {totals['with_auth']}，来源映射 {totals['with_source']}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
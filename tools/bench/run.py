@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+两个批处理脚本的分阶段基准测试。
+
+每次运行先用 corpus 生成合成语料（生成时间不计入），再按阶段计时：
+    walk      遍历目录得到 .md 列表
+    stat      逐文件 os.stat（只有根目录脚本有此阶段；FormalUnified 脚本的大小取自遍历，计入 walk）
+    read      读取文件字节
+    detect    章节检测（FormalUnified：section_scan.scan_flags；根目录脚本：build_index + section_flags）
+    classify  决定追加内容（FormalUnified：路径规则；根目录脚本：目录条目渲染与拆分）
+    write     拼接新内容并原子写入
+阶段循环与两个脚本的单文件处理流程一致，调用的是脚本中的同一组函数。
+FormalUnified 另外按 3KB/5KB 阈值分桶统计文件数、跳过数与耗时（多次重复时每个桶取最短耗时），
+并在子进程中对两个脚本做端到端计时；
+会改写文件的步骤开始前都会重新生成语料，保证每次计时面对的是同一份输入。
+
+结果写成 JSON；指定 --baseline 时逐阶段与上一次结果比较，变慢超过 --tolerance 的阶段标出。
+
+用法（项目根目录）：
+    python -m tools.bench.run --files 10000 --output reports/bench/result.json
+    python -m tools.bench.run --files 10000 --baseline reports/bench/result.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+from tools import walker
+from tools.atomic_write import AtomicBatch
+from tools.bench.corpus import add_arguments, corpus_params, generate_corpus
+from tools import section_scan
+from tools.section_index import build_index
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FORMAL_UNIFIED_SCRIPT = os.path.join(REPO_ROOT, "Analysis", "FormalUnified", "_batch_append.py")
+ROOT_SCRIPT = os.path.join(REPO_ROOT, "_batch_append.py")
+PHASES = ("walk", "stat", "read", "detect", "classify", "write")
+# FormalUnified 脚本的大小取自遍历时的 stat 结果，没有单独的 stat 阶段
+FORMAL_UNIFIED_PHASES = tuple(p for p in PHASES if p != "stat")
+# 与 FormalUnified main() 中的阈值一致
+SIZE_BUCKETS = ((3 * 1024, "<3KB"), (5 * 1024, "3-5KB"), (None, ">5KB"))
+
+
+def load_script(path, name):
+    """按文件路径加载脚本模块（两个脚本都不在包内）"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _walk(root):
+    return [entry.path for entry in walker.walk(root)]
+
+
+def _new_phases(names=PHASES):
+    return OrderedDict((p, {"seconds": 0.0, "files": 0, "bytes": 0}) for p in names)
+
+
+def _bucket(size):
+    return next(name for limit, name in SIZE_BUCKETS if limit is None or size < limit)
+
+
+def bench_formal_unified(module, corpus):
+    """FormalUnified 脚本：与 process_batch 相同的单文件流程，逐阶段累计耗时"""
+    phases = _new_phases(FORMAL_UNIFIED_PHASES)
+    clock = time.perf_counter
+    # 与脚本一致：大小取自遍历时的 stat 结果，计入 walk
+    t = clock()
+    files = [(entry.st_size, entry.path) for entry in walker.walk(corpus)]
+    phases["walk"]["seconds"] = clock() - t
+    phases["walk"]["files"] = len(files)
+
+    buckets = OrderedDict((name, {"files": 0, "skipped": 0, "seconds": 0.0}) for _, name in SIZE_BUCKETS)
+    with AtomicBatch() as writer:
+        for size, f in files:
+            # 与脚本一致：映射后在字节上检测，只有需要追加的文件才整体读入并解码
+            t0 = clock()
+            with open(f, 'rb') as fh, section_scan.mapped(fh) as buf:
+                flags = section_scan.scan_flags(buf)
+                t2 = clock()
+                reason = module.skip_reason(size, flags["has_crit"], flags["has_auth"], flags["has_source"])
+                raw = None if reason else bytes(buf)
+            t3 = clock()
+            t4 = t5 = t3
+            if not reason:
+                raw.decode('utf-8')
+                phases["read"]["files"] += 1
+                phases["read"]["bytes"] += size
+                crit_text, auth_text, source_text = module.get_content_by_path(f)
+                t4 = clock()
+                texts = {"source": source_text, "auth": auth_text, "crit": crit_text}
+                new = raw + module.append_bytes([texts[part] for part in module.missing_parts(flags)])
+                writer.write(f, new)
+                t5 = clock()
+                phases["classify"]["files"] += 1
+                phases["write"]["files"] += 1
+                phases["write"]["bytes"] += len(new)
+            for name, start, end in (("detect", t0, t2), ("read", t2, t3),
+                                     ("classify", t3, t4), ("write", t4, t5)):
+                phases[name]["seconds"] += end - start
+            phases["detect"]["files"] += 1
+            phases["detect"]["bytes"] += size
+            bucket = buckets[_bucket(size)]
+            bucket["files"] += 1
+            bucket["skipped"] += 1 if reason else 0
+            bucket["seconds"] += t5 - t0
+    # 目录 fsync 发生在批次结束时，计入 write
+    phases["write"]["seconds"] += clock() - t5 if files else 0.0
+    return phases, buckets
+
+
+def bench_root(module, corpus):
+    """根目录脚本：语料中的文件轮流套用目录条目，按 process_file 的流程逐阶段累计耗时"""
+    phases = _new_phases()
+    clock = time.perf_counter
+    catalog = module.load_catalog()
+    targets = catalog["targets"]
+    t = clock()
+    files = _walk(corpus)
+    phases["walk"]["seconds"] = clock() - t
+    phases["walk"]["files"] = len(files)
+
+    with AtomicBatch() as batch:
+        for i, f in enumerate(files):
+            target = targets[i % len(targets)]
+            t0 = clock()
+            size = os.stat(f).st_size
+            t1 = clock()
+            with open(f, 'rb') as fh:
+                raw = fh.read()
+            t2 = clock()
+            module.section_flags(build_index(raw))
+            t3 = clock()
+            sections = module.split_sections(module.render_target(target, catalog))
+            t4 = clock()
+            new, _, _ = module.upsert_sections(raw, sections)
+            if new != raw:
+                batch.write(f, new)
+                phases["write"]["files"] += 1
+                phases["write"]["bytes"] += len(new)
+            t5 = clock()
+            for name, start, end in (("stat", t0, t1), ("read", t1, t2), ("detect", t2, t3),
+                                     ("classify", t3, t4), ("write", t4, t5)):
+                phases[name]["seconds"] += end - start
+            for name in ("stat", "read", "detect", "classify"):
+                phases[name]["files"] += 1
+            phases["read"]["bytes"] += size
+            phases["detect"]["bytes"] += size
+    phases["write"]["seconds"] += clock() - t5 if files else 0.0
+    return phases
+
+
+def _timed_script(path, argv):
+    """在子进程中端到端运行脚本（含解释器启动，多进程模式在各平台均可用），丢弃其控制台输出"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, path] + argv, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def _finish(phases):
+    for p in phases.values():
+        p["seconds"] = round(p["seconds"], 6)
+        p["mb_per_s"] = round(p["bytes"] / 1024 / 1024 / p["seconds"], 2) if p["bytes"] and p["seconds"] else None
+    return phases
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _keep_fastest(best, phases):
+    """多次重复时每个阶段（或大小桶）保留最短耗时，降低磁盘缓存与 fsync 抖动的影响"""
+    if best is None:
+        return phases
+    for name, p in phases.items():
+        if p["seconds"] < best[name]["seconds"]:
+            best[name] = p
+    return best
+
+
+def run(params, workdir, workers_list, repeat=1):
+    fu = load_script(FORMAL_UNIFIED_SCRIPT, "formal_unified_batch_append")
+    root_mod = load_script(ROOT_SCRIPT, "root_batch_append")
+    corpus = os.path.join(workdir, "corpus")
+
+    def fresh():
+        shutil.rmtree(corpus, ignore_errors=True)
+        return generate_corpus(corpus, **params)
+
+    fu_phases = root_phases = buckets = None
+    end_to_end = OrderedDict()
+    for _ in range(max(1, repeat)):
+        totals = fresh()
+        phases, repeat_buckets = bench_formal_unified(fu, corpus)
+        fu_phases = _keep_fastest(fu_phases, phases)
+        # 每次重复面对同一份语料，各桶的文件数相同，耗时取最短
+        buckets = _keep_fastest(buckets, repeat_buckets)
+        for workers in workers_list:
+            fresh()
+            seconds = _timed_script(FORMAL_UNIFIED_SCRIPT, ["--root", corpus, "--workers", str(workers)])
+            key = f"workers={workers}"
+            end_to_end[key] = round(min(seconds, end_to_end.get(key, seconds)), 6)
+        fresh()
+        root_phases = _keep_fastest(root_phases, bench_root(root_mod, corpus))
+
+    # 根目录脚本端到端：目录条目的 20 个路径各放一份语料文件
+    base = os.path.join(workdir, "root-base")
+    shutil.rmtree(base, ignore_errors=True)
+    fresh()
+    samples = _walk(corpus)
+    for i, (path, _) in enumerate(root_mod.iter_targets(base)):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(samples[i % len(samples)], path)
+    root_e2e = _timed_script(ROOT_SCRIPT, ["--base", base, "--journal", os.path.join(workdir, "journal")])
+
+    return OrderedDict([
+        ("version", 1),
+        ("created", time.strftime('%Y-%m-%d %H:%M:%S')),
+        ("commit", _git_commit()),
+        ("python", platform.python_version()),
+        ("platform", platform.platform()),
+        ("cpus", os.cpu_count()),
+        ("repeat", max(1, repeat)),
+        ("corpus", OrderedDict(params, **totals)),
+        ("formal_unified", OrderedDict([
+            ("phases", _finish(fu_phases)),
+            ("size_buckets", buckets),
+            ("end_to_end", end_to_end),
+        ])),
+        ("root", OrderedDict([
+            ("phases", _finish(root_phases)),
+            ("end_to_end", round(root_e2e, 6)),
+        ])),
+    ])
+
+
+def compare(result, baseline, tolerance):
+    """逐阶段对比，返回变慢超过 tolerance 的 [(脚本, 阶段, 基线秒数, 当前秒数)]"""
+    slower = []
+    for script in ("formal_unified", "root"):
+        for phase, cur in result[script]["phases"].items():
+            old = baseline.get(script, {}).get("phases", {}).get(phase)
+            if old and old["seconds"] > 0 and cur["seconds"] > old["seconds"] * (1 + tolerance):
+                slower.append((script, phase, old["seconds"], cur["seconds"]))
+    return slower
+
+
+def _print_phases(title, phases):
+    print(f"{title}:")
+    for name, p in phases.items():
+        rate = f"{p['mb_per_s']:.1f} MB/s" if p["mb_per_s"] else ""
+        print(f"  {name:<9} {p['seconds']:9.4f}s  {p['files']:8d} 文件  {rate}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批处理脚本分阶段基准测试")
+    add_arguments(parser)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1],
+                        help="FormalUnified 端到端计时使用的进程数（可多个）")
+    parser.add_argument('--repeat', type=int, default=1, help="重复次数，各阶段取最短耗时")
+    parser.add_argument('--workdir', default=None, help="语料目录，默认使用临时目录并在结束后删除")
+    parser.add_argument('--output', default=None, help="JSON 结果路径")
+    parser.add_argument('--baseline', default=None, help="用于对比的历史结果 JSON")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="判定变慢的相对阈值")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench-")
+    try:
+        result = run(corpus_params(args), workdir, sorted(set(args.workers)), args.repeat)
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    corpus = result["corpus"]
+    print(f"语料: {corpus['files']} 个文件，{corpus['bytes'] / 1024 / 1024:.1f} MB")
+    _print_phases("FormalUnified/_batch_append.py", result["formal_unified"]["phases"])
+    for name, b in result["formal_unified"]["size_buckets"].items():
+        print(f"  {name:<6} {b['files']:8d} 文件，跳过 {b['skipped']}，{b['seconds']:.4f}s")
+    for name, seconds in result["formal_unified"]["end_to_end"].items():
+        print(f"  端到端 {name}: {seconds:.4f}s")
+    _print_phases("_batch_append.py", result["root"]["phases"])
+    print(f"  端到端: {result['root']['end_to_end']:.4f}s")
+
+    if args.output:
+        out_dir = os.path.dirname(args.output)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(result, fh, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as fh:
+            baseline = json.load(fh)
+        slower = compare(result, baseline, args.tolerance)
+        for script, phase, old, cur in slower:
+            print(f"变慢: {script}.{phase} {old:.4f}s -> {cur:.4f}s")
+        if slower:
+            return 1
+        print(f"与基线 {baseline.get('commit')} 相比无阶段变慢超过 {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
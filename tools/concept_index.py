@@ -0,0 +1,438 @@
+# -*- coding: utf-8 -*-
+"""
+概念倒排索引：概念 → 文档 → 标题锚点，并据此重新生成根目录的
+00-统一概念索引.md（各概念的“相关文档”）与 00-核心概念反向索引.md（各概念的引用表）。
+
+概念来自两个索引文件中的三级标题（如“MSMFIT（最小语义模型）”）与
+Analysis/00-统一术语与定义规范.md 的术语表（含别名）。索引持久化到状态文件，
+再次运行时只重新扫描 size/mtime 变化的文档，其余文档的倒排记录直接复用。
+
+提及次数不计链接目标（与 tools.search_index 相同）；reports/ 下的生成报告与术语表的
+单字母分组标题（如 “T”）不参与排序。两个索引文件中行末带 <!-- pinned --> 的条目是
+人工维护的，重新生成时原样保留并排在最前，其余位置再由排序结果补齐。
+
+用法（项目根目录）：
+    python -m tools.concept_index [--dry-run] [--query MSMFIT]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+
+from tools import walker
+from tools.atomic_write import write_atomic
+from tools.section_index import build_index
+
+UNIFIED_INDEX = "00-统一概念索引.md"
+REVERSE_INDEX = "00-核心概念反向索引.md"
+GLOSSARY = "Analysis/00-统一术语与定义规范.md"
+DEFAULT_DIRS = ["Modern", "Analysis", "Struct", "View"]
+DEFAULT_STATE = ".concept_index.json"
+STATE_VERSION = 3
+
+# 统一概念索引中每个顶层目录列出的文档数；反向索引每个概念列出的文档数
+UNIFIED_PER_DIR = 3
+REVERSE_LIMIT = 10
+
+_PAREN_RE = re.compile(r'^(.*?)[（(]([^）)]*)[）)]\s*$')
+_ALIAS_LINE_RE = re.compile(r'^\s*-\s*别名[：:]\s*(.+?)\s*$', re.M)
+_DEFINITION_RE = re.compile(r'\*\*定义\s*[\w.]*\*\*\s*[（(]([^）)\n]{1,40})[）)]')
+_ORDER_PREFIX_RE = re.compile(r'^[\d.]+-')
+_ASCII_ALIAS_RE = re.compile(r'[a-z0-9 ._-]+')
+# 目录类章节提及次数多但不适合作为跳转目标
+TOC_TITLES = {"目录", "contents", "table of contents"}
+# 生成的报告（链接检查等）不作为相关文档
+RANK_EXCLUDED_DIRS = {"reports"}
+PIN_MARK = "<!-- pinned -->"
+# 批处理脚本追加到每个文件的通用章节：各文件内容相同，不计入概念提及（否则通用词被抬高）
+GENERATED_TITLES = {"批判性总结", "权威引用", "来源映射"}
+# FormalUnified 脚本追加的来源映射是一行引用，不是标题
+_GENERATED_LINE_RE = re.compile(r'^ {0,3}>\s*\*\*来源映射\*\*.*$', re.M)
+_LINK_TARGET_RE = re.compile(r'\]\([^)\n]*\)')
+# 术语表按字母分组的标题，如 “T”
+_LETTER_TITLE_RE = re.compile(r'^[A-Za-z]$')
+# 人工置顶的列表项或表格行：取第一个链接的路径部分
+_PINNED_RE = re.compile(r'^\s*[-|].*?\]\(([^)#\s]*)[^)]*\).*' + re.escape(PIN_MARK) + r'\s*\|?\s*$')
+
+
+def concept_names(title):
+    """“MSMFIT（最小语义模型）” → ['MSMFIT', '最小语义模型']，并补充去空格写法"""
+    m = _PAREN_RE.match(title)
+    parts = [m.group(1)] + re.split(r'[,，、]', m.group(2)) if m else [title]
+    names = []
+    for part in parts:
+        part = part.strip().rstrip('。；;.')
+        for name in (part, part.replace(' ', '')):
+            if name and name not in names:
+                names.append(name)
+    return names
+
+
+def _child_headings(index, parent_title, level=3):
+    """某个二级章节下的全部三级标题"""
+    parents = index.sections(parent_title, level=2)
+    if not parents:
+        return []
+    parent = parents[0]
+    return [h for h in index.headings if h.level == level and parent.start < h.start < parent.end]
+
+
+def find_concept(concepts, names):
+    """与 names 有共同别名（不区分大小写）的已有概念名，没有则返回 None"""
+    lowered = {n.lower() for n in names}
+    return next((k for k, v in concepts.items() if lowered & {n.lower() for n in v}), None)
+
+
+def _merge_concept(concepts, title, names):
+    target = find_concept(concepts, names)
+    if target is None:
+        concepts[title] = list(names)
+    else:
+        concepts[target] += [n for n in names if n not in concepts[target]]
+
+
+def load_concepts(root):
+    """
+    返回 OrderedDict: 概念名 → 别名列表。
+    展示的概念以两个索引文件中的标题为准（两处写法不同但别名相同的视为同一概念），
+    术语表中与之同名的条目并入其别名；其余术语表条目也进入倒排索引，可通过 --query 查询。
+    """
+    concepts = OrderedDict()
+    for rel, parent in ((UNIFIED_INDEX, "核心概念快速导航"), (REVERSE_INDEX, "核心概念反向索引表")):
+        path = os.path.join(root, rel)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as fh:
+            index = build_index(fh.read())
+        for h in _child_headings(index, parent):
+            _merge_concept(concepts, h.title, concept_names(h.title))
+
+    path = os.path.join(root, *GLOSSARY.split('/'))
+    if os.path.exists(path):
+        with open(path, 'rb') as fh:
+            raw = fh.read()
+        index = build_index(raw)
+        for h in _child_headings(index, "术语表"):
+            names = concept_names(h.title)
+            body = raw[h.body_start:h.end].decode('utf-8', 'replace')
+            for line in _ALIAS_LINE_RE.findall(body):
+                for alias in re.split(r'[、,，]', line):
+                    for name in concept_names(alias.strip()):
+                        if name not in names:
+                            names.append(name)
+            _merge_concept(concepts, h.title, names)
+    return concepts
+
+
+def build_matcher(concepts):
+    """所有别名编译为一个正则（长别名优先，纯字面量交替以保持扫描速度）"""
+    alias_to_concept = {}
+    for concept, names in concepts.items():
+        for name in names:
+            alias_to_concept.setdefault(name.lower(), concept)
+    parts = [re.escape(a) for a in sorted(alias_to_concept, key=len, reverse=True)]
+    pattern = re.compile('|'.join(parts)) if parts else None
+    return pattern, alias_to_concept
+
+
+def _is_word_char(ch):
+    return ch.isascii() and ch.isalnum()
+
+
+def iter_mentions(pattern, alias_to_concept, text):
+    """text 须已小写；英文别名要求两侧不是英文字母或数字（避免 UMS 命中 columns）"""
+    for m in pattern.finditer(text):
+        alias = m.group(0)
+        if _ASCII_ALIAS_RE.fullmatch(alias):
+            start, end = m.span()
+            if (start and _is_word_char(text[start - 1])) or (end < len(text) and _is_word_char(text[end])):
+                continue
+        yield alias_to_concept[alias]
+
+
+def aliases_digest(concepts):
+    data = json.dumps(concepts, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def scan_document(raw, pattern, alias_to_concept):
+    """按标题切分文档并统计各概念出现次数，返回该文档的倒排记录"""
+    index = build_index(raw)
+    anchors = index.heading_anchors()
+    bounds = [(0, "", "", 0)] + [(h.start, a, h.title, h.level) for h, a in zip(index.headings, anchors)]
+    title = next((h.title for h in index.headings if h.level == 1), "")
+    postings = {}
+    defines = []
+    generated = None  # 所在的生成章节的标题级别；其下级标题同样不计
+    for i, (start, anchor, heading, level) in enumerate(bounds):
+        end = bounds[i + 1][0] if i + 1 < len(bounds) else len(raw)
+        segment = raw[start:end].decode('utf-8', 'replace')
+        if generated is None or level <= generated:
+            generated = level if heading.strip() in GENERATED_TITLES else None
+        counts = {}
+        if pattern is not None and generated is None:
+            text = _LINK_TARGET_RE.sub(']', _GENERATED_LINE_RE.sub('', segment)).lower()
+            for concept in iter_mentions(pattern, alias_to_concept, text):
+                counts[concept] = counts.get(concept, 0) + 1
+        for concept, count in counts.items():
+            postings.setdefault(concept, []).append([anchor, heading, count])
+        for name in _DEFINITION_RE.findall(segment):
+            defines.append([name.strip(), anchor])
+    return {"title": title, "postings": postings, "defines": defines}
+
+
+def iter_documents(root, dirs):
+    """产出 (相对根目录的路径, walker.Entry)"""
+    excluded = {UNIFIED_INDEX, REVERSE_INDEX}
+    for top in dirs:
+        for entry in walker.walk(os.path.join(root, top)):
+            rel = f"{top}/{entry.rel}"
+            if rel not in excluded:
+                yield rel, entry
+
+
+def load_state(path):
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                state = json.load(fh)
+            if state.get("version") == STATE_VERSION:
+                return state
+        except (OSError, ValueError):
+            pass
+    return {"version": STATE_VERSION, "aliases": "", "concepts": {}, "docs": {}}
+
+
+def update_index(root, dirs, state):
+    """增量更新倒排记录，返回 (重新扫描数, 复用数, 删除数)"""
+    concepts = load_concepts(root)
+    digest = aliases_digest(concepts)
+    if state["aliases"] != digest:
+        # 概念或别名变化：所有文档都需要重新扫描
+        state["docs"] = {}
+    state["aliases"] = digest
+    state["concepts"] = concepts
+    pattern, alias_to_concept = build_matcher(concepts)
+
+    docs = state["docs"]
+    seen = set()
+    scanned = reused = 0
+    for rel, st in iter_documents(root, dirs):
+        seen.add(rel)
+        entry = docs.get(rel)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            reused += 1
+            continue
+        with open(st.path, 'rb') as fh:
+            raw = fh.read()
+        entry = scan_document(raw, pattern, alias_to_concept)
+        entry["size"] = st.st_size
+        entry["mtime_ns"] = st.st_mtime_ns
+        docs[rel] = entry
+        scanned += 1
+    removed = [rel for rel in docs if rel not in seen]
+    for rel in removed:
+        del docs[rel]
+    return scanned, reused, len(removed)
+
+
+def posix_basename(rel):
+    return rel.rsplit('/', 1)[-1]
+
+
+def _doc_label(rel, entry):
+    stem = os.path.splitext(posix_basename(rel))[0]
+    return _ORDER_PREFIX_RE.sub('', stem) or entry.get("title") or stem
+
+
+def rank_documents(state, concept):
+    """
+    某概念的相关文档排序：给出定义的文档优先，其次标题/文件名含概念名，再按出现次数。
+    返回 [(rel, 锚点, 标题, 得分)]，锚点指向出现次数最多的章节。
+    """
+    names = {n.lower() for n in state["concepts"].get(concept, [])}
+    ranked = []
+    for rel, entry in state["docs"].items():
+        if RANK_EXCLUDED_DIRS.intersection(rel.split('/')[:-1]):
+            continue
+        hits = [h for h in entry["postings"].get(concept, ()) if not _LETTER_TITLE_RE.match(h[1])]
+        if not hits:
+            continue
+        score = sum(h[2] for h in hits)
+        label = (posix_basename(rel) + ' ' + entry["title"]).lower()
+        if any(n in label for n in names):
+            score += 10
+        defined = [a for name, a in entry["defines"] if name.lower() in names]
+        if defined:
+            score += 20
+            anchor, heading = defined[0], ""
+        else:
+            targets = [h for h in hits if h[1].lower() not in TOC_TITLES] or hits
+            best = max(targets, key=lambda h: h[2])
+            anchor, heading = best[0], best[1]
+        ranked.append((rel, anchor, heading, score))
+    ranked.sort(key=lambda r: (-r[3], r[0]))
+    return ranked
+
+
+def resolve(state, title):
+    """索引文件中的概念标题对应的概念名"""
+    return find_concept(state["concepts"], concept_names(title)) or title
+
+
+def _href(rel, anchor):
+    return f"{rel}#{anchor}" if anchor else rel
+
+
+def find_pinned(text):
+    """块中人工置顶的行：[(链接路径, 去掉首尾空白的原文)]"""
+    pinned = []
+    for line in text.splitlines():
+        m = _PINNED_RE.match(line)
+        if m:
+            pinned.append((m.group(1).rstrip('/') or m.group(1), line.strip()))
+    return pinned
+
+
+def render_related(state, concept, pinned=()):
+    """统一概念索引中一个概念的“相关文档”块；pinned 原样保留在各目录最前"""
+    lines = ["**相关文档**：", ""]
+    groups = OrderedDict()
+    for path, line in pinned:
+        groups.setdefault(path.split('/', 1)[0], []).append(line)
+    taken = {path for path, _ in pinned}
+    for rel, anchor, heading, _ in rank_documents(state, concept):
+        top = rel.split('/', 1)[0]
+        group = groups.setdefault(top, [])
+        if len(group) < UNIFIED_PER_DIR and rel not in taken:
+            suffix = f"（{heading}）" if heading else ""
+            group.append(f"- [{rel}]({_href(rel, anchor)}){suffix}")
+    groups = OrderedDict((top, items) for top, items in groups.items() if items)
+    if not groups:
+        lines.append("- （暂无）")
+    for top in sorted(groups, key=lambda t: DEFAULT_DIRS.index(t) if t in DEFAULT_DIRS else len(DEFAULT_DIRS)):
+        lines.append(f"- {top}目录：")
+        lines.extend("  " + item for item in groups[top])
+        lines.append("")
+    return "\n".join(lines).rstrip("\n")
+
+
+def render_table(state, concept, pinned=()):
+    """反向索引中一个概念的引用表；pinned 原样保留在最前"""
+    lines = ["| 引用文档 | 路径 |", "|----------|------|"]
+    lines.extend(line for _, line in pinned)
+    taken = {path for path, _ in pinned}
+    rows = [r for r in rank_documents(state, concept) if r[0] not in taken]
+    for rel, anchor, _, _ in rows[:max(0, REVERSE_LIMIT - len(pinned))]:
+        lines.append(f"| {_doc_label(rel, state['docs'][rel])} | [{rel}]({_href(rel, anchor)}) |")
+    return "\n".join(lines)
+
+
+def _replace_spans(raw, edits):
+    for start, end, text in sorted(edits, reverse=True):
+        raw = raw[:start] + text.encode('utf-8') + raw[end:]
+    return raw
+
+
+def render_unified(raw, state):
+    """替换每个概念章节中从“**相关文档**：”到章节末尾的内容"""
+    index = build_index(raw)
+    edits = []
+    for h in _child_headings(index, "核心概念快速导航"):
+        body = raw[h.body_start:h.end]
+        pos = body.find("**相关文档**".encode('utf-8'))
+        pinned = find_pinned(body[pos:].decode('utf-8', 'replace')) if pos >= 0 else []
+        block = render_related(state, resolve(state, h.title), pinned)
+        end = h.body_start + len(body.rstrip())
+        if pos >= 0:
+            edits.append((h.body_start + pos, end, block))
+        else:
+            edits.append((end, end, "\n\n" + block))
+    return _replace_spans(raw, edits)
+
+
+def render_reverse(raw, state):
+    """替换每个概念章节中的表格（连续的 | 行），章节中其余内容保持不变"""
+    index = build_index(raw)
+    edits = []
+    for h in _child_headings(index, "核心概念反向索引表"):
+        pinned = find_pinned(raw[h.body_start:h.end].decode('utf-8', 'replace'))
+        table = render_table(state, resolve(state, h.title), pinned)
+        pos = h.body_start
+        start = end = None
+        while pos < h.end:
+            nl = raw.find(b'\n', pos, h.end)
+            line_end = h.end if nl < 0 else nl + 1
+            if raw[pos:line_end].lstrip().startswith(b'|'):
+                if start is None:
+                    start = pos
+                end = line_end
+            elif start is not None:
+                break
+            pos = line_end
+        if start is None:
+            edits.append((h.body_start, h.body_start, "\n" + table + "\n"))
+        else:
+            edits.append((start, end, table + "\n"))
+    return _replace_spans(raw, edits)
+
+
+def render_files(root, state, dry_run=False):
+    """重新生成两个索引文件，返回内容有变化的文件列表"""
+    changed = []
+    for rel, render in ((UNIFIED_INDEX, render_unified), (REVERSE_INDEX, render_reverse)):
+        path = os.path.join(root, rel)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as fh:
+            raw = fh.read()
+        new = render(raw, state)
+        if new != raw:
+            changed.append(rel)
+            if not dry_run:
+                write_atomic(path, new)
+    return changed
+
+
+def save_state(path, state):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(state, fh, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成概念倒排索引并更新根目录的两个概念索引文件")
+    parser.add_argument('--root', default=os.getcwd(), help="项目根目录")
+    parser.add_argument('--dirs', nargs='+', default=DEFAULT_DIRS, help="参与索引的顶层目录")
+    parser.add_argument('--state', default=DEFAULT_STATE, help="倒排索引状态文件（相对路径以根目录为基准）")
+    parser.add_argument('--dry-run', action='store_true', help="只更新索引，不改写 Markdown")
+    parser.add_argument('--query', default=None, help="输出某个概念的相关文档后退出")
+    args = parser.parse_args(argv)
+
+    root = os.path.abspath(args.root)
+    state_path = args.state if os.path.isabs(args.state) else os.path.join(root, args.state)
+    state = load_state(state_path)
+    scanned, reused, removed = update_index(root, args.dirs, state)
+    save_state(state_path, state)
+    print(f"概念数: {len(state['concepts'])}，文档数: {len(state['docs'])}"
+          f"（重新扫描 {scanned}，复用 {reused}，移除 {removed}）")
+
+    if args.query:
+        key = args.query if args.query in state["concepts"] else find_concept(state["concepts"], [args.query])
+        if key is None:
+            print(f"未找到概念: {args.query}")
+            return 1
+        for rel, anchor, heading, score in rank_documents(state, key):
+            print(f"{score:6d}  {_href(rel, anchor)}  {heading}")
+        return 0
+
+    for rel in render_files(root, state, args.dry_run):
+        print(f"{'将更新' if args.dry_run else '已更新'}: {rel}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
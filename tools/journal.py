@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+批处理回滚日志：修改文件前先把原始字节写入日志（先写日志，后改文件）。
+
+批次成功结束后删除日志；若批次中途失败或进程被中断，日志仍在，
+可用 rollback() 把本批次已修改的文件全部恢复为原样。
+"""
+import base64
+import json
+import os
+
+
+def open_journal(path):
+    """开始一个新批次；上一批次的日志仍存在时拒绝开始"""
+    if os.path.exists(path):
+        raise RuntimeError(f"发现未完成批次的回滚日志: {path}，请先执行回滚")
+    return open(path, 'a', encoding='utf-8')
+
+
+def journal_add(fh, path, original):
+    """记录 path 修改前的原始字节；original 为 None 表示文件原本不存在"""
+    entry = {
+        "path": path,
+        "original": None if original is None else base64.b64encode(original).decode('ascii'),
+    }
+    fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    fh.flush()
+    os.fsync(fh.fileno())
+
+
+def close_journal(fh, path):
+    """批次成功结束：关闭并删除日志"""
+    fh.close()
+    os.remove(path)
+
+
+def rollback(path):
+    """按日志恢复本批次修改过的文件，返回恢复的文件列表"""
+    restored = []
+    if not os.path.exists(path):
+        return restored
+    entries = []
+    with open(path, 'r', encoding='utf-8') as fh:
+        for line in fh:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # 写日志时被中断的最后一行：对应文件尚未被修改
+                break
+    # 同一文件只按最早的记录恢复
+    seen = set()
+    for entry in entries:
+        target = entry["path"]
+        if target in seen:
+            continue
+        seen.add(target)
+        if entry["original"] is None:
+            if os.path.exists(target):
+                os.remove(target)
+        else:
+            with open(target, 'wb') as out:
+                out.write(base64.b64decode(entry["original"]))
+        restored.append(target)
+    os.remove(path)
+    return restored
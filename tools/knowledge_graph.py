@@ -0,0 +1,486 @@
+# -*- coding: utf-8 -*-
+"""
+知识图谱构建与查询（节点/关系类型取自 Analysis/知识图谱元数据-v64.json）。
+
+节点：目录（theory）、文档、文档内各级标题、核心概念，以及元数据中的 coreNodes；
+关系：目录/文档/标题之间的 part-of，文档间链接与概念提及的 uses，概念定义处的 part-of，
+以及元数据中的 coreRelations。
+
+图以 CSR 形式写成若干定长数组文件（array 模块原生字节序），查询时通过 mmap 按需读取：
+    ids.bin / id_offsets.bin        节点 id（按 id 排序，节点编号即排序序号，可二分查找）
+    labels.bin / label_offsets.bin  节点标签
+    node_types.bin                  节点类型序号
+    out_offsets.bin / out_targets.bin / out_types.bin / out_weights.bin   出边
+    in_offsets.bin / in_sources.bin / in_types.bin / in_weights.bin       入边
+    meta.json                       类型表、计数、字节序
+
+用法（项目根目录）：
+    python -m tools.knowledge_graph build [--export graph.json]
+    python -m tools.knowledge_graph neighbours Modern/00-概念关系图.md
+    python -m tools.knowledge_graph path concept:MSMFIT（最小语义模型） concept:语义熵
+    python -m tools.knowledge_graph reach dir:Modern/02-语义驱动架构理论 --depth 2
+"""
+import argparse
+import bisect
+import json
+import mmap
+import os
+import posixpath
+import sys
+import time
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from tools import concept_index
+from tools.atomic_write import AtomicBatch
+from tools.link_check import DEFAULT_DIRS, extract_links, resolve_link, walk_tree
+from tools.section_index import build_index
+
+SCHEMA = "Analysis/知识图谱元数据-v64.json"
+DEFAULT_OUTPUT = os.path.join("reports", "graph")
+GRAPH_VERSION = 1
+
+# 按标题关键词推断节点类型，先匹配先得；都不匹配时文档为 theory、标题为 concept
+TYPE_KEYWORDS = [
+    ("tool", ("工具", "tool")),
+    ("method", ("方法", "流程", "步骤", "实践", "method")),
+    ("model", ("模型", "模式", "model")),
+]
+THEORY_MARKERS = ("总论", "README", "index")
+
+# 数组文件：名称 → array 类型码
+ARRAYS = OrderedDict([
+    ("id_offsets", "q"), ("label_offsets", "q"), ("node_types", "B"),
+    ("out_offsets", "q"), ("out_targets", "i"), ("out_types", "B"), ("out_weights", "f"),
+    ("in_offsets", "q"), ("in_sources", "i"), ("in_types", "B"), ("in_weights", "f"),
+])
+BLOBS = ("ids", "labels")
+
+
+def load_schema(root):
+    with open(os.path.join(root, *SCHEMA.split('/')), 'r', encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def infer_type(title, default):
+    for node_type, keywords in TYPE_KEYWORDS:
+        if any(k in title for k in keywords):
+            return node_type
+    return default
+
+
+def extract_document(root, rel):
+    """单个文档的标题（含所在行号与锚点）与链接；读取失败返回 None"""
+    try:
+        with open(os.path.join(root, *rel.split('/')), 'rb') as fh:
+            raw = fh.read()
+        text = raw.decode('utf-8-sig')
+    except (OSError, UnicodeDecodeError):
+        return rel, None, None
+    index = build_index(raw)
+    sections = []
+    line, pos = 1, 0
+    for h, anchor in zip(index.headings, index.heading_anchors()):
+        line += raw.count(b'\n', pos, h.start)
+        pos = h.start
+        sections.append((line, h.level, h.title, anchor))
+    return rel, sections, extract_links(text)
+
+
+def _extract_chunk(args):
+    root, rels = args
+    return [extract_document(root, rel) for rel in rels]
+
+
+def _extract_all(root, rels, workers):
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(rels) // (workers * 4) or 1)
+    chunks = [(root, rels[i:i + chunk]) for i in range(0, len(rels), chunk)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(_extract_chunk, chunks):
+                yield from part
+    else:
+        for args in chunks:
+            yield from _extract_chunk(args)
+
+
+def _add_edge(edges, source, target, edge_type, weight=1.0):
+    """同一 (起点, 终点, 类型) 只保留一条边，权重累加"""
+    key = (source, target, edge_type)
+    edges[key] = edges.get(key, 0.0) + weight
+
+
+def build_graph(root, dirs, state_path, workers=None):
+    """返回 (schema, nodes {id: (类型, 标签)}, edges {(起点, 终点, 类型): 权重})"""
+    schema = load_schema(root)
+    nodes = {}
+    edges = {}
+    for node in schema.get("coreNodes", []):
+        nodes[node["id"]] = (node["type"], node["label"])
+    for rel in schema.get("coreRelations", []):
+        _add_edge(edges, rel["source"], rel["target"], rel["type"],
+                  rel.get("properties", {}).get("weight", 1.0))
+
+    existing, markdown = walk_tree(root)
+    prefixes = tuple(d.rstrip('/') + '/' for d in dirs)
+    docs = [rel for rel in markdown if rel.startswith(prefixes)]
+
+    # 文档、标题与目录层级
+    section_lines = {}
+    links = []
+    for rel, sections, doc_links in _extract_all(root, docs, workers):
+        if sections is None:
+            continue
+        doc_id = "doc:" + rel
+        parent = posixpath.dirname(rel)
+        child = doc_id
+        while parent:
+            dir_id = "dir:" + parent
+            _add_edge(edges, child, dir_id, "part-of")
+            if dir_id in nodes:
+                break
+            nodes[dir_id] = ("theory", posixpath.basename(parent))
+            child, parent = dir_id, posixpath.dirname(parent)
+        stem = posixpath.splitext(posixpath.basename(rel))[0]
+        title = next((s[2] for s in sections if s[1] == 1), stem)
+        default = "theory" if any(m in stem for m in THEORY_MARKERS) else "concept"
+        nodes[doc_id] = (infer_type(title, default), title)
+
+        stack = []
+        for line, level, heading, anchor in sections:
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            sec_id = f"sec:{rel}#{anchor}"
+            nodes[sec_id] = (infer_type(heading, "concept"), heading)
+            _add_edge(edges, sec_id, stack[-1][1] if stack else doc_id, "part-of")
+            stack.append((level, sec_id))
+        section_lines[rel] = ([s[0] for s in sections], [f"sec:{rel}#{s[3]}" for s in sections])
+        links.extend((rel, line, url) for line, url in doc_links)
+
+    # 文档间链接：起点为链接所在章节，终点为锚点对应章节（不存在则为文档）
+    for rel, line, url in links:
+        skip, target, anchor = resolve_link(rel, url, existing)
+        if skip or target is None or target not in section_lines:
+            continue
+        starts, ids = section_lines[rel]
+        i = bisect.bisect_right(starts, line) - 1
+        source = ids[i] if i >= 0 else "doc:" + rel
+        dest = f"sec:{target}#{anchor.lower()}" if anchor else None
+        if dest not in nodes:
+            dest = "doc:" + target
+        if source != dest:
+            _add_edge(edges, source, dest, "uses")
+
+    # 概念提及与定义（复用 concept_index 的增量倒排索引）
+    state = concept_index.load_state(state_path)
+    concept_index.update_index(root, dirs, state)
+    concept_index.save_state(state_path, state)
+    by_alias = {}
+    for concept, names in state["concepts"].items():
+        nodes["concept:" + concept] = ("concept", concept)
+        for name in names:
+            by_alias.setdefault(name.lower(), concept)
+    for rel, entry in state["docs"].items():
+        doc_id = "doc:" + rel
+        if doc_id not in nodes:
+            continue
+        for concept, hits in entry["postings"].items():
+            for anchor, _, count in hits:
+                source = f"sec:{rel}#{anchor}" if anchor else doc_id
+                _add_edge(edges, source, "concept:" + concept, "uses", float(count))
+        for name, anchor in entry["defines"]:
+            concept = by_alias.get(name.lower())
+            if concept:
+                _add_edge(edges, "concept:" + concept, f"sec:{rel}#{anchor}" if anchor else doc_id, "part-of")
+
+    # 指向不存在节点的边（如 coreRelations 中的笔误）丢弃
+    edges = {k: w for k, w in edges.items() if k[0] in nodes and k[1] in nodes}
+    return schema, nodes, edges
+
+
+def _csr(count, keys, values):
+    """按 keys 计数排序，返回 (offsets, 排序后各元素在原序列中的位置)"""
+    offsets = array('q', bytes(8 * (count + 1)))
+    for k in keys:
+        offsets[k + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+    fill = array('q', offsets[:count])
+    order = array('i', bytes(4 * len(values)))
+    for pos, k in enumerate(keys):
+        order[fill[k]] = pos
+        fill[k] += 1
+    return offsets, order
+
+
+def _blob(strings):
+    offsets = array('q', [0])
+    parts = []
+    for s in strings:
+        data = s.encode('utf-8')
+        parts.append(data)
+        offsets.append(offsets[-1] + len(data))
+    return b''.join(parts), offsets
+
+
+def write_graph(out_dir, schema, nodes, edges):
+    """写出数组文件与 meta.json；同一批原子替换"""
+    node_types = [t["id"] for t in schema.get("nodeTypes", [])]
+    edge_types = [t["id"] for t in schema.get("relationTypes", [])]
+    ids = sorted(nodes)
+    number = {nid: i for i, nid in enumerate(ids)}
+    data = {}
+    data["ids"], data["id_offsets"] = _blob(ids)
+    data["labels"], data["label_offsets"] = _blob(nodes[nid][1] for nid in ids)
+    data["node_types"] = array('B', (node_types.index(nodes[nid][0]) for nid in ids))
+
+    items = list(edges.items())
+    src = array('i', (number[k[0]] for k, _ in items))
+    dst = array('i', (number[k[1]] for k, _ in items))
+    types = array('B', (edge_types.index(k[2]) for k, _ in items))
+    weights = array('f', (w for _, w in items))
+    for prefix, keys, other, name in (("out", src, dst, "targets"), ("in", dst, src, "sources")):
+        offsets, order = _csr(len(ids), keys, items)
+        data[prefix + "_offsets"] = offsets
+        data[f"{prefix}_{name}"] = array('i', (other[p] for p in order))
+        data[prefix + "_types"] = array('B', (types[p] for p in order))
+        data[prefix + "_weights"] = array('f', (weights[p] for p in order))
+
+    meta = {
+        "version": GRAPH_VERSION,
+        "byteorder": sys.byteorder,
+        "knowledgeGraph": schema.get("knowledgeGraph", {}),
+        "nodeTypes": node_types,
+        "relationTypes": edge_types,
+        "nodes": len(ids),
+        "edges": len(items),
+        "builtAt": time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    with AtomicBatch() as batch:
+        for name, value in data.items():
+            payload = value if isinstance(value, bytes) else value.tobytes()
+            batch.write(os.path.join(out_dir, name + ".bin"), payload)
+        batch.write(os.path.join(out_dir, "meta.json"),
+                    json.dumps(meta, ensure_ascii=False, indent=2).encode('utf-8'))
+    return meta
+
+
+class Graph:
+    """只读图：各数组通过 mmap 映射，按需读取，不整体载入"""
+
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as fh:
+            self.meta = json.load(fh)
+        if self.meta.get("version") != GRAPH_VERSION or self.meta.get("byteorder") != sys.byteorder:
+            raise ValueError(f"图文件版本或字节序不匹配: {path}")
+        self.node_types = self.meta["nodeTypes"]
+        self.relation_types = self.meta["relationTypes"]
+        self._maps = []
+        self._views = {}
+        for name in BLOBS:
+            self._views[name] = self._map(path, name, 'B')
+        for name, code in ARRAYS.items():
+            self._views[name] = self._map(path, name, code)
+
+    def _map(self, path, name, code):
+        with open(os.path.join(path, name + ".bin"), 'rb') as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return memoryview(b'').cast(code)
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mm)
+        return memoryview(mm).cast(code)
+
+    def close(self):
+        for view in self._views.values():
+            view.release()
+        for mm in self._maps:
+            mm.close()
+        self._views, self._maps = {}, []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.meta["nodes"]
+
+    def _string(self, blob, offsets, i):
+        off = self._views[offsets]
+        return bytes(self._views[blob][off[i]:off[i + 1]]).decode('utf-8')
+
+    def node_id(self, i):
+        return self._string("ids", "id_offsets", i)
+
+    def label(self, i):
+        return self._string("labels", "label_offsets", i)
+
+    def node_type(self, i):
+        return self.node_types[self._views["node_types"][i]]
+
+    def find(self, node_id):
+        """节点 id → 节点编号（二分查找），不存在返回 None"""
+        key = node_id.encode('utf-8')
+        blob, off = self._views["ids"], self._views["id_offsets"]
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bytes(blob[off[mid]:off[mid + 1]]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and bytes(blob[off[lo]:off[lo + 1]]) == key:
+            return lo
+        return None
+
+    def resolve(self, name):
+        """接受完整 id，或省略前缀的文档路径/目录/概念名"""
+        for candidate in (name, "doc:" + name, "dir:" + name.rstrip('/'), "concept:" + name):
+            i = self.find(candidate)
+            if i is not None:
+                return i
+        return None
+
+    def neighbours(self, i, direction="out", types=None):
+        """逐条产出 (邻居编号, 关系类型, 权重, 方向)；direction 为 out / in / both"""
+        wanted = None if types is None else {self.relation_types.index(t) for t in types}
+        for prefix, other in (("out", "out_targets"), ("in", "in_sources")):
+            if direction not in (prefix, "both"):
+                continue
+            off = self._views[prefix + "_offsets"]
+            ends, kinds = self._views[other], self._views[prefix + "_types"]
+            weights = self._views[prefix + "_weights"]
+            for e in range(off[i], off[i + 1]):
+                if wanted is None or kinds[e] in wanted:
+                    yield ends[e], self.relation_types[kinds[e]], weights[e], prefix
+
+    def _bfs(self, start, direction, types, max_depth=None, goal=None):
+        parent = {start: None}
+        depth = {start: 0}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            if node == goal:
+                break
+            if max_depth is not None and depth[node] >= max_depth:
+                continue
+            for nxt, _, _, _ in self.neighbours(node, direction, types):
+                if nxt not in parent:
+                    parent[nxt] = node
+                    depth[nxt] = depth[node] + 1
+                    queue.append(nxt)
+        return parent, depth
+
+    def shortest_path(self, source, target, direction="out", types=None):
+        """无权最短路径（节点编号列表），不可达返回 None"""
+        parent, _ = self._bfs(source, direction, types, goal=target)
+        if target not in parent:
+            return None
+        path = [target]
+        while parent[path[-1]] is not None:
+            path.append(parent[path[-1]])
+        return path[::-1]
+
+    def reachable(self, source, direction="out", types=None, max_depth=None):
+        """可达节点 → 步数（不含起点）"""
+        _, depth = self._bfs(source, direction, types, max_depth)
+        del depth[source]
+        return depth
+
+
+def export_json(graph, path):
+    """按元数据 schema 的节点/关系结构导出完整图（nodes / relations）"""
+    nodes = [{"id": graph.node_id(i), "type": graph.node_type(i), "label": graph.label(i)}
+             for i in range(len(graph))]
+    relations = []
+    for i in range(len(graph)):
+        for j, edge_type, weight, _ in graph.neighbours(i):
+            relations.append({
+                "id": f"rel-{len(relations) + 1}",
+                "type": edge_type,
+                "source": nodes[i]["id"],
+                "target": nodes[j]["id"],
+                "properties": {"weight": round(weight, 3)},
+            })
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump({
+            "knowledgeGraph": graph.meta["knowledgeGraph"],
+            "nodeTypes": graph.node_types,
+            "relationTypes": graph.relation_types,
+            "nodes": nodes,
+            "relations": relations,
+        }, fh, ensure_ascii=False, indent=1)
+
+
+def _describe(graph, i):
+    return f"{graph.node_id(i)}  [{graph.node_type(i)}] {graph.label(i)}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="知识图谱构建与查询")
+    parser.add_argument('--root', default=os.getcwd(), help="项目根目录")
+    parser.add_argument('--graph', default=DEFAULT_OUTPUT, help="图文件目录（相对路径以根目录为基准）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser('build', help="从文档重新构建图")
+    build.add_argument('--dirs', nargs='+', default=DEFAULT_DIRS, help="参与构建的顶层目录")
+    build.add_argument('--state', default=concept_index.DEFAULT_STATE, help="概念倒排索引状态文件")
+    build.add_argument('--workers', type=int, default=None, help="解析进程数，默认 CPU 核数")
+    build.add_argument('--export', default=None, help="同时导出 schema 格式的 JSON")
+
+    for name, help_text in (("neighbours", "列出邻居"), ("path", "最短路径"), ("reach", "可达节点")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('nodes', nargs=2 if name == "path" else 1, help="节点 id、文档路径或概念名")
+        p.add_argument('--direction', choices=("out", "in", "both"), default="both" if name != "reach" else "out")
+        p.add_argument('--types', nargs='+', default=None, help="只沿这些关系类型")
+        if name == "reach":
+            p.add_argument('--depth', type=int, default=None, help="最大步数")
+    args = parser.parse_args(argv)
+
+    root = os.path.abspath(args.root)
+    graph_dir = args.graph if os.path.isabs(args.graph) else os.path.join(root, args.graph)
+
+    if args.command == "build":
+        state = args.state if os.path.isabs(args.state) else os.path.join(root, args.state)
+        start = time.perf_counter()
+        schema, nodes, edges = build_graph(root, args.dirs, state, args.workers)
+        meta = write_graph(graph_dir, schema, nodes, edges)
+        print(f"节点: {meta['nodes']}，边: {meta['edges']}，耗时 {time.perf_counter() - start:.2f}s")
+        print(f"图文件: {graph_dir}")
+        if args.export:
+            with Graph(graph_dir) as graph:
+                export_json(graph, args.export)
+            print(f"JSON 导出: {args.export}")
+        return 0
+
+    with Graph(graph_dir) as graph:
+        found = [graph.resolve(n) for n in args.nodes]
+        for name, i in zip(args.nodes, found):
+            if i is None:
+                print(f"未找到节点: {name}")
+                return 1
+        if args.command == "neighbours":
+            for j, edge_type, weight, way in graph.neighbours(found[0], args.direction, args.types):
+                arrow = "->" if way == "out" else "<-"
+                print(f"{arrow} {edge_type:<10} {weight:6.1f}  {_describe(graph, j)}")
+        elif args.command == "path":
+            path = graph.shortest_path(found[0], found[1], args.direction, args.types)
+            if path is None:
+                print("不可达")
+                return 1
+            for step, i in enumerate(path):
+                print(f"{step:3d}  {_describe(graph, i)}")
+        else:
+            depth = graph.reachable(found[0], args.direction, args.types, args.depth)
+            for i, d in sorted(depth.items(), key=lambda kv: (kv[1], kv[0])):
+                print(f"{d:3d}  {_describe(graph, i)}")
+            print(f"可达节点数: {len(depth)}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
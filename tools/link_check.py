@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+链接完整性检查（Analysis/12-工具与方法/链接扫描.ps1 的跨平台版本）。
+
+先对仓库做一次目录遍历，得到全部已存在路径的内存集合；再并行解析各
+Markdown 文件中的本地链接，逐条对照该集合解析，不再为每条链接单独访问
+文件系统。带 #锚点 的链接同时对照目标文档的标题锚点检查。
+
+用法（项目根目录）：
+    python -m tools.link_check [--dirs Modern Analysis Struct View] [--workers N]
+"""
+import argparse
+import json
+import os
+import posixpath
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote
+
+from tools import walker
+from tools.section_index import build_index, closes_fence, fence_open
+
+DEFAULT_DIRS = ["Modern", "Analysis", "Struct", "View"]
+SKIP_DIRS = (".git/", ".vscode/", "__pycache__/")
+
+_LINK_RE = re.compile(r'\[[^\]]*\]\(([^)]+)\)')
+_INLINE_CODE_RE = re.compile(r'`[^`\r\n]+`')
+_EXTERNAL_RE = re.compile(r'^(https?|ftp)://')
+_BAD_CHARS_RE = re.compile(r'[\s:*?"<>|]')
+_HTML_ANCHOR_RE = re.compile(r'<a\s+[^>]*?(?:id|name)\s*=\s*["\']([^"\']+)["\']', re.I)
+
+
+def walk_tree(root):
+    """一次遍历，返回 (已存在的文件与目录相对路径集合, Markdown 文件相对路径列表)"""
+    existing = set()
+    markdown = []
+    for entry in walker.walk(root, include=None, exclude=SKIP_DIRS, dirs=True):
+        existing.add(entry.rel)
+        if entry.st_size is not None and entry.rel.endswith('.md'):
+            markdown.append(entry.rel)
+    return existing, markdown
+
+
+def _strip_code(text):
+    """去掉围栏代码块与行内代码，保留行号不变；代码块的判定与 section_index 相同"""
+    lines = []
+    fence = None
+    for line in text.split('\n'):
+        if fence is not None:
+            if closes_fence(line, fence):
+                fence = None
+            lines.append('')
+            continue
+        fence = fence_open(line)
+        if fence is not None:
+            lines.append('')
+            continue
+        lines.append(_INLINE_CODE_RE.sub('', line))
+    return lines
+
+
+def html_anchors(text):
+    """文本中 <a id/name="…"> 定义的锚点（小写）"""
+    return {a.lower() for a in _HTML_ANCHOR_RE.findall(text)}
+
+
+def is_external(url):
+    """外部链接（http/https/ftp、mailto）不检查"""
+    return url.startswith('mailto:') or bool(_EXTERNAL_RE.match(url))
+
+
+def parse_file(root, rel):
+    """解析单个文件：返回 (rel, 链接列表 [(行号, url)], 锚点集合, 错误信息)"""
+    try:
+        with open(os.path.join(root, rel), 'rb') as fh:
+            raw = fh.read()
+        text = raw.decode('utf-8-sig')
+    except (OSError, UnicodeDecodeError) as e:
+        return rel, [], set(), f"读取失败: {rel}: {e}"
+    anchors = build_index(raw).anchors()
+    anchors.update(html_anchors(text))
+    return rel, extract_links(text), anchors, None
+
+
+def extract_links(text):
+    """代码块之外的 Markdown 链接，返回 [(行号, url)]"""
+    links = []
+    for lineno, line in enumerate(_strip_code(text), 1):
+        for m in _LINK_RE.finditer(line):
+            url = m.group(1).strip()
+            if url.startswith('<') and url.endswith('>'):
+                url = url[1:-1]
+            # 去掉链接标题：[x](path "title")
+            url = url.split(' "')[0].strip()
+            if url:
+                links.append((lineno, url))
+    return links
+
+
+def _parse_chunk(args):
+    root, rels = args
+    return [parse_file(root, rel) for rel in rels]
+
+
+def resolve_link(source, url, existing):
+    """
+    对照已存在路径集合解析链接。
+    返回 (是否跳过, 目标相对路径或 None, 锚点或 None)；目标为 None 表示断链。
+    """
+    if is_external(url):
+        return True, None, None
+    path_part, _, anchor = url.partition('#')
+    anchor = unquote(anchor) or None
+    if not path_part:
+        return False, source, anchor
+    path_part = unquote(path_part).replace('\\', '/')
+    if _BAD_CHARS_RE.search(path_part):
+        return True, None, None
+    if path_part.startswith('/'):
+        target = posixpath.normpath(path_part.lstrip('/'))
+    else:
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(source), path_part))
+    if target in existing:
+        return False, target, anchor
+    readme = posixpath.join(target, 'README.md')
+    if readme in existing:
+        return False, readme, anchor
+    return False, None, anchor
+
+
+def check_links(root, dirs, workers=None):
+    """返回 (扫描的 Markdown 文件数, 断链列表, 读取错误列表)"""
+    existing, markdown = walk_tree(root)
+    prefixes = tuple(d.rstrip('/') + '/' for d in dirs)
+    scanned = [rel for rel in markdown if rel.startswith(prefixes)]
+
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(scanned) // (workers * 4) or 1)
+    chunks = [(root, scanned[i:i + chunk]) for i in range(0, len(scanned), chunk)]
+    parsed = {}
+    errors = []
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_parse_chunk, chunks)
+            for part in results:
+                for item in part:
+                    parsed[item[0]] = item
+    else:
+        for args in chunks:
+            for item in _parse_chunk(args):
+                parsed[item[0]] = item
+
+    anchor_cache = {rel: item[2] for rel, item in parsed.items()}
+    broken = []
+    for rel in scanned:
+        _, links, _, error = parsed[rel]
+        if error:
+            errors.append(error)
+            continue
+        broken.extend(find_broken(root, rel, links, existing, anchor_cache))
+    return len(scanned), broken, errors
+
+
+def find_broken(root, rel, links, existing, anchor_cache):
+    """单个文件的断链列表；anchor_cache 为 {相对路径: 锚点集合}，缺少的目标文档按需解析并补入"""
+    broken = []
+    for lineno, url in links:
+        skip, target, anchor = resolve_link(rel, url, existing)
+        if skip:
+            continue
+        if target is None:
+            resolved = posixpath.normpath(posixpath.join(posixpath.dirname(rel), url.split('#')[0]))
+            broken.append({"file": rel, "line": lineno, "link": url, "resolved": resolved, "kind": "path"})
+            continue
+        if not anchor or not target.endswith('.md'):
+            continue
+        # 扫描范围之外的目标文档按需解析一次
+        if target not in anchor_cache:
+            anchor_cache[target] = parse_file(root, target)[2]
+        if anchor.lower() not in anchor_cache[target]:
+            broken.append({"file": rel, "line": lineno, "link": url, "resolved": target, "kind": "anchor"})
+    return broken
+
+
+def write_reports(root, output, scanned, broken):
+    """写出与 链接扫描.ps1 相同格式的文本报告及其 JSON 版本"""
+    out_dir = os.path.dirname(output)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    anchors = sum(1 for b in broken if b["kind"] == "anchor")
+    lines = [
+        "链接完整性检查报告",
+        "==================",
+        f"检查时间: {time.strftime('%Y-%m-%d %H:%M:%S')}",
+        f"根目录: {root}",
+        f"Markdown 文件数: {scanned}",
+        f"断链数: {len(broken)}",
+        f"其中锚点失效: {anchors}",
+        "",
+        "详情:",
+        "-----",
+    ]
+    report = "\n".join(lines)
+    for b in broken:
+        report += f"\n- 文件: {b['file']}\n  链接: {b['link']}"
+        if b["kind"] == "anchor":
+            report += "\n  原因: 锚点不存在"
+    with open(output, 'w', encoding='utf-8-sig') as fh:
+        fh.write(report + "\n")
+    json_path = os.path.splitext(output)[0] + '.json'
+    with open(json_path, 'w', encoding='utf-8') as fh:
+        json.dump({"root": root, "markdown_files": scanned, "broken": broken},
+                  fh, ensure_ascii=False, indent=2)
+    return json_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Markdown 本地链接完整性检查")
+    parser.add_argument('--root', default=os.getcwd(), help="项目根目录")
+    parser.add_argument('--dirs', nargs='+', default=DEFAULT_DIRS, help="扫描的顶层目录")
+    parser.add_argument('--output', default=os.path.join('reports', 'links', 'broken-links.txt'),
+                        help="文本报告路径（相对路径以根目录为基准）")
+    parser.add_argument('--workers', type=int, default=None, help="解析进程数，默认 CPU 核数")
+    args = parser.parse_args(argv)
+
+    root = os.path.abspath(args.root)
+    output = args.output if os.path.isabs(args.output) else os.path.join(root, args.output)
+    print("链接完整性检查开始...")
+    print(f"根目录: {root}")
+    scanned, broken, errors = check_links(root, args.dirs, args.workers)
+    for msg in errors:
+        print(msg)
+    json_path = write_reports(root, output, scanned, broken)
+    print(f"\n检查完成，Markdown 文件数: {scanned}，断链数: {len(broken)}")
+    print(f"报告已保存: {output}")
+    print(f"JSON 报告: {json_path}")
+    return 1 if broken else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
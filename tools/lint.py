@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+单遍多规则文档检查：执行 Analysis/FormalUnified/verification_rules.yaml 中的文档级规则。
+
+规则按 algorithm 编译成一个检查计划，每个文件只读一次、解码一次，按需求出一次
+章节索引 / 链接 / 公式，所有规则共用这些中间结果：
+- SectionPresence：parameters.sections 中的每个标题都应出现（标题包含该文字；可用 level 限定级别）
+- LinkValidity：本地链接目标与 #锚点 存在（与 tools.link_check 相同的解析规则）
+- FormulaCheck：公式通过 tools.tex_check 的检查（共用其公式结果缓存）
+- SizeThreshold：文件大小落在 parameters.min_bytes / max_bytes 之间
+- PatternMatch：forbid 为真时命中即违规，否则未命中违规。只由字面量组成的模式（如 "TODO|TBD"）
+  全部合并成一个字面量多选正则，整个文件只扫描一遍，规则再多耗时也几乎不变；
+  含正则元字符的模式各自单独搜索（带分组的大选择式在 re 中逐分支回溯，反而更慢）
+同类规则再多也不增加读取与解析次数。其他 algorithm（如 RuntimeVerification）不是文档规则，跳过并列出。
+scope.paths（相对路径通配符）与 scope.min_bytes / max_bytes 限定规则适用的文件。
+
+用法（项目根目录，需要 PyYAML，见 requirements.txt）：
+    python -m tools.lint [--rules Analysis/FormalUnified/verification_rules.yaml] [--report reports/lint.json]
+"""
+import argparse
+import fnmatch
+import os
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from tools import link_check, tex_check
+from tools.run_report import write_report
+from tools.section_index import build_index
+
+DEFAULT_DIRS = link_check.DEFAULT_DIRS
+DEFAULT_RULES = "Analysis/FormalUnified/verification_rules.yaml"
+SEVERITIES = ("error", "warning", "info")
+ALGORITHMS = ("SectionPresence", "LinkValidity", "FormulaCheck", "SizeThreshold", "PatternMatch")
+_META_RE = re.compile(r'[.^$*+?{}\[\]\\()]')
+
+
+def load_rules(paths):
+    """读取规则文件（YAML 列表），按文件顺序合并"""
+    try:
+        import yaml
+    except ImportError:
+        raise SystemExit("tools.lint 需要 PyYAML：pip install -r requirements.txt")
+    rules = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as fh:
+            rules.extend(yaml.safe_load(fh) or [])
+    return rules
+
+
+def _scope_matcher(scope):
+    """scope -> 判断 (rel, size) 是否适用的函数；无 scope 时为 None"""
+    if not scope:
+        return None
+    paths = scope.get("paths")
+    pattern = re.compile('|'.join(fnmatch.translate(p) for p in paths)) if paths else None
+    lo = scope.get("min_bytes", 0)
+    hi = scope.get("max_bytes")
+
+    def applies(rel, size):
+        if size < lo or (hi is not None and size > hi):
+            return False
+        return pattern is None or bool(pattern.match(rel))
+    return applies
+
+
+def compile_rules(rules):
+    """
+    返回 (检查计划, 跳过的规则列表)。
+    计划为 {algorithm: [规则]}，另含 "literals"（全部字面量模式合并后的正则）、
+    "literal_rules"（{字面量: 命中时计入的 PatternMatch 规则序号}）与 "regexes"（[(规则序号, 正则)]）。
+    """
+    plan = {name: [] for name in ALGORITHMS}
+    skipped = []
+    for raw in rules:
+        algorithm = raw.get("algorithm")
+        if algorithm not in plan or raw.get("enabled") is False:
+            skipped.append(raw)
+            continue
+        severity = raw.get("severity", "warning")
+        if severity not in SEVERITIES:
+            raise ValueError(f"{raw['rule_id']}: 未知 severity {severity!r}")
+        rule = {
+            "id": raw["rule_id"],
+            "name": raw.get("name", raw["rule_id"]),
+            "severity": severity,
+            "params": raw.get("parameters") or {},
+            "applies": _scope_matcher(raw.get("scope")),
+        }
+        if algorithm == "PatternMatch":
+            re.compile(rule["params"]["pattern"])  # 逐条编译一次，出错时能定位到规则
+        plan[algorithm].append(rule)
+    owners = {}
+    plan["regexes"] = []
+    for i, rule in enumerate(plan["PatternMatch"]):
+        alternatives = rule["params"]["pattern"].split('|')
+        if all(a and not _META_RE.search(a) for a in alternatives):
+            for a in alternatives:
+                owners.setdefault(a, set()).add(i)
+        else:
+            plan["regexes"].append((i, re.compile(rule["params"]["pattern"], re.M)))
+    # 同一位置只报告最长的字面量，因此命中某字面量时，也计入其中包含的较短字面量所属的规则
+    plan["literal_rules"] = {lit: sorted(set().union(*(rules for other, rules in owners.items() if other in lit)))
+                             for lit in owners}
+    ordered = sorted(owners, key=len, reverse=True)
+    plan["literals"] = re.compile('|'.join(map(re.escape, ordered))) if ordered else None
+    return plan, skipped
+
+
+def _finding(rule, rel, line, message, severity=None):
+    return OrderedDict([("rule", rule["id"]), ("severity", severity or rule["severity"]),
+                        ("file", rel), ("line", line), ("message", message)])
+
+
+def _active(rules, rel, size):
+    return [r for r in rules if r["applies"] is None or r["applies"](rel, size)]
+
+
+def lint_document(rel, raw, plan, cache):
+    """
+    单个文档的检查结果：(findings, 链接 [(行号, url)] 或 None, 锚点集合或 None, 新的公式缓存条目)。
+    链接的解析需要全部文档的锚点，由调用方在汇总后完成。
+    """
+    size = len(raw)
+    findings = []
+    new = {}
+    for rule in _active(plan["SizeThreshold"], rel, size):
+        lo, hi = rule["params"].get("min_bytes"), rule["params"].get("max_bytes")
+        if lo is not None and size < lo:
+            findings.append(_finding(rule, rel, None, f"文件大小 {size} 字节，小于 {lo}"))
+        elif hi is not None and size > hi:
+            findings.append(_finding(rule, rel, None, f"文件大小 {size} 字节，大于 {hi}"))
+
+    sections = _active(plan["SectionPresence"], rel, size)
+    link_rules = _active(plan["LinkValidity"], rel, size)
+    formula_rules = _active(plan["FormulaCheck"], rel, size)
+    patterns = _active(plan["PatternMatch"], rel, size)
+    if not (sections or link_rules or formula_rules or patterns or plan["LinkValidity"]):
+        return findings, None, None, new
+    try:
+        text = raw.decode('utf-8-sig')
+    except UnicodeDecodeError as e:
+        findings.append(OrderedDict([("rule", "read"), ("severity", "error"), ("file", rel),
+                                     ("line", None), ("message", f"不是 UTF-8 文本: {e}")]))
+        return findings, None, None, new
+
+    index = build_index(raw) if sections or plan["LinkValidity"] else None
+    # 各级标题文字各拼成一个字符串，"标题包含" 判断即一次子串查找
+    titles = {}
+    for rule in sections:
+        level = rule["params"].get("level")
+        if level not in titles:
+            titles[level] = '\n'.join(h.title for h in index.headings if level is None or h.level == level)
+        for title in rule["params"]["sections"]:
+            if title not in titles[level]:
+                findings.append(_finding(rule, rel, None, f"缺少章节：{title}"))
+
+    if formula_rules:
+        formulas = tex_check.extract_formulas(text)
+        for f in formulas:
+            key = tex_check.formula_key(f.tex, f.display)
+            result = cache.get(key)
+            if result is None:
+                result = cache[key] = new[key] = tex_check.check_formula(f.tex, f.display)
+            for severity, message in result:
+                for rule in formula_rules:
+                    if severity == "error":
+                        findings.append(_finding(rule, rel, f.line, f"${f.tex}$ — {message}"))
+                    elif rule["params"].get("warnings"):
+                        findings.append(_finding(rule, rel, f.line, f"${f.tex}$ — {message}", "warning"))
+
+    if patterns:
+        first = {}
+        counts = {}
+        if plan["literals"] is not None:
+            literal_rules = plan["literal_rules"]
+            for m in plan["literals"].finditer(text):
+                for i in literal_rules[m.group(0)]:
+                    counts[i] = counts.get(i, 0) + 1
+                    first.setdefault(i, m.start())
+        for i, regex in plan["regexes"]:
+            for m in regex.finditer(text):
+                counts[i] = counts.get(i, 0) + 1
+                first.setdefault(i, m.start())
+        for i, rule in enumerate(plan["PatternMatch"]):
+            if rule not in patterns:
+                continue
+            if rule["params"].get("forbid", True):
+                if i in counts:
+                    line = text.count('\n', 0, first[i]) + 1
+                    findings.append(_finding(rule, rel, line, f"命中 {counts[i]} 处：{rule['name']}"))
+            elif i not in counts:
+                findings.append(_finding(rule, rel, None, f"未出现：{rule['name']}"))
+
+    links = link_check.extract_links(text) if link_rules else None
+    anchors = None
+    if index is not None and plan["LinkValidity"]:
+        anchors = index.anchors()
+        anchors.update(link_check.html_anchors(text))
+    return findings, links, anchors, new
+
+
+_worker = {}
+
+
+def _init_worker(root, rules, cache):
+    # scope 编译出的是闭包，不能跨进程传递，各工作进程按原始规则重新编译
+    _worker["root"] = root
+    _worker["plan"] = compile_rules(rules)[0]
+    _worker["cache"] = cache
+
+
+def _lint_chunk(rels):
+    root, plan, cache = _worker["root"], _worker["plan"], _worker["cache"]
+    results = []
+    new = {}
+    for rel in rels:
+        try:
+            with open(os.path.join(root, *rel.split('/')), 'rb') as fh:
+                raw = fh.read()
+        except OSError as e:
+            failed = OrderedDict([("rule", "read"), ("severity", "error"), ("file", rel),
+                                  ("line", None), ("message", f"读取失败: {e}")])
+            results.append((rel, 0, [failed], None, None))
+            continue
+        findings, links, anchors, added = lint_document(rel, raw, plan, cache)
+        new.update(added)
+        results.append((rel, len(raw), findings, links, anchors))
+    return results, new
+
+
+def lint(root, rules, dirs, cache=None, workers=None):
+    """返回 (扫描文件数, findings 列表, 跳过的规则, 新的公式缓存条目)"""
+    plan, skipped = compile_rules(rules)
+    cache = {} if cache is None else cache
+    existing, markdown = link_check.walk_tree(root)
+    prefixes = tuple(d.rstrip('/') + '/' for d in dirs)
+    scanned = [rel for rel in markdown if rel.startswith(prefixes)]
+
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(scanned) // (workers * 4) or 1)
+    chunks = [scanned[i:i + chunk] for i in range(0, len(scanned), chunk)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(root, rules, cache)) as pool:
+            parts = list(pool.map(_lint_chunk, chunks))
+    else:
+        _init_worker(root, rules, cache)
+        parts = [_lint_chunk(c) for c in chunks]
+
+    findings = []
+    new = {}
+    anchor_cache = {}
+    linked = []
+    for results, added in parts:
+        new.update(added)
+        for rel, size, found, links, anchors in results:
+            findings.extend(found)
+            if anchors is not None:
+                anchor_cache[rel] = anchors
+            if links:
+                linked.append((rel, size, links))
+    for rel, size, links in linked:
+        for rule in _active(plan["LinkValidity"], rel, size):
+            check_anchors = rule["params"].get("anchors", True)
+            for b in link_check.find_broken(root, rel, links, existing, anchor_cache):
+                if b["kind"] == "anchor" and not check_anchors:
+                    continue
+                what = "锚点不存在" if b["kind"] == "anchor" else "目标不存在"
+                findings.append(_finding(rule, rel, b["line"], f"{what}：{b['link']}"))
+    order = {rel: i for i, rel in enumerate(scanned)}
+    findings.sort(key=lambda f: (order.get(f["file"], -1), f["line"] or 0, f["rule"]))
+    return len(scanned), findings, skipped, new
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按 verification_rules.yaml 中的文档级规则单遍检查语料")
+    parser.add_argument('--root', default=os.getcwd(), help="项目根目录")
+    parser.add_argument('--rules', nargs='+', default=[DEFAULT_RULES], help="规则文件（相对路径以根目录为基准）")
+    parser.add_argument('--only', nargs='+', default=None, metavar='RULE_ID', help="只执行这些规则")
+    parser.add_argument('--dirs', nargs='+', default=DEFAULT_DIRS, help="检查的顶层目录")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认 CPU 核数")
+    parser.add_argument('--cache', default=tex_check.DEFAULT_CACHE, help="公式结果缓存文件（与 tools.tex_check 共用）")
+    parser.add_argument('--top', type=int, default=10, help="控制台每条规则列出的问题数")
+    parser.add_argument('--report', default=None, help="JSON 报告路径")
+    args = parser.parse_args(argv)
+
+    root = os.path.abspath(args.root)
+    rules = load_rules([p if os.path.isabs(p) else os.path.join(root, p) for p in args.rules])
+    if args.only:
+        rules = [r for r in rules if r["rule_id"] in args.only]
+    cache_path = args.cache if os.path.isabs(args.cache) else os.path.join(root, args.cache)
+    cache = tex_check.load_cache(cache_path)
+    start = time.perf_counter()
+    scanned, findings, skipped, new = lint(root, rules, args.dirs, cache, args.workers)
+    elapsed = time.perf_counter() - start
+    if new:
+        cache.update(new)
+        tex_check.save_cache(cache_path, cache)
+
+    by_rule = OrderedDict((r["rule_id"], []) for r in rules if r not in skipped)
+    for f in findings:
+        by_rule.setdefault(f["rule"], []).append(f)
+    names = {r["rule_id"]: r.get("name", r["rule_id"]) for r in rules}
+    names.setdefault("read", "文件读取")
+    for rule_id, found in by_rule.items():
+        severity = found[0]["severity"] if found else ""
+        print(f"{rule_id} {names.get(rule_id, rule_id)}: {len(found)} {severity}")
+        for f in found[:args.top]:
+            where = f["file"] + (f":{f['line']}" if f["line"] else "")
+            print(f"    {where}: {f['message'][:160]}")
+        if len(found) > args.top:
+            print(f"    … 另有 {len(found) - args.top} 处")
+    for r in skipped:
+        print(f"跳过 {r['rule_id']} {r.get('name', '')}（{r.get('algorithm')} 不是文档规则或已停用）")
+    errors = sum(1 for f in findings if f["severity"] == "error")
+    print(f"文件: {scanned}，规则: {len(rules) - len(skipped)}，问题: {len(findings)}（error {errors}），"
+          f"耗时 {elapsed:.2f}s")
+    if args.report:
+        write_report(args.report, OrderedDict([
+            ("root", root),
+            ("rules", [r["rule_id"] for r in rules if r not in skipped]),
+            ("skipped", [r["rule_id"] for r in skipped]),
+            ("files", scanned),
+            ("seconds", round(elapsed, 3)),
+            ("counts", OrderedDict((k, len(v)) for k, v in by_rule.items())),
+            ("findings", findings),
+        ]))
+        print(f"报告: {args.report}")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
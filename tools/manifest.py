@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+增量运行清单：记录每个文件的 path、size、mtime、内容哈希与章节检测标志。
+
+再次运行时，size 与 mtime 均未变化的文件直接使用清单中的检测结果，无需打开文件。
+保存前用 prune 删除本次运行未遇到的文件（已删除或改名）的记录，清单大小与语料规模一致。
+"""
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+
+def content_hash(data):
+    """文件原始字节的内容哈希"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def load_manifest(path):
+    """读取清单；文件不存在、损坏或版本不符时返回空清单"""
+    if path and os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                manifest = json.load(fh)
+            if manifest.get("version") == MANIFEST_VERSION:
+                return manifest
+        except (OSError, ValueError):
+            pass
+    return {"version": MANIFEST_VERSION, "files": {}}
+
+
+def prune(manifest, seen):
+    """删除本次运行中未出现的文件（已删除或改名）的记录，返回删除条数"""
+    stale = [p for p in manifest["files"] if p not in seen]
+    for p in stale:
+        del manifest["files"][p]
+    return len(stale)
+
+
+def save_manifest(path, manifest):
+    """先写临时文件再替换，避免中断时留下半个清单"""
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def lookup(manifest, path, st):
+    """size 与 mtime 都与记录一致时返回记录，否则返回 None"""
+    entry = manifest["files"].get(path)
+    if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+        return entry
+    return None
+
+
+def record(manifest, path, st, digest, flags, payload=None, sections=None):
+    """
+    写入（或覆盖）一个文件的记录，flags 为章节检测标志字典，payload 为生成内容的哈希，
+    sections 为各章节生成内容的哈希 {标题: 哈希}
+    """
+    entry = {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "hash": digest,
+        "flags": flags,
+    }
+    if payload is not None:
+        entry["payload"] = payload
+    if sections is not None:
+        entry["sections"] = sections
+    manifest["files"][path] = entry
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+最小的 Markdown → HTML 渲染器（不依赖 markdown / mistune 等第三方包）。
+
+块级：ATX 标题（id 与 section_index 的锚点规则一致）、段落、围栏代码块、$$ 公式块、
+引用块、有序/无序列表（按缩进嵌套）、管道表格、分隔线。
+行内：代码、$ 公式、图片、链接、**粗体**、*斜体*、~~删除线~~、<br>。
+原始 HTML 一律转义（语料中的 HTML 多为示例代码），只保留 <br>。
+公式与链接通过回调交给调用方处理（site_build 用它们缓存公式、改写 .md 链接）。
+"""
+import html
+import re
+
+from tools.section_index import slugify
+
+_HEADING_RE = re.compile(r'^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$')
+_FENCE_RE = re.compile(r'^( {0,3})(`{3,}|~{3,})[ \t]*([^`\s]*)')
+_HR_RE = re.compile(r'^ {0,3}(?:(?:-[ \t]*){3,}|(?:\*[ \t]*){3,}|(?:_[ \t]*){3,})$')
+_LIST_RE = re.compile(r'^([ \t]*)([-*+]|\d{1,9}[.)])(?:[ \t]+(.*))?$')
+_TABLE_SEP_RE = re.compile(r'^[ \t]*\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$')
+_QUOTE_RE = re.compile(r'^ {0,3}> ?')
+
+# 行内代码与行内公式的识别规则，tex_check 提取公式时共用
+CODE_SPAN_RE = re.compile(r'(`+)(.+?)\1', re.S)
+INLINE_MATH_RE = re.compile(r'(?<![\\$])\$(?!\s)((?:\\.|[^$\\\n])+?)(?<!\s)\$(?![\d$])')
+_IMAGE_RE = re.compile(r'!\[([^\]]*)\]\(\s*<?([^)\s>]*)>?(?:\s+"([^"]*)")?\s*\)')
+_LINK_RE = re.compile(r'\[((?:[^\[\]]|\[[^\]]*\])*)\]\(\s*<?([^)\s>]*)>?(?:\s+"([^"]*)")?\s*\)')
+_AUTOLINK_RE = re.compile(r'<(https?://[^>\s]+)>')
+_BOLD_RE = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*|__(?=\S)(.+?)(?<=\S)__')
+_ITALIC_RE = re.compile(r'(?<![*\w])\*(?=[^\s*])(.+?)(?<=[^\s*])\*(?!\*)|(?<![_\w])_(?=\S)(.+?)(?<=\S)_(?![_\w])')
+_STRIKE_RE = re.compile(r'~~(?=\S)(.+?)(?<=\S)~~')
+_BR_RE = re.compile(r'&lt;br\s*/?&gt;', re.I)
+_PLACEHOLDER_RE = re.compile('\x00(\\d+)\x00')
+
+
+def _esc(text):
+    return html.escape(text, quote=False)
+
+
+def _attr(text):
+    return html.escape(text, quote=True)
+
+
+class Renderer:
+    """
+    math(tex, display) → HTML 片段；link(url) → 改写后的 url。
+    两个回调都可省略：公式原样转义输出，链接保持不变。
+    """
+
+    def __init__(self, math=None, link=None):
+        self.math = math or (lambda tex, display: f'<code class="math">{_esc(tex)}</code>')
+        self.link = link or (lambda url: url)
+        self._anchors = {}
+
+    # ---- 行内 ----
+
+    def inline(self, text):
+        stash = []
+
+        def keep(fragment):
+            stash.append(fragment)
+            return f"\x00{len(stash) - 1}\x00"
+
+        text = CODE_SPAN_RE.sub(lambda m: keep(f"<code>{_esc(m.group(2).strip())}</code>"), text)
+        text = INLINE_MATH_RE.sub(lambda m: keep(self.math(m.group(1), False)), text)
+        text = _AUTOLINK_RE.sub(lambda m: keep(f'<a href="{_attr(m.group(1))}">{_esc(m.group(1))}</a>'), text)
+        text = _IMAGE_RE.sub(lambda m: keep(
+            f'<img src="{_attr(self.link(m.group(2)))}" alt="{_attr(m.group(1))}"'
+            + (f' title="{_attr(m.group(3))}"' if m.group(3) else '') + '>'), text)
+
+        def link(m):
+            label = self._emphasis(_esc(m.group(1)))
+            title = f' title="{_attr(m.group(3))}"' if m.group(3) else ''
+            return keep(f'<a href="{_attr(self.link(m.group(2)))}"{title}>{label}</a>')
+        text = _LINK_RE.sub(link, text)
+        text = self._emphasis(_esc(text))
+        text = _BR_RE.sub('<br>', text)
+        # 占位符可能嵌套（链接文本中的代码），反复还原
+        while '\x00' in text:
+            text = _PLACEHOLDER_RE.sub(lambda m: stash[int(m.group(1))], text)
+        return text
+
+    @staticmethod
+    def _emphasis(text):
+        text = _BOLD_RE.sub(lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>", text)
+        text = _ITALIC_RE.sub(lambda m: f"<em>{m.group(1) or m.group(2)}</em>", text)
+        return _STRIKE_RE.sub(r"<del>\1</del>", text)
+
+    # ---- 块级 ----
+
+    def render(self, text):
+        """整篇文档；标题锚点在同一 Renderer 的多次调用之间不重置"""
+        # \x00 用作行内占位符的分隔，原文中的 NUL 替换掉
+        text = text.lstrip('\ufeff').replace('\x00', '\ufffd').replace('\r\n', '\n').replace('\t', '    ')
+        return '\n'.join(self._blocks(text.split('\n'), top=True))
+
+    def _anchor(self, title):
+        slug = slugify(title)
+        n = self._anchors.get(slug, 0)
+        self._anchors[slug] = n + 1
+        return slug if n == 0 else f"{slug}-{n}"
+
+    def _blocks(self, lines, top=False):
+        out = []
+        i = 0
+        n = len(lines)
+        while i < n:
+            line = lines[i]
+            stripped = line.strip()
+            if not stripped:
+                i += 1
+                continue
+
+            m = _FENCE_RE.match(line)
+            if m:
+                fence, lang = m.group(2), m.group(3)
+                body = []
+                i += 1
+                while i < n:
+                    close = _FENCE_RE.match(lines[i])
+                    if close and close.group(2)[0] == fence[0] and len(close.group(2)) >= len(fence) \
+                            and not lines[i].strip().lstrip(fence[0]):
+                        break
+                    body.append(lines[i])
+                    i += 1
+                i += 1
+                cls = f' class="language-{_attr(lang)}"' if lang else ''
+                out.append(f"<pre><code{cls}>{_esc(chr(10).join(body))}</code></pre>")
+                continue
+
+            if stripped.startswith('$$'):
+                rest = stripped[2:]
+                if rest.endswith('$$') and len(rest) >= 2:
+                    tex = rest[:-2]
+                    i += 1
+                else:
+                    body = [rest]
+                    i += 1
+                    while i < n and not lines[i].strip().endswith('$$'):
+                        body.append(lines[i])
+                        i += 1
+                    if i < n:
+                        body.append(lines[i].strip()[:-2])
+                        i += 1
+                    tex = '\n'.join(body)
+                out.append(f'<div class="math">{self.math(tex.strip(), True)}</div>')
+                continue
+
+            m = _HEADING_RE.match(line)
+            if m:
+                level = len(m.group(1))
+                title = (m.group(2) or '').strip()
+                # 引用块中的标题不计入锚点（与 section_index 一致）
+                anchor = f' id="{_attr(self._anchor(title))}"' if top else ''
+                out.append(f"<h{level}{anchor}>{self.inline(title)}</h{level}>")
+                i += 1
+                continue
+
+            if _HR_RE.match(line):
+                out.append("<hr>")
+                i += 1
+                continue
+
+            if _QUOTE_RE.match(line):
+                body = []
+                while i < n and lines[i].strip() and _QUOTE_RE.match(lines[i]):
+                    body.append(_QUOTE_RE.sub('', lines[i], count=1))
+                    i += 1
+                out.append("<blockquote>\n{}\n</blockquote>".format('\n'.join(self._blocks(body))))
+                continue
+
+            if _LIST_RE.match(line) and not (stripped.startswith('*') and _HR_RE.match(line)):
+                i, block = self._list(lines, i)
+                out.append(block)
+                continue
+
+            if '|' in line and i + 1 < n and _TABLE_SEP_RE.match(lines[i + 1]) and '-' in lines[i + 1]:
+                i, block = self._table(lines, i)
+                out.append(block)
+                continue
+
+            para = [stripped]
+            i += 1
+            while i < n and lines[i].strip() and not self._starts_block(lines, i):
+                para.append(lines[i].strip())
+                i += 1
+            out.append(f"<p>{self.inline(chr(10).join(para))}</p>")
+        return out
+
+    @staticmethod
+    def _starts_block(lines, i):
+        line = lines[i]
+        return bool(_FENCE_RE.match(line) or _HEADING_RE.match(line) or _HR_RE.match(line)
+                    or _QUOTE_RE.match(line) or _LIST_RE.match(line) or line.strip().startswith('$$'))
+
+    def _list(self, lines, i):
+        """连续的列表项（含缩进的续行）；缩进更深的列表项作为子列表"""
+        first = _LIST_RE.match(lines[i])
+        indent = len(first.group(1))
+        ordered = first.group(2)[0].isdigit()
+        start = int(first.group(2)[:-1]) if ordered else 1
+        items = []
+        n = len(lines)
+        while i < n:
+            if not self._same_list(lines[i], indent, ordered):
+                break
+            m = _LIST_RE.match(lines[i])
+            body = [m.group(3) or '']
+            i += 1
+            while i < n:
+                line = lines[i]
+                if not line.strip():
+                    # 空行之后仍有缩进内容才算同一项
+                    if i + 1 < n and lines[i + 1].strip() and \
+                            len(lines[i + 1]) - len(lines[i + 1].lstrip()) > indent:
+                        body.append('')
+                        i += 1
+                        continue
+                    break
+                sub = _LIST_RE.match(line)
+                depth = len(line) - len(line.lstrip())
+                if sub and depth <= indent:
+                    break
+                if depth <= indent and self._starts_block(lines, i):
+                    break
+                body.append(line[min(depth, indent + 2):] if depth > indent else line.strip())
+                i += 1
+            items.append(body)
+        tag = "ol" if ordered else "ul"
+        attrs = f' start="{start}"' if ordered and start != 1 else ''
+        parts = []
+        for body in items:
+            if len(body) == 1 or not any(_LIST_RE.match(b) or not b.strip() for b in body[1:]):
+                parts.append(f"<li>{self.inline(chr(10).join(b.strip() for b in body))}</li>")
+            else:
+                inner = self._blocks(body)
+                if inner and inner[0].startswith("<p>") and '' not in body:
+                    inner[0] = inner[0][3:-4]
+                parts.append("<li>{}</li>".format('\n'.join(inner)))
+        while i + 1 < n and not lines[i].strip() and self._same_list(lines[i + 1], indent, ordered):
+            # 空行分隔的后续项并入同一列表
+            i, more = self._list(lines, i + 1)
+            parts.append(more[more.index('>') + 1:more.rindex('<')])
+        return i, f"<{tag}{attrs}>\n" + '\n'.join(parts) + f"\n</{tag}>"
+
+    @staticmethod
+    def _same_list(line, indent, ordered):
+        m = _LIST_RE.match(line)
+        return bool(m) and len(m.group(1)) == indent and m.group(2)[0].isdigit() == ordered
+
+    def _table(self, lines, i):
+        def cells(line):
+            line = line.strip()
+            if line.startswith('|'):
+                line = line[1:]
+            if line.endswith('|') and not line.endswith('\\|'):
+                line = line[:-1]
+            return [c.strip().replace('\\|', '|') for c in re.split(r'(?<!\\)\|', line)]
+
+        header = cells(lines[i])
+        aligns = []
+        for spec in cells(lines[i + 1]):
+            left, right = spec.startswith(':'), spec.endswith(':')
+            aligns.append("center" if left and right else "right" if right else "left" if left else None)
+        i += 2
+        rows = []
+        while i < len(lines) and lines[i].strip() and '|' in lines[i]:
+            rows.append(cells(lines[i]))
+            i += 1
+
+        def row(values, tag):
+            out = []
+            for k, value in enumerate(values):
+                align = aligns[k] if k < len(aligns) and aligns[k] else None
+                style = f' style="text-align:{align}"' if align else ''
+                out.append(f"<{tag}{style}>{self.inline(value)}</{tag}>")
+            return "<tr>" + ''.join(out) + "</tr>"
+
+        body = '\n'.join(row(r, "td") for r in rows)
+        return i, f"<table>\n<thead>{row(header, 'th')}</thead>\n<tbody>\n{body}\n</tbody>\n</table>"
+
+
+def render(text, math=None, link=None):
+    return Renderer(math, link).render(text)
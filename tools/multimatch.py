@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+多模式子串匹配（Aho-Corasick 自动机）。
+
+所有关键词编译进同一个自动机，对文本只扫描一遍即可找出全部（含重叠）命中；
+匹配代价与关键词数量无关，只与文本长度相关。
+"""
+from collections import deque
+
+
+class Automaton:
+    """keywords: {关键词: 优先级}，优先级数值越小越优先"""
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        # 每个状态（含其后缀链）可命中的最小优先级
+        self.best = [None]
+        # 每个状态（含其后缀链）命中的全部优先级
+        self.out = [()]
+        for word, rank in keywords.items():
+            if not word:
+                continue
+            state = 0
+            for ch in word:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.best.append(None)
+                    self.out.append(())
+                state = nxt
+            if self.best[state] is None or rank < self.best[state]:
+                self.best[state] = rank
+            self.out[state] += (rank,)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                inherited = self.best[self.fail[nxt]]
+                if inherited is not None and (self.best[nxt] is None or inherited < self.best[nxt]):
+                    self.best[nxt] = inherited
+                if self.out[self.fail[nxt]]:
+                    self.out[nxt] += self.out[self.fail[nxt]]
+
+    def min_rank(self, text, default=None):
+        """text 中命中的最小优先级；无命中返回 default"""
+        goto, fail, best = self.goto, self.fail, self.best
+        result = None
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            rank = best[state]
+            if rank is not None and (result is None or rank < result):
+                result = rank
+                if result == 0:
+                    break
+        return default if result is None else result
+
+    def iter_matches(self, text):
+        """产出全部命中 (结束位置, 优先级)，含重叠命中；结束位置为命中末字符之后的下标"""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for pos, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for rank in out[state]:
+                    yield pos, rank
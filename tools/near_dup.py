@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+章节级近重复检测：MinHash 签名 + LSH 分桶，找出批量追加造成的雷同章节。
+
+- 章节：每个标题到下一个标题之间的正文（不含标题行本身，避免相同标题抬高相似度）；
+  词数少于 min_tokens 的章节不参与。
+- 切词与检索索引相同（中文二元组、英文单词），连续 shingle 个词为一个 shingle。
+- 签名用一次置换 MinHash（one permutation hashing）：每个 shingle 只哈希一次（crc32），
+  按哈希值分到 perms 个桶中取各桶最小值，空桶向右借用最近的非空桶（densification）。
+  计算量与 shingle 数成正比，而不是 shingle 数 × 置换数。
+- LSH：签名分成 bands 段，任一段完全相同即进入同一个桶；每个桶只与桶内第一个章节比较
+  签名相似度（相同位置取值相等的比例，即 Jaccard 估计），达到阈值才用并查集合并，
+  因此整体耗时随章节数线性增长，不做两两比较。
+
+用法（项目根目录）：
+    python -m tools.near_dup [--threshold 0.8] [--report reports/near_dup.json]
+"""
+import argparse
+import operator
+import os
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from tools import concept_index
+from tools.run_report import write_report
+from tools.search_index import tokenize
+from tools.section_index import build_index
+
+DEFAULT_DIRS = concept_index.DEFAULT_DIRS
+PERMS = 128
+BANDS = 16
+SHINGLE = 3
+MIN_TOKENS = 20
+THRESHOLD = 0.8
+_EMPTY = (1 << 64) - 1
+_MIX = 0x9E3779B97F4A7C15
+
+
+def shingle_hashes(tokens, size=SHINGLE):
+    """连续 size 个词的 32 位哈希（crc32，跨进程稳定）；拼接与哈希都在 map 中完成"""
+    shingles = map(' '.join, zip(*[tokens[i:] for i in range(size)]))
+    return set(map(zlib.crc32, map(str.encode, shingles)))
+
+
+def signature(hashes, perms=PERMS):
+    """一次置换 MinHash 签名（array('Q')，长度 perms）"""
+    # 哈希值按 桶号 = h % perms、桶内取值 = h // perms 拆分；同一桶内两者顺序一致，
+    # 降序排列后 dict 对重复键保留最后一个，即各桶最小值
+    ordered = sorted(hashes, reverse=True)
+    mins = dict(zip(map(operator.mod, ordered, repeat(perms)),
+                    map(operator.floordiv, ordered, repeat(perms))))
+    if not mins or len(mins) == perms:
+        return array('Q', (mins.get(i, _EMPTY) for i in range(perms)))
+    # densification：空桶取右侧（循环）最近的非空桶的值，并按距离区分
+    sig = [0] * perms
+    filled = sorted(mins)
+    for b, nb in zip(filled, filled[1:] + [filled[0] + perms]):
+        sig[b] = mins[b]
+        v = mins[nb % perms]
+        gap = [(v + d * _MIX) & _EMPTY for d in range(nb - b - 1, 0, -1)]
+        split = min(len(gap), perms - b - 1)
+        sig[b + 1:b + 1 + split] = gap[:split]
+        sig[:len(gap) - split] = gap[split:]
+    return array('Q', sig)
+
+
+def similarity(a, b):
+    """签名相同位置取值相等的比例（Jaccard 相似度的估计）"""
+    return sum(map(operator.eq, a, b)) / len(a)
+
+
+def document_sections(root, rel, perms, size, min_tokens):
+    """单个文档各章节的 (锚点, 标题, 起始偏移, 词数, 签名字节)；读取失败返回空列表"""
+    try:
+        with open(os.path.join(root, *rel.split('/')), 'rb') as fh:
+            raw = fh.read()
+    except OSError:
+        return []
+    index = build_index(raw)
+    heads = index.headings
+    result = []
+    for i, (h, anchor) in enumerate(zip(heads, index.heading_anchors())):
+        end = heads[i + 1].start if i + 1 < len(heads) else len(raw)
+        tokens = tokenize(raw[h.body_start:end].decode('utf-8', 'replace'))
+        if len(tokens) < min_tokens:
+            continue
+        sig = signature(shingle_hashes(tokens, size), perms)
+        result.append((anchor, h.title, h.start, len(tokens), sig.tobytes()))
+    return result
+
+
+def _chunk_sections(args):
+    root, rels, perms, size, min_tokens = args
+    return [(rel, document_sections(root, rel, perms, size, min_tokens)) for rel in rels]
+
+
+def collect_sections(root, dirs, perms=PERMS, size=SHINGLE, min_tokens=MIN_TOKENS, workers=None):
+    """产出 (rel, 锚点, 标题, 起始偏移, 词数, 签名)，按文档路径顺序"""
+    rels = [rel for rel, _ in concept_index.iter_documents(root, dirs)]
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(rels) // (workers * 4) or 1)
+    chunks = [(root, rels[i:i + chunk], perms, size, min_tokens) for i in range(0, len(rels), chunk)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = pool.map(_chunk_sections, chunks)
+            for part in parts:
+                for rel, sections in part:
+                    for anchor, title, start, count, sig in sections:
+                        yield rel, anchor, title, start, count, array('Q', sig)
+    else:
+        for args in chunks:
+            for rel, sections in _chunk_sections(args):
+                for anchor, title, start, count, sig in sections:
+                    yield rel, anchor, title, start, count, array('Q', sig)
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def find_clusters(signatures, bands=BANDS, threshold=THRESHOLD):
+    """
+    signatures 为签名列表；返回 [[(章节序号, 与代表章节的相似度), ...], ...]，
+    每组第一个为代表章节（组内序号最小者），只含两个及以上成员的组。
+    """
+    if not signatures:
+        return []
+    perms = len(signatures[0])
+    rows = perms // bands
+    parent = list(range(len(signatures)))
+    for band in range(bands):
+        lo, hi = band * rows, (band + 1) * rows
+        buckets = {}
+        for i, sig in enumerate(signatures):
+            first = buckets.setdefault(sig[lo:hi].tobytes(), i)
+            if first != i:
+                a, b = _find(parent, first), _find(parent, i)
+                if a != b and similarity(signatures[first], sig) >= threshold:
+                    parent[max(a, b)] = min(a, b)
+    groups = OrderedDict()
+    for i in range(len(signatures)):
+        groups.setdefault(_find(parent, i), []).append(i)
+    clusters = []
+    for rep, members in groups.items():
+        if len(members) > 1:
+            clusters.append([(i, similarity(signatures[rep], signatures[i])) for i in members])
+    clusters.sort(key=lambda c: (-len(c), c[0][0]))
+    return clusters
+
+
+def detect(root, dirs, perms=PERMS, bands=BANDS, size=SHINGLE, min_tokens=MIN_TOKENS,
+           threshold=THRESHOLD, workers=None):
+    """返回 (章节数, 簇列表)；簇为 {"size", "files", "heading", "members": [...]}"""
+    sections = []
+    signatures = []
+    for rel, anchor, title, start, count, sig in collect_sections(root, dirs, perms, size, min_tokens, workers):
+        sections.append((rel, anchor, title, start, count))
+        signatures.append(sig)
+    result = []
+    for cluster in find_clusters(signatures, bands, threshold):
+        members = []
+        for i, sim in cluster:
+            rel, anchor, title, start, count = sections[i]
+            members.append(OrderedDict([
+                ("path", rel + (f"#{anchor}" if anchor else "")),
+                ("heading", title),
+                ("offset", start),
+                ("tokens", count),
+                ("similarity", round(sim, 3)),
+            ]))
+        result.append(OrderedDict([
+            ("size", len(members)),
+            ("files", len({sections[i][0] for i, _ in cluster})),
+            ("heading", members[0]["heading"]),
+            ("members", members),
+        ]))
+    return len(sections), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="章节级近重复检测（MinHash + LSH）")
+    parser.add_argument('--root', default=os.getcwd(), help="项目根目录")
+    parser.add_argument('--dirs', nargs='+', default=DEFAULT_DIRS, help="参与检测的顶层目录")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help="判为近重复的 Jaccard 相似度下限")
+    parser.add_argument('--perms', type=int, default=PERMS, help="签名长度")
+    parser.add_argument('--bands', type=int, default=BANDS, help="LSH 分段数（须整除签名长度）")
+    parser.add_argument('--shingle', type=int, default=SHINGLE, help="每个 shingle 的词数")
+    parser.add_argument('--min-tokens', type=int, default=MIN_TOKENS, help="参与检测的章节最少词数")
+    parser.add_argument('--min-size', type=int, default=2, help="只列出成员数不少于该值的簇")
+    parser.add_argument('--top', type=int, default=20, help="控制台列出的簇数")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认 CPU 核数")
+    parser.add_argument('--report', default=None, help="JSON 报告路径")
+    args = parser.parse_args(argv)
+    if args.perms % args.bands:
+        parser.error("--bands 须整除 --perms")
+
+    root = os.path.abspath(args.root)
+    start = time.perf_counter()
+    total, clusters = detect(root, args.dirs, args.perms, args.bands, args.shingle,
+                             args.min_tokens, args.threshold, args.workers)
+    clusters = [c for c in clusters if c["size"] >= args.min_size]
+    elapsed = time.perf_counter() - start
+    duplicated = sum(c["size"] - 1 for c in clusters)
+
+    for n, cluster in enumerate(clusters[:args.top], 1):
+        print(f"[{n}] {cluster['size']} 个章节，{cluster['files']} 个文件：{cluster['heading']}")
+        shown = cluster["members"][:5]
+        for m in shown:
+            print(f"    {m['similarity']:.2f}  {m['path']}")
+        if cluster["size"] > len(shown):
+            print(f"    … 另有 {cluster['size'] - len(shown)} 个")
+    print(f"章节: {total}，近重复簇: {len(clusters)}，可去重章节: {duplicated}，耗时 {elapsed:.2f}s")
+
+    if args.report:
+        write_report(args.report, OrderedDict([
+            ("root", root),
+            ("dirs", args.dirs),
+            ("params", OrderedDict([("threshold", args.threshold), ("perms", args.perms),
+                                    ("bands", args.bands), ("shingle", args.shingle),
+                                    ("min_tokens", args.min_tokens)])),
+            ("sections", total),
+            ("duplicated", duplicated),
+            ("seconds", round(elapsed, 3)),
+            ("clusters", clusters),
+        ]))
+        print(f"报告: {args.report}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+运行报告：分阶段耗时、读写字节数、单文件耗时分位数（p50/p95/max）与最慢文件，
+以及可从命令行打开的 cProfile / tracemalloc。
+
+阶段数据是普通 dict，可以放进 stats 随批次结果在进程间传递并合并：
+    {"阶段名": {"seconds": 累计秒数, "bytes": 字节数, "files": 文件数, "max": 最大单文件秒数,
+               "hist": [各对数桶的文件数, ...]}}
+单文件耗时只记进对数桶直方图（相邻桶边界相差 2^(1/8) 倍），大小与文件数无关，流式处理
+任意多文件、多进程或多分片合并时内存与输出都不增长；分位数由直方图求出，相对误差约 4%，
+max 为精确值。多进程运行时各阶段的 seconds 是所有工作进程的累计值，整体耗时另见报告中的 wall_seconds。
+"""
+import cProfile
+import heapq
+import io
+import json
+import math
+import os
+import pstats
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from tools.atomic_write import write_atomic
+
+REPORT_VERSION = 1
+SLOWEST_N = 20
+
+# 直方图：第 0 桶为 ≤ 1 微秒，第 k 桶为 (HIST_BASE·HIST_RATIO^(k-1), HIST_BASE·HIST_RATIO^k]，
+# 末桶收容更慢的一切（约 1.7 小时以上）
+HIST_BASE = 1e-6
+HIST_RATIO = 2 ** (1 / 8)
+HIST_BUCKETS = 256
+
+
+def _new_phase():
+    return {"seconds": 0.0, "bytes": 0, "files": 0, "max": 0.0, "hist": []}
+
+
+def _bucket(seconds):
+    if seconds <= HIST_BASE:
+        return 0
+    return min(HIST_BUCKETS - 1, math.ceil(math.log(seconds / HIST_BASE, HIST_RATIO)))
+
+
+def add_sample(phases, name, seconds, nbytes=0, per_file=True):
+    """记录一次阶段耗时；per_file 为假时只计入总耗时（如整批的目录 fsync）"""
+    phase = phases.get(name)
+    if phase is None:
+        phase = phases[name] = _new_phase()
+    phase["seconds"] += seconds
+    phase["bytes"] += nbytes
+    if per_file:
+        phase["files"] += 1
+        if seconds > phase["max"]:
+            phase["max"] = seconds
+        hist = phase["hist"]
+        k = _bucket(seconds)
+        if k >= len(hist):
+            hist.extend([0] * (k + 1 - len(hist)))
+        hist[k] += 1
+
+
+def merge_phases(phases, part):
+    for name, src in part.items():
+        dst = phases.setdefault(name, _new_phase())
+        dst["seconds"] += src["seconds"]
+        dst["bytes"] += src["bytes"]
+        dst["files"] += src["files"]
+        dst["max"] = max(dst["max"], src["max"])
+        hist = dst["hist"]
+        if len(src["hist"]) > len(hist):
+            hist.extend([0] * (len(src["hist"]) - len(hist)))
+        for k, count in enumerate(src["hist"]):
+            hist[k] += count
+
+
+def push_slowest(heap, seconds, path, n=SLOWEST_N):
+    """逐个记录单文件耗时；heap 为最小堆，只保留最慢的 n 个"""
+    if len(heap) < n:
+        heapq.heappush(heap, (seconds, path))
+    elif n and seconds > heap[0][0]:
+        heapq.heapreplace(heap, (seconds, path))
+
+
+def keep_slowest(slowest, items, n=SLOWEST_N):
+    """合并 (秒数, 路径) 列表，只保留最慢的 n 个"""
+    return heapq.nlargest(n, list(slowest) + list(items))
+
+
+def percentile(phase, q):
+    """
+    直方图的最近秩分位数：取所在桶的几何中点，不超过精确的 max。
+    最大秩与末尾的溢出桶（超出直方图范围的耗时都计入其中）直接返回 max。
+    """
+    if not phase["files"]:
+        return None
+    rank = max(1, math.ceil(q / 100 * phase["files"]))
+    if rank >= phase["files"]:
+        return phase["max"]
+    seen = 0
+    for k, count in enumerate(phase["hist"]):
+        seen += count
+        if seen >= rank:
+            break
+    if k == HIST_BUCKETS - 1:
+        return phase["max"]
+    value = HIST_BASE if k == 0 else HIST_BASE * HIST_RATIO ** (k - 0.5)
+    return min(value, phase["max"])
+
+
+def summarize_phases(phases):
+    summary = OrderedDict()
+    for name, phase in phases.items():
+        summary[name] = OrderedDict([
+            ("seconds", round(phase["seconds"], 6)),
+            ("files", phase["files"]),
+            ("bytes", phase["bytes"]),
+            ("p50_ms", _ms(percentile(phase, 50))),
+            ("p95_ms", _ms(percentile(phase, 95))),
+            ("max_ms", _ms(phase["max"] if phase["files"] else None)),
+        ])
+    return summary
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def write_report(path, report):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    write_atomic(path, json.dumps(report, ensure_ascii=False, indent=2).encode('utf-8'))
+
+
+@contextmanager
+def profiling(profile_path=None, tracemalloc_top=0, top=30):
+    """
+    按需开启 cProfile 与 tracemalloc；退出时把结果填入 yield 出的 dict
+    （profile_path：.prof 文件与累计耗时前 top 项；tracemalloc_top：内存峰值与分配最多的代码行）。
+    只覆盖当前进程，多进程运行时工作进程不在其中。
+    """
+    info = {}
+    profiler = cProfile.Profile() if profile_path else None
+    if tracemalloc_top:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        info["wall_seconds"] = round(time.perf_counter() - start, 6)
+        if profiler:
+            profiler.disable()
+        # 先取内存快照，避免把下面整理剖析结果的分配算进去
+        if tracemalloc_top:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            info["tracemalloc"] = {
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top": [str(stat) for stat in snapshot.statistics("lineno")[:tracemalloc_top]],
+            }
+        if profiler:
+            profiler.dump_stats(profile_path)
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+            info["profile"] = {"path": profile_path, "top": out.getvalue().splitlines()}
@@ -0,0 +1,645 @@
+# -*- coding: utf-8 -*-
+"""
+本地全文检索：中文按字二元组（bigram）、英文按单词切分，BM25 打分，命中定位到标题章节。
+
+索引目录（默认 .search_index/）中的文件：
+    docs.json                       文档目录：size、mtime、内容哈希与正排记录在 forward.bin 中的位置
+    forward.bin                     各文档的正排记录（章节 → 词频），zlib 压缩的 JSON，供增量重建
+    terms.<代>.bin / term_offsets.<代>.bin     词项（按 UTF-8 字节序排序，查询时二分查找）
+    post_offsets.<代>.bin / postings.<代>.bin  倒排表：章节编号差值与词频的 varint 序列，较长的再经 zlib 压缩
+    df.<代>.bin                     各词项的章节频率
+    sec_*.<代>.bin                  章节所属文档、长度、字节区间、锚点与标题
+    files.<代>.bin / file_offsets.<代>.bin     文档相对路径
+    meta.json                       章节数、平均长度、BM25 参数、字节序，以及当前的代号 generation
+    delta/                          增量段（可选）：格式相同，只含之后变化的文档，
+                                    meta.json 的 masked 列出主索引中应忽略的文档
+
+段文件名带代号（写入时的纳秒时间戳，不会重复使用）：每次重写都写一组新文件，最后原子
+替换 meta.json 切换到新一代，并删除再上一代的文件；删除增量段时先删 meta.json。
+并发打开的读者读到哪份 meta.json 就映射哪一代，不会把新 meta 与旧数组混在一起；
+极少数情况下所读的那一代恰好被删除，读者重新读取 meta.json 再打开。
+
+再次构建时 size/mtime 未变的文档直接复用正排记录；变化的文档先比较内容哈希，
+哈希相同也不重新切词。有文档变化时由全部正排记录重新生成倒排表（不再读取原文）。
+查询只 mmap 映射索引文件，按词项读取对应的倒排表，不整体载入。
+常驻进程（tools.watch）保存单个文件后只重写增量段，查询时主索引与增量段合并打分；
+下一次 build 把变化并入主索引并删除增量段。
+
+用法（项目根目录）：
+    python -m tools.search_index build
+    python -m tools.search_index query 语义模型 形式化验证 -k 10
+"""
+import argparse
+import json
+import math
+import mmap
+import operator
+import os
+import re
+import shutil
+import sys
+import time
+import unicodedata
+import zlib
+from array import array
+from collections import Counter, OrderedDict
+from itertools import chain
+
+from tools import concept_index
+from tools.atomic_write import AtomicBatch
+from tools.manifest import content_hash
+from tools.section_index import build_index
+
+DEFAULT_INDEX = ".search_index"
+DELTA_DIR = "delta"
+DEFAULT_DIRS = concept_index.DEFAULT_DIRS
+INDEX_VERSION = 2
+K1 = 1.2
+B = 0.75
+# 章节标题中的词额外计入的次数（标题命中排在正文命中之前）
+TITLE_BOOST = 2
+# 倒排表超过该字节数时尝试 zlib 压缩
+COMPRESS_MIN = 64
+MAX_WORD = 40
+
+_CJK = r'\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_TOKEN_RE = re.compile(rf'[a-z0-9]+|[{_CJK}]+')
+_LINK_TARGET_RE = re.compile(r'\]\([^)\n]*\)')
+
+ARRAYS = OrderedDict([
+    ("term_offsets", "q"), ("post_offsets", "q"), ("df", "i"),
+    ("sec_file", "i"), ("sec_len", "i"), ("sec_start", "q"), ("sec_end", "q"),
+    ("anchor_offsets", "q"), ("title_offsets", "q"), ("file_offsets", "q"),
+])
+BLOBS = ("terms", "postings", "anchors", "titles", "files")
+
+
+def _is_cjk(token):
+    return token[0] >= '\u3400'
+
+
+def tokenize(text):
+    """NFKC 归一化并小写；连续汉字切成相邻二元组（单个汉字保留本身），英文与数字按词"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    tokens = []
+    for run in _TOKEN_RE.findall(text):
+        if not _is_cjk(run):
+            if len(run) <= MAX_WORD:
+                tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def scan_document(raw):
+    """按标题切分文档，返回正排记录 {"title", "sections": [[锚点, 标题, 起始, 结束, 长度, {词: 频}]]}"""
+    index = build_index(raw)
+    anchors = index.heading_anchors()
+    bounds = [(0, "", "")] + [(h.start, a, h.title) for h, a in zip(index.headings, anchors)]
+    sections = []
+    for i, (start, anchor, heading) in enumerate(bounds):
+        end = bounds[i + 1][0] if i + 1 < len(bounds) else len(raw)
+        text = _LINK_TARGET_RE.sub(']', raw[start:end].decode('utf-8', 'replace'))
+        tokens = tokenize(text)
+        if not tokens:
+            continue
+        tokens.extend(tokenize(heading) * (TITLE_BOOST - 1))
+        sections.append([anchor, heading, start, end, len(tokens), dict(Counter(tokens))])
+    title = next((h.title for h in index.headings if h.level == 1), "")
+    return {"title": title, "sections": sections}
+
+
+def _paths(index_dir):
+    return os.path.join(index_dir, "docs.json"), os.path.join(index_dir, "forward.bin")
+
+
+def load_catalog(index_dir):
+    """返回 (文档目录, forward.bin 内容)；不存在、损坏或版本不符时为空"""
+    catalog_path, forward_path = _paths(index_dir)
+    try:
+        with open(catalog_path, 'r', encoding='utf-8') as fh:
+            catalog = json.load(fh)
+        if catalog.get("version") == INDEX_VERSION:
+            with open(forward_path, 'rb') as fh:
+                return catalog, fh.read()
+    except (OSError, ValueError):
+        pass
+    return {"version": INDEX_VERSION, "docs": {}}, b''
+
+
+def update_forward(root, dirs, catalog, forward):
+    """
+    增量更新正排记录，返回 (新文档目录, 新 forward.bin, 统计)。
+    统计含 scanned（重新切词）、rehashed（mtime 变化但内容相同）、reused、removed。
+    """
+    old_docs = catalog["docs"]
+    docs = {}
+    parts = []
+    offset = 0
+    stats = {"scanned": 0, "rehashed": 0, "reused": 0, "removed": 0}
+    for rel, st in concept_index.iter_documents(root, dirs):
+        old = old_docs.get(rel)
+        if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+            blob = forward[old["offset"]:old["offset"] + old["length"]]
+            digest = old["hash"]
+            stats["reused"] += 1
+        else:
+            try:
+                with open(st.path, 'rb') as fh:
+                    raw = fh.read()
+            except OSError:
+                continue
+            digest = content_hash(raw)
+            if old and old["hash"] == digest:
+                blob = forward[old["offset"]:old["offset"] + old["length"]]
+                stats["rehashed"] += 1
+            else:
+                entry = scan_document(raw)
+                blob = zlib.compress(json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+                stats["scanned"] += 1
+        docs[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest,
+                     "offset": offset, "length": len(blob)}
+        parts.append(blob)
+        offset += len(blob)
+    stats["removed"] = sum(1 for rel in old_docs if rel not in docs)
+    return {"version": INDEX_VERSION, "docs": docs}, b''.join(parts), stats
+
+
+def _blob(strings):
+    offsets = array('q', [0])
+    parts = []
+    for s in strings:
+        data = s.encode('utf-8')
+        parts.append(data)
+        offsets.append(offsets[-1] + len(data))
+    return b''.join(parts), offsets
+
+
+def encode_postings(pairs):
+    """[章节, 词频, 章节, 词频, ...]（章节递增）→ 标志字节 + varint 序列（必要时 zlib 压缩）"""
+    secs = pairs[0::2]
+    values = array('i', pairs)
+    values[0::2] = array('i', map(operator.sub, secs, chain((0,), secs)))
+    if len(values) > 8 and max(values) < 0x80:
+        # 常见情形：差值与词频都是单字节 varint，整体转换即可
+        out = bytes(values.tolist())
+    else:
+        out = bytearray()
+        for n in values:
+            while n >= 0x80:
+                out.append(n & 0x7f | 0x80)
+                n >>= 7
+            out.append(n)
+        out = bytes(out)
+    if len(out) > COMPRESS_MIN:
+        packed = zlib.compress(out)
+        if len(packed) < len(out):
+            return b'\x01' + packed
+    return b'\x00' + out
+
+
+def decode_postings(data):
+    """encode_postings 的逆过程，返回 [(章节, 词频)]"""
+    data = zlib.decompress(data[1:]) if data[0] == 1 else data[1:]
+    result = []
+    n = shift = 0
+    sec = 0
+    want_sec = True
+    for byte in data:
+        n |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        if want_sec:
+            sec += n
+        else:
+            result.append((sec, n))
+        want_sec = not want_sec
+        n = shift = 0
+    return result
+
+
+def build_inverted(catalog, forward):
+    """由全部正排记录生成倒排数组，返回 ({文件名: 数据}, meta)"""
+    postings = {}
+    files = sorted(catalog["docs"])
+    sec_file, sec_len = array('i'), array('i')
+    sec_start, sec_end = array('q'), array('q')
+    anchors, titles = [], []
+    for file_no, rel in enumerate(files):
+        doc = catalog["docs"][rel]
+        entry = json.loads(zlib.decompress(forward[doc["offset"]:doc["offset"] + doc["length"]]))
+        for anchor, heading, start, end, length, terms in entry["sections"]:
+            sec = len(sec_len)
+            sec_file.append(file_no)
+            sec_len.append(length)
+            sec_start.append(start)
+            sec_end.append(end)
+            anchors.append(anchor)
+            titles.append(heading)
+            for term, tf in terms.items():
+                pairs = postings.get(term)
+                if pairs is None:
+                    pairs = postings[term] = array('i')
+                pairs.append(sec)
+                pairs.append(tf)
+
+    terms = sorted(postings)
+    data = {}
+    data["terms"], data["term_offsets"] = _blob(terms)
+    post_offsets = array('q', [0])
+    df = array('i')
+    parts = []
+    for term in terms:
+        pairs = postings[term]
+        encoded = encode_postings(pairs)
+        parts.append(encoded)
+        post_offsets.append(post_offsets[-1] + len(encoded))
+        df.append(len(pairs) // 2)
+    data["postings"] = b''.join(parts)
+    data["post_offsets"] = post_offsets
+    data["df"] = df
+    data["sec_file"], data["sec_len"] = sec_file, sec_len
+    data["sec_start"], data["sec_end"] = sec_start, sec_end
+    data["anchors"], data["anchor_offsets"] = _blob(anchors)
+    data["titles"], data["title_offsets"] = _blob(titles)
+    data["files"], data["file_offsets"] = _blob(files)
+    meta = {
+        "version": INDEX_VERSION,
+        "byteorder": sys.byteorder,
+        "files": len(files),
+        "sections": len(sec_len),
+        "terms": len(terms),
+        "avgdl": sum(sec_len) / len(sec_len) if sec_len else 0.0,
+        "k1": K1,
+        "b": B,
+        "builtAt": time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    return data, meta
+
+
+def update_index(root, dirs, index_dir, full=False):
+    """增量更新索引，返回 (统计, meta)；没有文档变化时 meta 为 None，只刷新文档目录"""
+    catalog, forward = ({"version": INDEX_VERSION, "docs": {}}, b'') if full else load_catalog(index_dir)
+    catalog, forward, stats = update_forward(root, dirs, catalog, forward)
+    catalog_path, forward_path = _paths(index_dir)
+    os.makedirs(index_dir, exist_ok=True)
+    delta_dir = os.path.join(index_dir, DELTA_DIR)
+    changed = stats["scanned"] or stats["removed"] or not os.path.exists(os.path.join(index_dir, "meta.json")) \
+        or os.path.exists(delta_dir)
+    meta = None
+    with AtomicBatch() as batch:
+        if changed:
+            data, meta = build_inverted(catalog, forward)
+            _write_segment(batch, index_dir, data, meta)
+            batch.write(forward_path, forward)
+        if changed or stats["rehashed"]:
+            batch.write(catalog_path, json.dumps(catalog, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    # 增量段中的变化已并入主索引
+    _remove_segment(delta_dir)
+    return stats, meta
+
+
+_SEGMENT_FILE_RE = re.compile(r'^(\w+?)(?:\.(\d+))?\.bin$')
+
+
+def _segment_file(seg_dir, name, generation):
+    return os.path.join(seg_dir, f"{name}.{generation}.bin")
+
+
+def _current_generation(seg_dir):
+    try:
+        with open(os.path.join(seg_dir, "meta.json"), 'r', encoding='utf-8') as fh:
+            return json.load(fh).get("generation", 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _remove_segment(seg_dir):
+    """先删 meta.json，读者随即不再打开这个段，再删其余文件"""
+    try:
+        os.remove(os.path.join(seg_dir, "meta.json"))
+    except FileNotFoundError:
+        pass
+    shutil.rmtree(seg_dir, ignore_errors=True)
+
+
+def _write_segment(batch, seg_dir, data, meta):
+    """写出新一代段文件；当前一代保留给正在打开的读者，更早的删除"""
+    os.makedirs(seg_dir, exist_ok=True)
+    current = _current_generation(seg_dir)
+    for name in os.listdir(seg_dir):
+        m = _SEGMENT_FILE_RE.match(name)
+        if m and m.group(1) in data and m.group(2) != str(current):
+            os.remove(os.path.join(seg_dir, name))
+    meta["generation"] = max(time.time_ns(), current + 1)
+    for name, value in data.items():
+        payload = value if isinstance(value, bytes) else value.tobytes()
+        batch.write(_segment_file(seg_dir, name, meta["generation"]), payload)
+    # meta.json 最后写入，打开索引时以它为准
+    batch.write(os.path.join(seg_dir, "meta.json"), json.dumps(meta, ensure_ascii=False, indent=2).encode('utf-8'))
+
+
+def write_delta(index_dir, entries, masked):
+    """
+    只为变化的文档写增量段，不重建主索引：entries 为 {rel: scan_document 的结果}，
+    masked 为主索引中应忽略的文档（变化与删除的全部文档）。二者都为空时删除增量段。
+    """
+    delta_dir = os.path.join(index_dir, DELTA_DIR)
+    if not entries and not masked:
+        _remove_segment(delta_dir)
+        return None
+    docs = {}
+    parts = []
+    offset = 0
+    for rel in sorted(entries):
+        blob = zlib.compress(json.dumps(entries[rel], ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 1)
+        docs[rel] = {"offset": offset, "length": len(blob)}
+        parts.append(blob)
+        offset += len(blob)
+    data, meta = build_inverted({"docs": docs}, b''.join(parts))
+    meta["masked"] = sorted(masked)
+    with AtomicBatch() as batch:
+        _write_segment(batch, delta_dir, data, meta)
+    return meta
+
+
+class SearchIndex:
+    """只读索引：各数组通过 mmap 映射，查询时只读取涉及的词项"""
+
+    def __init__(self, path, delta=True):
+        self._maps = []
+        self._views = {}
+        self.delta = None
+        # 读到 meta.json 后那一代文件被并发的写入删除时，重新读取 meta.json
+        for attempt in range(3):
+            try:
+                self._open(path, delta)
+                return
+            except FileNotFoundError:
+                self.close()
+                if attempt == 2:
+                    raise
+
+    def _open(self, path, delta):
+        with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as fh:
+            self.meta = json.load(fh)
+        if self.meta.get("version") != INDEX_VERSION or self.meta.get("byteorder") != sys.byteorder:
+            raise ValueError(f"索引版本或字节序不匹配: {path}")
+        for name in BLOBS:
+            self._views[name] = self._map(path, name, 'B')
+        for name, code in ARRAYS.items():
+            self._views[name] = self._map(path, name, code)
+        # 增量段：主索引中被替换或删除的文档不参与打分，章节编号接在主索引之后
+        self._masked = set()
+        self._sections = self.meta["sections"]
+        total = self.meta["avgdl"] * self._sections
+        delta_dir = os.path.join(path, DELTA_DIR)
+        if delta and os.path.exists(os.path.join(delta_dir, "meta.json")):
+            self.delta = SearchIndex(delta_dir, delta=False)
+            masked = set(self.delta.meta.get("masked", ()))
+            self._masked = {i for i in range(self.meta["files"])
+                            if self._string("files", "file_offsets", i) in masked}
+            if self._masked:
+                sec_len = self._views["sec_len"]
+                for sec, file_no in enumerate(self._views["sec_file"]):
+                    if file_no in self._masked:
+                        self._sections -= 1
+                        total -= sec_len[sec]
+            self._sections += self.delta.meta["sections"]
+            total += self.delta.meta["avgdl"] * self.delta.meta["sections"]
+        self._avgdl = total / self._sections if self._sections else 0.0
+
+    def _map(self, path, name, code):
+        with open(_segment_file(path, name, self.meta["generation"]), 'rb') as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return memoryview(b'').cast(code)
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mm)
+        return memoryview(mm).cast(code)
+
+    def close(self):
+        if self.delta is not None:
+            self.delta.close()
+            self.delta = None
+        for view in self._views.values():
+            view.release()
+        for mm in self._maps:
+            mm.close()
+        self._views, self._maps = {}, []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _string(self, blob, offsets, i):
+        off = self._views[offsets]
+        return bytes(self._views[blob][off[i]:off[i + 1]]).decode('utf-8')
+
+    def _term_bytes(self, i):
+        off = self._views["term_offsets"]
+        return bytes(self._views["terms"][off[i]:off[i + 1]])
+
+    def _bisect(self, key):
+        """第一个不小于 key（UTF-8 字节）的词项编号"""
+        lo, hi = 0, self.meta["terms"]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term_bytes(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find_term(self, term):
+        key = term.encode('utf-8')
+        i = self._bisect(key)
+        if i < self.meta["terms"] and self._term_bytes(i) == key:
+            return i
+        return None
+
+    def postings(self, i):
+        off = self._views["post_offsets"]
+        return decode_postings(bytes(self._views["postings"][off[i]:off[i + 1]]))
+
+    def term_postings(self, term):
+        """
+        词项的 [(章节, 词频)]。单个汉字只在孤立出现时才是独立词项，
+        因此合并它本身与以它开头的全部二元组（同一前缀区间），使单字查询同样可用。
+        """
+        if len(term) != 1 or not _is_cjk(term):
+            i = self.find_term(term)
+            return self.postings(i) if i is not None else []
+        key = term.encode('utf-8')
+        merged = Counter()
+        j = self._bisect(key)
+        while j < self.meta["terms"] and self._term_bytes(j).startswith(key):
+            for sec, tf in self.postings(j):
+                merged[sec] += tf
+            j += 1
+        return sorted(merged.items())
+
+    def _hits(self, term):
+        """主索引（去掉被屏蔽的文档）与增量段合并后的 [(章节, 词频)]"""
+        hits = self.term_postings(term)
+        if self._masked:
+            sec_file, masked = self._views["sec_file"], self._masked
+            hits = [h for h in hits if sec_file[h[0]] not in masked]
+        if self.delta is not None:
+            base = self.meta["sections"]
+            hits.extend((base + sec, tf) for sec, tf in self.delta.term_postings(term))
+        return hits
+
+    def _sec_len(self, sec):
+        base = self.meta["sections"]
+        return self._views["sec_len"][sec] if sec < base else self.delta._views["sec_len"][sec - base]
+
+    def _file_key(self, sec):
+        """用于 per_file 计数的文档键：主索引为文件编号，增量段为负数"""
+        base = self.meta["sections"]
+        return self._views["sec_file"][sec] if sec < base else -1 - self.delta._views["sec_file"][sec - base]
+
+    def section(self, sec):
+        """(文档路径, 锚点, 标题, 起始偏移, 结束偏移)"""
+        if sec >= self.meta["sections"]:
+            return self.delta.section(sec - self.meta["sections"])
+        v = self._views
+        return (self._string("files", "file_offsets", v["sec_file"][sec]),
+                self._string("anchors", "anchor_offsets", sec),
+                self._string("titles", "title_offsets", sec),
+                v["sec_start"][sec], v["sec_end"][sec])
+
+    def search(self, query, limit=10, per_file=3):
+        """BM25 排序的章节命中 [(得分, 章节编号)]；per_file 为每个文档最多保留的章节数（0 不限）"""
+        n = self._sections
+        avgdl = self._avgdl or 1.0
+        k1, b = self.meta["k1"], self.meta["b"]
+        if self.delta is None:
+            sec_len = self._views["sec_len"]
+            hits_of = self.term_postings
+        else:
+            sec_len = _Lookup(self._sec_len)
+            hits_of = self._hits
+        scores = {}
+        for term, qtf in Counter(tokenize(query)).items():
+            hits = hits_of(term)
+            if not hits:
+                continue
+            df = len(hits)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for sec, tf in hits:
+                norm = k1 * (1 - b + b * sec_len[sec] / avgdl)
+                scores[sec] = scores.get(sec, 0.0) + qtf * idf * tf * (k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        results = []
+        taken = Counter()
+        sec_file = self._views["sec_file"] if self.delta is None else _Lookup(self._file_key)
+        for sec, score in ranked:
+            if per_file and taken[sec_file[sec]] >= per_file:
+                continue
+            taken[sec_file[sec]] += 1
+            results.append((score, sec))
+            if len(results) >= limit:
+                break
+        return results
+
+
+class _Lookup:
+    """把函数包装成可下标访问的对象，与数组视图同样使用"""
+
+    def __init__(self, func):
+        self.func = func
+
+    def __getitem__(self, i):
+        return self.func(i)
+
+
+def snippet(root, rel, start, end, query, width=60):
+    """章节中第一处命中查询词的行（截取到 width 个字符）；文件已不可读时返回空串"""
+    try:
+        with open(os.path.join(root, *rel.split('/')), 'rb') as fh:
+            fh.seek(start)
+            text = fh.read(end - start).decode('utf-8', 'replace')
+    except OSError:
+        return ""
+    terms = set(tokenize(query))
+    for line in text.splitlines()[1:] or text.splitlines():
+        lowered = unicodedata.normalize('NFKC', line).lower()
+        pos = min((lowered.find(t) for t in terms if t in lowered), default=-1)
+        if pos >= 0:
+            begin = max(0, pos - width // 3)
+            return line[begin:begin + width].strip()
+    return ""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地全文检索（中文二元组 + 英文单词，BM25）")
+    parser.add_argument('--root', default=os.getcwd(), help="项目根目录")
+    parser.add_argument('--index', default=DEFAULT_INDEX, help="索引目录（相对路径以根目录为基准）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser('build', help="增量构建索引")
+    build.add_argument('--dirs', nargs='+', default=DEFAULT_DIRS, help="参与索引的顶层目录")
+    build.add_argument('--full', action='store_true', help="忽略已有索引，全部重新切词")
+
+    query = sub.add_parser('query', help="查询")
+    query.add_argument('words', nargs='+', help="查询词（多个词按空格连接）")
+    query.add_argument('-k', '--limit', type=int, default=10, help="返回的章节数")
+    query.add_argument('--per-file', type=int, default=3, help="每个文档最多返回的章节数，0 不限")
+    query.add_argument('--no-snippet', action='store_true', help="不读取原文摘录")
+    query.add_argument('--json', action='store_true', help="以 JSON 输出")
+    args = parser.parse_args(argv)
+
+    root = os.path.abspath(args.root)
+    index_dir = args.index if os.path.isabs(args.index) else os.path.join(root, args.index)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        stats, meta = update_index(root, args.dirs, index_dir, args.full)
+        print(f"重新切词: {stats['scanned']}，内容未变: {stats['rehashed']}，"
+              f"复用: {stats['reused']}，删除: {stats['removed']}")
+        if meta is None:
+            print("倒排表已是最新")
+        else:
+            print(f"文档: {meta['files']}，章节: {meta['sections']}，词项: {meta['terms']}")
+        print(f"耗时 {time.perf_counter() - start:.2f}s，索引目录: {index_dir}")
+        return 0
+
+    text = ' '.join(args.words)
+    start = time.perf_counter()
+    try:
+        index = SearchIndex(index_dir)
+    except (OSError, ValueError) as e:
+        print(f"无法打开索引（先运行 build）: {e}")
+        return 1
+    with index:
+        hits = [(score, index.section(sec)) for score, sec in index.search(text, args.limit, args.per_file)]
+        elapsed = (time.perf_counter() - start) * 1000
+        results = []
+        for score, (rel, anchor, heading, sec_start, sec_end) in hits:
+            result = OrderedDict([("score", round(score, 4)),
+                                  ("path", rel + (f"#{anchor}" if anchor else "")),
+                                  ("heading", heading)])
+            if not args.no_snippet:
+                result["snippet"] = snippet(root, rel, sec_start, sec_end, text)
+            results.append(result)
+    if args.json:
+        print(json.dumps({"query": text, "ms": round(elapsed, 3), "results": results},
+                         ensure_ascii=False, indent=2))
+        return 0
+    for rank, r in enumerate(results, 1):
+        print(f"{rank:3d}. {r['score']:7.3f}  {r['path']}")
+        if r['heading']:
+            print(f"      {r['heading']}")
+        if r.get('snippet'):
+            print(f"      … {r['snippet']}")
+    print(f"{len(results)} 条结果，检索耗时 {elapsed:.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Markdown 章节索引：一次扫描解析文档的标题与引用块，记录字节偏移。
+
+代码块（``` / ~~~）内的内容不参与索引，因此正文或代码示例中出现的
+“批判性总结”等字样不会被误判为已有章节。索引同时给出每个章节的
+字节区间，便于后续原地替换某一章节而无需重新读取文件。
+"""
+import re
+from collections import namedtuple
+
+BOM = b'\xef\xbb\xbf'
+
+# level: 标题级别；start: 标题行起始；body_start: 标题行之后；end: 章节结束（下一个同级或更高级标题）
+Heading = namedtuple('Heading', 'level title start body_start end')
+# lines: 去掉行尾换行后的各行（已解码）
+Blockquote = namedtuple('Blockquote', 'start end lines')
+
+_HEADING_RE = re.compile(rb'^ {0,3}(#{1,6})(?:[ \t]+(.*?))?[ \t]*$')
+_FENCE_RE = re.compile(rb'^ {0,3}(`{3,}|~{3,})')
+_FENCE_TEXT_RE = re.compile(_FENCE_RE.pattern.decode('ascii'))
+_CLOSING_HASHES_RE = re.compile(r'[ \t]+#+$')
+
+# 权威引用：引用块中 “**学者** ... 年份” 形式的行
+AUTH_QUOTE_RE = re.compile(r'^\s*>\s*\*\*[^*]+\*\*.*\d{4}')
+
+_INLINE_LINK_RE = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+_INLINE_MARK_RE = re.compile(r'[*`~]|<[^>]+>')
+_SLUG_DROP_RE = re.compile(r'[^\w\- ]')
+
+
+class SectionIndex:
+    """文档的标题与引用块索引，所有偏移均为原始字节偏移"""
+
+    def __init__(self, headings, blockquotes, size):
+        self.headings = headings
+        self.blockquotes = blockquotes
+        self.size = size
+        self._by_title = {}
+        for h in headings:
+            self._by_title.setdefault(h.title, []).append(h)
+
+    def sections(self, title, level=None):
+        """标题完全等于 title 的章节（可限定级别）"""
+        found = self._by_title.get(title, [])
+        if level is not None:
+            found = [h for h in found if h.level == level]
+        return found
+
+    def has_section(self, title, level=None):
+        return bool(self.sections(title, level))
+
+    def has_heading(self, keyword):
+        """任一标题文本包含 keyword"""
+        return any(keyword in h.title for h in self.headings)
+
+    def has_quote(self, pattern):
+        """任一引用块行匹配 pattern（已编译正则）"""
+        return any(pattern.search(line) for q in self.blockquotes for line in q.lines)
+
+    def quote_contains(self, keyword):
+        return any(keyword in line for q in self.blockquotes for line in q.lines)
+
+    def heading_anchors(self):
+        """与 headings 一一对应的 GitHub 风格锚点（重复标题追加 -1、-2 …）"""
+        seen = {}
+        result = []
+        for h in self.headings:
+            slug = slugify(h.title)
+            n = seen.get(slug, 0)
+            seen[slug] = n + 1
+            result.append(slug if n == 0 else f"{slug}-{n}")
+        return result
+
+    def anchors(self):
+        return set(self.heading_anchors())
+
+
+def slugify(title):
+    """GitHub 风格的标题锚点：去掉链接与强调标记、标点，小写，空格转连字符"""
+    text = _INLINE_LINK_RE.sub(r'\1', title)
+    text = _INLINE_MARK_RE.sub('', text)
+    return _SLUG_DROP_RE.sub('', text.strip().lower()).replace(' ', '-')
+
+
+def parse_heading(line):
+    """ATX 标题行（bytes，不含换行）→ (级别, 标题文字)，不是标题时为 None"""
+    m = _HEADING_RE.match(line)
+    if not m:
+        return None
+    return len(m.group(1)), _CLOSING_HASHES_RE.sub('', (m.group(2) or b'').decode('utf-8', 'replace')).strip()
+
+
+def fence_open(line):
+    """围栏行（``` / ~~~，至多缩进 3 格）的围栏标记，否则为 None；line 可为 bytes 或 str"""
+    m = (_FENCE_RE if isinstance(line, bytes) else _FENCE_TEXT_RE).match(line)
+    return m.group(1) if m else None
+
+
+def closes_fence(line, fence):
+    """line 是否关闭以 fence 开启的代码块：同一围栏字符、长度不小于开启围栏、其后只有空白"""
+    marker = fence_open(line)
+    return marker is not None and marker[:1] == fence[:1] and len(marker) >= len(fence) \
+        and not line.strip().lstrip(fence[:1])
+
+
+def _lines(data):
+    """按行切分，返回 (起始偏移, 去掉换行的行内容, 含换行的结束偏移)"""
+    pos = len(BOM) if data[:3] == BOM else 0
+    n = len(data)
+    while pos < n:
+        nl = data.find(b'\n', pos)
+        end = n if nl < 0 else nl + 1
+        line = data[pos:end].rstrip(b'\r\n')
+        yield pos, line, end
+        pos = end
+
+
+def build_index(data):
+    """解析 bytes（或 str，将按 UTF-8 编码）并返回 SectionIndex"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    headings = []
+    open_heads = []
+    blockquotes = []
+    quote_start = quote_end = None
+    quote_lines = []
+    fence = None
+
+    def close_quote():
+        if quote_start is not None:
+            blockquotes.append(Blockquote(quote_start, quote_end, quote_lines))
+
+    for start, line, end in _lines(data):
+        if fence is not None:
+            if closes_fence(line, fence):
+                fence = None
+            continue
+        m = _FENCE_RE.match(line)
+        if m:
+            close_quote()
+            quote_start = None
+            fence = m.group(1)
+            continue
+
+        if line.lstrip(b' ')[:1] == b'>':
+            if quote_start is None:
+                quote_start, quote_lines = start, []
+            quote_end = end
+            quote_lines.append(line.decode('utf-8', 'replace'))
+            continue
+        if quote_start is not None:
+            close_quote()
+            quote_start = None
+
+        m = _HEADING_RE.match(line)
+        if m:
+            level = len(m.group(1))
+            title = _CLOSING_HASHES_RE.sub('', (m.group(2) or b'').decode('utf-8', 'replace')).strip()
+            # 关闭所有级别不低于当前标题的章节
+            while open_heads and open_heads[-1][0] >= level:
+                lvl, t, s, b = open_heads.pop()
+                headings.append(Heading(lvl, t, s, b, start))
+            open_heads.append((level, title, start, end))
+    close_quote()
+    for lvl, t, s, b in open_heads:
+        headings.append(Heading(lvl, t, s, b, len(data)))
+    headings.sort(key=lambda h: h.start)
+    return SectionIndex(headings, blockquotes, len(data))
+
+
+def detect_flags(index):
+    """FormalUnified 追加脚本关心的三个章节标志"""
+    return {
+        "has_crit": index.has_heading('批判性总结'),
+        "has_auth": index.has_quote(AUTH_QUOTE_RE),
+        "has_source": index.has_heading('来源映射') or index.quote_contains('**来源映射**'),
+    }
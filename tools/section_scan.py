@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+免解码的章节标志扫描：结果与 detect_flags(build_index(data)) 一致，但不解码整个文件。
+
+文件经 mmap 映射后，直接在 UTF-8 字节上查找候选行（关键字用 bytes.find，引用行用 bytes 正则）：
+标题中的 批判性总结 / 来源映射、引用块中的 **学者** … 年份 与 **来源映射**。
+追加脚本总是把这些章节写在文件末尾，所以先只在末尾 TAIL_BYTES 内查找，
+某个标志在末尾找不到时才回退到文件其余部分。
+候选行再经两步确认：只解码这一行，用 section_index 的同一组正则复核；
+并确认它不在代码块（``` / ~~~）中，代码块区间同样由 bytes 正则按需求出。
+"""
+import bisect
+import mmap
+import re
+from contextlib import contextmanager
+
+from tools.section_index import AUTH_QUOTE_RE, BOM, closes_fence, fence_open, parse_heading
+
+TAIL_BYTES = 16 * 1024
+
+# 以换行开头的 bytes 正则：re 会先快速定位字面前缀，比 (?m)^ 逐位置尝试快数倍；文件首行单独处理
+_FENCE_LINE_RE = re.compile(rb'\n {0,3}(?:`{3,}|~{3,})')
+_AUTH_QUOTE_CANDIDATE_RE = re.compile(rb'\n *>[^\n]*\*\*[^\n]*\*\*')
+
+
+def _keyword_lines(keyword):
+    """含 keyword 的各行行首偏移（bytes.find 定位）"""
+    needle = keyword.encode('utf-8')
+
+    def lines(buf, lo, hi):
+        pos = buf.find(needle, lo, hi)
+        while pos >= 0:
+            yield buf.rfind(b'\n', 0, pos) + 1
+            nl = buf.find(b'\n', pos)
+            if nl < 0:
+                return
+            pos = buf.find(needle, nl, hi)
+    return lines
+
+
+def _pattern_lines(pattern):
+    """pattern 命中的各行行首偏移；区间从文件开头起时首行也作为候选"""
+    def lines(buf, lo, hi):
+        if lo == 0:
+            yield 0
+        for m in pattern.finditer(buf, max(lo - 1, 0), hi):
+            yield m.start() + 1
+    return lines
+
+
+def _heading_contains(keyword):
+    def confirm(line):
+        heading = parse_heading(line)
+        return heading is not None and keyword in heading[1]
+    return confirm
+
+
+def _quote_matches(line):
+    return line.lstrip(b' ')[:1] == b'>' and bool(AUTH_QUOTE_RE.search(line.decode('utf-8', 'replace')))
+
+
+def _quote_contains_source(line):
+    return line.lstrip(b' ')[:1] == b'>' and '**来源映射**' in line.decode('utf-8', 'replace')
+
+
+# 每个标志：[(候选行查找, 单行确认)]，任一确认成立且不在代码块中即为真
+CHECKS = {
+    "has_crit": [(_keyword_lines('批判性总结'), _heading_contains('批判性总结'))],
+    "has_auth": [(_pattern_lines(_AUTH_QUOTE_CANDIDATE_RE), _quote_matches)],
+    "has_source": [(_keyword_lines('来源映射'), _heading_contains('来源映射')),
+                   (_keyword_lines('**来源映射**'), _quote_contains_source)],
+}
+
+
+def _line_at(buf, start):
+    nl = buf.find(b'\n', start)
+    return bytes(buf[start:len(buf) if nl < 0 else nl]).rstrip(b'\r')
+
+
+def _skip_bom(buf, start):
+    return len(BOM) if start == 0 and buf[:3] == BOM else start
+
+
+def fence_ranges(buf):
+    """代码块区间 [(起始偏移, 结束偏移)]，开闭规则与 build_index 相同；未闭合的延伸到文件末尾"""
+    ranges = []
+    fence = None
+    opened = 0
+    for start in _pattern_lines(_FENCE_LINE_RE)(buf, 0, len(buf)):
+        start = _skip_bom(buf, start)
+        line = _line_at(buf, start)
+        if fence is None:
+            fence, opened = fence_open(line), start
+        elif closes_fence(line, fence):
+            ranges.append((opened, start + len(line)))
+            fence = None
+    if fence is not None:
+        ranges.append((opened, len(buf)))
+    return ranges
+
+
+class _Fences:
+    """按需计算的代码块区间，同一文件只计算一次"""
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.ranges = None
+        self.starts = None
+
+    def contains(self, pos):
+        if self.ranges is None:
+            self.ranges = fence_ranges(self.buf)
+            self.starts = [r[0] for r in self.ranges]
+        i = bisect.bisect_right(self.starts, pos) - 1
+        return i >= 0 and pos < self.ranges[i][1]
+
+
+def _found(buf, checks, lo, hi, fences):
+    for lines, confirm in checks:
+        for start in lines(buf, lo, hi):
+            start = _skip_bom(buf, start)
+            if confirm(_line_at(buf, start)) and not fences.contains(start):
+                return True
+    return False
+
+
+def scan_flags(buf, tail=TAIL_BYTES):
+    """buf 为 bytes 或 mmap；返回与 detect_flags 相同的三个标志"""
+    size = len(buf)
+    tail_start = 0
+    if size > 2 * tail:
+        # 从行首开始，保证 ^ 能在末尾区域的第一行匹配
+        nl = buf.find(b'\n', size - tail)
+        tail_start = size if nl < 0 else nl + 1
+    fences = _Fences(buf)
+    flags = {}
+    for name, checks in CHECKS.items():
+        found = _found(buf, checks, tail_start, size, fences)
+        if not found and tail_start:
+            found = _found(buf, checks, 0, tail_start, fences)
+        flags[name] = found
+    return flags
+
+
+@contextmanager
+def mapped(fh):
+    """只读映射已打开的文件；空文件（无法 mmap）给出 b''"""
+    try:
+        mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        yield b''
+        return
+    try:
+        yield mm
+    finally:
+        mm.close()
@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+"""
+增量静态站点构建：Modern / Analysis / Struct / View 渲染为 HTML，只重新渲染受影响的页面。
+
+每个页面记录一组依赖及其哈希，任一变化才重新渲染：
+    source                  页面原文的内容哈希（size/mtime 未变时不读取文件）
+    quotes/<key>            _batch_append_catalog.json 中的共享条目（如 quotes/formal）
+    source_map/<key>        同上；只有 _batch_append.py 的目标页面依赖这些条目，
+    targets/<path>          其发布内容为原文经 upsert_sections 补齐四个章节后的结果
+    backlinks               链接到本页的页面（路径与标题），用于页尾的反向链接
+首页 index.html 依赖全部页面的路径与标题。渲染器或模板变化时（BUILD_VERSION）全部重建。
+
+公式经 tools.tex_mathml 转为 MathML，按公式哈希缓存在输出目录的 .math_cache.json，
+跨页面、跨次构建复用；转换失败的公式不缓存，以原文输出，错误记入页面状态，
+未重新渲染的页面在增量构建中照样报告。
+页面渲染按批分发到多个进程，写出在主进程内经 AtomicBatch 完成。
+
+用法（项目根目录）：
+    python -m tools.site_build [--output site] [--workers N] [--verbose]
+"""
+import argparse
+import hashlib
+import html
+import importlib.util
+import json
+import os
+import posixpath
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote
+
+from tools import concept_index
+from tools.atomic_write import AtomicBatch, write_atomic
+from tools.link_check import extract_links, resolve_link
+from tools.manifest import content_hash
+from tools.markdown_html import Renderer
+from tools.section_index import build_index
+from tools.tex_mathml import TexError, to_mathml
+
+DEFAULT_OUTPUT = "site"
+DEFAULT_DIRS = concept_index.DEFAULT_DIRS
+STATE_FILE = ".build_state.json"
+MATH_CACHE = ".math_cache.json"
+BUILD_VERSION = 2
+MATH_VERSION = 2
+SCRIPT = "_batch_append.py"
+CATALOG = "_batch_append_catalog.json"
+# _batch_append.py 的 BASE 在仓库中对应的目录
+CATALOG_BASE = "Modern/09-理论增强与完善"
+
+STYLE = """body{max-width:60em;margin:0 auto;padding:1em 2em;font-family:sans-serif;line-height:1.6}
+nav.path{font-size:.9em;color:#666}pre{background:#f6f8fa;padding:.8em;overflow:auto}
+code{background:#f6f8fa;padding:0 .2em}table{border-collapse:collapse}
+th,td{border:1px solid #ccc;padding:.3em .6em}blockquote{border-left:4px solid #ddd;margin:0;padding-left:1em;color:#555}
+div.math{overflow-x:auto}code.math-error{color:#b00}aside.backlinks{border-top:1px solid #ddd;margin-top:2em}
+"""
+
+PAGE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<link rel="stylesheet" href="{prefix}style.css">
+</head>
+<body>
+<nav class="path"><a href="{prefix}index.html">首页</a> / {path}</nav>
+<main>
+{body}
+</main>
+{backlinks}</body>
+</html>
+"""
+
+_scripts = {}
+
+
+def load_script(root):
+    """按路径加载根目录的 _batch_append.py（不在包内）；不存在时返回 None"""
+    if root not in _scripts:
+        path = os.path.join(root, SCRIPT)
+        module = None
+        if os.path.exists(path):
+            spec = importlib.util.spec_from_file_location("_batch_append", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        _scripts[root] = module
+    return _scripts[root]
+
+
+def load_catalog(root):
+    path = os.path.join(root, CATALOG)
+    script = load_script(root)
+    if script is None or not os.path.exists(path):
+        return None
+    return script.load_catalog(path)
+
+
+def value_hash(value):
+    return content_hash(json.dumps(value, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+
+
+def catalog_dependencies(catalog):
+    """{页面相对路径: (目录条目, {依赖键: 哈希})}"""
+    deps = {}
+    if catalog is None:
+        return deps
+    for target in catalog["targets"]:
+        key = target["key"]
+        deps[f"{CATALOG_BASE}/{target['path']}"] = (target, {
+            f"quotes/{key}": value_hash(catalog["quotes"][key]),
+            f"source_map/{key}": value_hash(catalog["source_map"][key]),
+            f"targets/{target['path']}": value_hash(target),
+        })
+    return deps
+
+
+def output_path(rel):
+    return posixpath.splitext(rel)[0] + ".html"
+
+
+def rewrite_link(url):
+    """指向 .md 的相对链接改为 .html，其余不变（与目标是否存在无关，页面输出只依赖原文）"""
+    if url.startswith(('#', 'mailto:')) or '://' in url:
+        return url
+    path, sep, anchor = url.partition('#')
+    if unquote(path).lower().endswith('.md'):
+        path = path[:-3] + '.html'
+    return path + sep + anchor
+
+
+def decode_text(raw):
+    """UTF-8（可带 BOM）；带 UTF-16 BOM 的文件按 UTF-16 解码"""
+    if raw[:2] in (b'\xff\xfe', b'\xfe\xff'):
+        return raw.decode('utf-16', 'replace')
+    return raw.decode('utf-8-sig', 'replace')
+
+
+def page_info(raw, rel):
+    """页面标题（第一个一级标题，否则文件名）与原始链接列表"""
+    index = build_index(raw)
+    stem = posixpath.splitext(posixpath.basename(rel))[0]
+    title = next((h.title for h in index.headings if h.level == 1), stem)
+    urls = sorted({url for _, url in extract_links(decode_text(raw))})
+    return title, urls
+
+
+def load_state(out_dir):
+    path = os.path.join(out_dir, STATE_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            state = json.load(fh)
+        if state.get("version") == BUILD_VERSION:
+            return state
+    except (OSError, ValueError):
+        pass
+    return {"version": BUILD_VERSION, "pages": {}, "index": ""}
+
+
+def load_math_cache(out_dir):
+    path = os.path.join(out_dir, MATH_CACHE)
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            cache = json.load(fh)
+        if cache.get("version") == MATH_VERSION:
+            return cache["formulas"]
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def scan_pages(root, dirs, state):
+    """各页面的 size/mtime/哈希/标题/链接；size 与 mtime 未变的直接取自上次状态"""
+    pages = OrderedDict()
+    for rel, st in concept_index.iter_documents(root, dirs):
+        old = state["pages"].get(rel)
+        if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+            pages[rel] = dict(old)
+            continue
+        try:
+            with open(st.path, 'rb') as fh:
+                raw = fh.read()
+        except OSError:
+            continue
+        digest = content_hash(raw)
+        if old and old["hash"] == digest:
+            title, urls = old["title"], old["links"]
+        else:
+            title, urls = page_info(raw, rel)
+        pages[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest,
+                      "title": title, "links": urls, "deps": old["deps"] if old else {},
+                      "math_errors": old["math_errors"] if old else []}
+    return pages
+
+
+def backlink_map(pages):
+    """{目标页面: [(来源页面, 来源标题)]}，按来源路径排序"""
+    inbound = {}
+    for rel, page in pages.items():
+        for url in page["links"]:
+            skip, target, _ = resolve_link(rel, url, pages)
+            if skip or target is None or target == rel or target not in pages:
+                continue
+            inbound.setdefault(target, set()).add(rel)
+    return {target: [(src, pages[src]["title"]) for src in sorted(sources)]
+            for target, sources in inbound.items()}
+
+
+# ---- 渲染（工作进程） ----
+
+_worker = {}
+
+
+def _init_worker(root, formulas):
+    _worker["root"] = root
+    _worker["formulas"] = formulas
+    _worker["catalog"] = load_catalog(root)
+
+
+def _math(new, errors):
+    formulas = _worker["formulas"]
+
+    def render(tex, display):
+        key = hashlib.blake2b((("D" if display else "I") + tex).encode('utf-8'), digest_size=16).hexdigest()
+        cached = formulas.get(key)
+        if cached is None:
+            try:
+                cached = to_mathml(tex, display)
+            except TexError as e:
+                # 失败不缓存：每次构建都重新报告，直到公式被修正
+                errors.append(f"{tex[:60]}: {e}")
+                return f'<code class="math-error" title="{html.escape(str(e))}">{html.escape(tex)}</code>'
+            formulas[key] = new[key] = cached
+        return cached
+    return render
+
+
+def render_page(rel, title, target, backlinks):
+    """返回 (rel, HTML 字节, 新增公式缓存, 公式错误列表)"""
+    root = _worker["root"]
+    with open(os.path.join(root, *rel.split('/')), 'rb') as fh:
+        raw = fh.read()
+    if target is not None:
+        script = load_script(root)
+        catalog = _worker["catalog"]
+        # 站点只做展示，公式错误在页面中标出，不在这里拦截
+        raw, _, _ = script.upsert_sections(raw, script.split_sections(script.render_target(target, catalog, check=False)))
+    new, errors = {}, []
+    renderer = Renderer(math=_math(new, errors), link=rewrite_link)
+    body = renderer.render(decode_text(raw))
+    prefix = "../" * rel.count('/')
+    links = ""
+    if backlinks:
+        items = '\n'.join(
+            f'<li><a href="{prefix}{html.escape(output_path(src))}">{html.escape(src_title)}</a></li>'
+            for src, src_title in backlinks)
+        links = f'<aside class="backlinks">\n<h2>反向链接</h2>\n<ul>\n{items}\n</ul>\n</aside>\n'
+    page = PAGE.format(title=html.escape(title), prefix=prefix, path=html.escape(rel),
+                       body=body, backlinks=links)
+    return rel, page.encode('utf-8'), new, errors
+
+
+def _render_chunk(tasks):
+    return [render_page(*task) for task in tasks]
+
+
+def render_all(root, tasks, formulas, workers):
+    """逐个产出 render_page 的结果；workers > 1 时按批分发到进程池"""
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(tasks) // (workers * 4) or 1)
+    chunks = [tasks[i:i + chunk] for i in range(0, len(tasks), chunk)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(root, formulas)) as pool:
+            for part in pool.map(_render_chunk, chunks):
+                yield from part
+    else:
+        _init_worker(root, formulas)
+        for tasks_chunk in chunks:
+            yield from _render_chunk(tasks_chunk)
+
+
+def render_index(pages):
+    groups = OrderedDict()
+    for rel, page in pages.items():
+        groups.setdefault(rel.split('/', 1)[0], []).append((rel, page["title"]))
+    parts = []
+    for top, items in groups.items():
+        lis = '\n'.join(f'<li><a href="{html.escape(output_path(rel))}">{html.escape(title)}</a> '
+                        f'<small>{html.escape(rel)}</small></li>' for rel, title in items)
+        parts.append(f"<h2>{html.escape(top)}</h2>\n<ul>\n{lis}\n</ul>")
+    return PAGE.format(title="首页", prefix="", path="", body='\n'.join(parts), backlinks="").encode('utf-8')
+
+
+def build(root, dirs, out_dir, workers=None, full=False):
+    """增量构建，返回统计 dict（含 reasons: {页面: [变化的依赖]}）"""
+    state = {"version": BUILD_VERSION, "pages": {}, "index": ""} if full else load_state(out_dir)
+    formulas = {} if full else load_math_cache(out_dir)
+    pages = scan_pages(root, dirs, state)
+    catalog_deps = catalog_dependencies(load_catalog(root))
+    inbound = backlink_map(pages)
+
+    tasks = []
+    reasons = OrderedDict()
+    for rel, page in pages.items():
+        target, deps = catalog_deps.get(rel, (None, {}))
+        deps = dict(deps, source=page["hash"], backlinks=value_hash(inbound.get(rel, [])))
+        old = page["deps"]
+        changed = sorted(k for k in set(deps) | set(old) if deps.get(k) != old.get(k))
+        if not os.path.exists(os.path.join(out_dir, *output_path(rel).split('/'))):
+            changed = changed or ["output"]
+        page["deps"] = deps
+        if changed:
+            reasons[rel] = changed
+            tasks.append((rel, page["title"], target, inbound.get(rel, [])))
+
+    stats = {"pages": len(pages), "rendered": 0, "removed": 0, "math_new": 0,
+             "math_cached": len(formulas), "math_errors": [], "reasons": reasons}
+    os.makedirs(out_dir, exist_ok=True)
+    with AtomicBatch() as batch:
+        for rel, data, new, errors in render_all(root, tasks, formulas, workers):
+            path = os.path.join(out_dir, *output_path(rel).split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            batch.write(path, data)
+            formulas.update(new)
+            stats["rendered"] += 1
+            pages[rel]["math_errors"] = errors
+        # 未重新渲染的页面沿用上次记录的公式错误，增量构建与全量构建报告一致
+        stats["math_errors"] = [f"{rel}: {e}" for rel, page in pages.items() for e in page["math_errors"]]
+
+        # 多个进程可能各自转换了同一公式，新增数按合并后的缓存计算
+        stats["math_new"] = len(formulas) - stats["math_cached"]
+        for rel in state["pages"]:
+            if rel not in pages:
+                try:
+                    os.remove(os.path.join(out_dir, *output_path(rel).split('/')))
+                except FileNotFoundError:
+                    pass
+                stats["removed"] += 1
+
+        index_hash = value_hash([[rel, page["title"]] for rel, page in pages.items()])
+        index_path = os.path.join(out_dir, "index.html")
+        if index_hash != state.get("index") or not os.path.exists(index_path):
+            batch.write(index_path, render_index(pages))
+        style_path = os.path.join(out_dir, "style.css")
+        if not os.path.exists(style_path):
+            batch.write(style_path, STYLE.encode('utf-8'))
+
+    if stats["math_new"] or full:
+        write_atomic(os.path.join(out_dir, MATH_CACHE), json.dumps(
+            {"version": MATH_VERSION, "formulas": formulas}, ensure_ascii=False).encode('utf-8'))
+    write_atomic(os.path.join(out_dir, STATE_FILE), json.dumps(
+        {"version": BUILD_VERSION, "pages": pages, "index": index_hash},
+        ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="增量构建静态 HTML 站点")
+    parser.add_argument('--root', default=os.getcwd(), help="项目根目录")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="输出目录（相对路径以根目录为基准）")
+    parser.add_argument('--dirs', nargs='+', default=DEFAULT_DIRS, help="参与发布的顶层目录")
+    parser.add_argument('--workers', type=int, default=None, help="渲染进程数，默认 CPU 核数")
+    parser.add_argument('--full', action='store_true', help="忽略构建状态与公式缓存，全部重建")
+    parser.add_argument('--verbose', action='store_true', help="列出每个重新渲染的页面及原因")
+    args = parser.parse_args(argv)
+
+    root = os.path.abspath(args.root)
+    out_dir = args.output if os.path.isabs(args.output) else os.path.join(root, args.output)
+    start = time.perf_counter()
+    stats = build(root, args.dirs, out_dir, args.workers, args.full)
+    if args.verbose:
+        for rel, changed in stats["reasons"].items():
+            print(f"RENDER: {rel} ({', '.join(changed)})")
+    for error in stats["math_errors"]:
+        print(f"公式错误: {error}")
+    print(f"页面: {stats['pages']}，重新渲染: {stats['rendered']}，删除: {stats['removed']}，"
+          f"新公式: {stats['math_new']}（缓存 {stats['math_cached']}），公式错误: {len(stats['math_errors'])}")
+    print(f"耗时 {time.perf_counter() - start:.2f}s，输出目录: {out_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
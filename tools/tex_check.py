@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+批量 LaTeX 公式校验：每个文件一次扫描取出全部 $...$ 与 $$...$$ 公式，用本地解析器检查。
+
+- 错误（error）：控制字符（如 \\text 写进 Python/JSON 字符串后 \\t 变成制表符）、
+  括号/环境不配对、命令缺参数、\\left 与 \\right 数量不等。
+- 警告（warning）：tex_mathml 不认识的命令（附最接近的已知命令）。
+公式识别规则与站点渲染（tools.markdown_html）相同：代码块与行内代码中的 $ 不算。
+
+结果按规范化公式（首尾空白去掉、连续空格与换行合并）的哈希缓存，同一公式在多个文件中
+只校验一次；缓存持久化到状态文件，下次运行只校验新出现的公式。
+_batch_append.py 的 make_append 在生成追加内容时调用 check_text，有错误则拒绝追加。
+
+用法（项目根目录）：
+    python -m tools.tex_check [--dirs Modern Analysis Struct View] [--strict] [--report tex_report.json]
+"""
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict, namedtuple
+
+from tools import concept_index
+from tools.atomic_write import write_atomic
+from tools.markdown_html import CODE_SPAN_RE, INLINE_MATH_RE
+from tools.run_report import write_report
+from tools.section_index import closes_fence, fence_open
+from tools.tex_mathml import KNOWN_COMMANDS, TexError, parse
+
+DEFAULT_DIRS = concept_index.DEFAULT_DIRS
+DEFAULT_CACHE = ".tex_check_cache.json"
+CATALOG = "_batch_append_catalog.json"
+# 检查规则变化时递增，旧缓存作废
+CHECK_VERSION = 2
+
+# 公式位置：line 为所在行号（从 1 起）
+Formula = namedtuple("Formula", "line tex display")
+Problem = namedtuple("Problem", "line tex severity message")
+
+_SPACE_RE = re.compile(r'[ \n]+')
+_COMMAND_RE = re.compile(r'\\([a-zA-Z]+)')
+# Python/JSON 字符串中的转义序列：控制字符 → 被吞掉的字母
+_CONTROL_ESCAPES = {'\t': 't', '\b': 'b', '\f': 'f', '\r': 'r', '\v': 'v', '\a': 'a'}
+_CONTROL_NAMES = {'\t': "制表符", '\b': "退格符", '\f': "换页符", '\r': "回车符", '\v': "垂直制表符", '\a': "响铃符"}
+# 控制字符后来又被替换成空白时只剩残词，如 "\{ ext{保留}"：不以 \ 开头、后接 { 的小写词
+_BARE_WORD_RE = re.compile(r'(?<![\\a-zA-Z\x00-\x1f])([a-z]{2,})\{')
+
+# 进程内缓存：{规范化公式哈希: [[severity, message], ...]}
+_memory = {}
+
+
+class FormulaError(ValueError):
+    """待追加内容中有公式错误"""
+
+    def __init__(self, problems):
+        self.problems = problems
+        super().__init__("; ".join(f"${p.tex}$: {p.message}" for p in problems))
+
+
+def extract_formulas(text):
+    """一次扫描取出全部公式 [Formula]；跳过围栏代码块与行内代码"""
+    formulas = []
+    lines = text.split('\n')
+    fence = None
+    block = None  # 未闭合的 $$ 公式块：(起始行号, [各行])
+    for lineno, line in enumerate(lines, 1):
+        if fence is not None:
+            if closes_fence(line, fence):
+                fence = None
+            continue
+        stripped = line.strip()
+        if block is not None:
+            if stripped.endswith('$$'):
+                block[1].append(stripped[:-2])
+                formulas.append(Formula(block[0], '\n'.join(block[1]).strip(), True))
+                block = None
+            else:
+                block[1].append(line)
+            continue
+        fence = fence_open(line)
+        if fence is not None:
+            continue
+        if stripped.startswith('$$'):
+            rest = stripped[2:]
+            if rest.endswith('$$') and len(rest) >= 2:
+                formulas.append(Formula(lineno, rest[:-2].strip(), True))
+            else:
+                block = (lineno, [rest])
+            continue
+        line = CODE_SPAN_RE.sub(lambda c: ' ' * len(c.group(0)), line)
+        formulas.extend(Formula(lineno, f.group(1), False) for f in INLINE_MATH_RE.finditer(line))
+    if block is not None:
+        formulas.append(Formula(block[0], '\n'.join(block[1]).strip(), True))
+    return formulas
+
+
+def normalize(tex):
+    """只合并普通空格与换行；制表符等控制字符保留，否则会掩盖转义错误"""
+    return _SPACE_RE.sub(' ', tex.strip())
+
+
+def formula_key(tex, display):
+    return hashlib.blake2b((("D" if display else "I") + normalize(tex)).encode('utf-8'),
+                           digest_size=16).hexdigest()
+
+
+def _control_problems(tex):
+    found = []
+    for ch, letter in _CONTROL_ESCAPES.items():
+        pos = tex.find(ch)
+        if pos < 0:
+            continue
+        word = re.match(r'[a-zA-Z]*', tex[pos + 1:]).group(0)
+        guess = next((letter + word[:i] for i in range(len(word), -1, -1)
+                      if letter + word[:i] in KNOWN_COMMANDS), None)
+        hint = f"，应为 \\{guess}" if guess else ""
+        found.append(["error", f"含{_CONTROL_NAMES[ch]}（\\{letter} 被当作转义序列{hint}）"])
+    for word in OrderedDict.fromkeys(_BARE_WORD_RE.findall(tex)):
+        lost = [c + word for c in _CONTROL_ESCAPES.values() if c + word in KNOWN_COMMANDS]
+        if lost and word not in KNOWN_COMMANDS:
+            found.append(["error", f"残词 {word}{{，疑似 \\{lost[0]} 的转义丢失"])
+    return found
+
+
+def check_formula(tex, display=False):
+    """单个公式的问题列表 [[severity, message]]（不含行号，便于缓存）"""
+    problems = _control_problems(tex)
+    lefts = len(re.findall(r'\\left(?![a-zA-Z])', tex))
+    rights = len(re.findall(r'\\right(?![a-zA-Z])', tex))
+    if lefts != rights:
+        problems.append(["error", f"\\left 与 \\right 数量不等（{lefts} / {rights}）"])
+    try:
+        _, unknown = parse(tex, display)
+    except TexError as e:
+        problems.append(["error", str(e)])
+        # 结构错误时仍报告拼写可疑的命令
+        unknown = [c for c in _COMMAND_RE.findall(tex) if c not in KNOWN_COMMANDS]
+    for name in OrderedDict.fromkeys(unknown):
+        close = difflib.get_close_matches(name, KNOWN_COMMANDS, n=1, cutoff=0.75)
+        hint = f"，是否为 \\{close[0]}" if close else ""
+        problems.append(["warning", f"未知命令 \\{name}{hint}"])
+    return problems
+
+
+def check_formulas(formulas, cache, stats=None):
+    """按缓存校验一组公式，返回 [Problem]；stats 累计 formulas（公式数）/ checked（实际校验数）"""
+    problems = []
+    for f in formulas:
+        key = formula_key(f.tex, f.display)
+        result = cache.get(key)
+        if stats is not None:
+            stats["formulas"] += 1
+        if result is None:
+            result = cache[key] = check_formula(f.tex, f.display)
+            if stats is not None:
+                stats["checked"] += 1
+        problems.extend(Problem(f.line, f.tex, severity, message) for severity, message in result)
+    return problems
+
+
+def check_text(text, cache=None):
+    """文本中全部公式的问题 [Problem]；默认使用进程内缓存"""
+    return check_formulas(extract_formulas(text), _memory if cache is None else cache)
+
+
+def load_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            data = json.load(fh)
+        if data.get("version") == CHECK_VERSION:
+            return data["results"]
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_cache(path, cache):
+    write_atomic(path, json.dumps({"version": CHECK_VERSION, "results": cache},
+                                  ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def iter_sources(root, dirs, catalog=CATALOG):
+    """产出 (显示名, 文本)：各 Markdown 文件，以及追加目录中会写入文件的各段文本"""
+    for rel, entry in concept_index.iter_documents(root, dirs):
+        try:
+            with open(entry.path, 'rb') as fh:
+                yield rel, fh.read().decode('utf-8-sig', 'replace')
+        except OSError:
+            continue
+    path = os.path.join(root, catalog)
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as fh:
+        data = json.load(fh)
+    for field in ("quotes", "source_map"):
+        for key, text in data.get(field, {}).items():
+            yield f"{catalog}:{field}.{key}", text
+    for target in data.get("targets", []):
+        for field in ("critical", "formal"):
+            yield f"{catalog}:{target['path']}.{field}", target[field]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量校验 Markdown 中的 LaTeX 公式")
+    parser.add_argument('--root', default=os.getcwd(), help="项目根目录")
+    parser.add_argument('--dirs', nargs='+', default=DEFAULT_DIRS, help="参与校验的顶层目录")
+    parser.add_argument('--cache', default=DEFAULT_CACHE, help="公式结果缓存文件（相对路径以根目录为基准）")
+    parser.add_argument('--no-cache', action='store_true', help="不读取也不写入缓存")
+    parser.add_argument('--strict', action='store_true', help="警告（未知命令）也视为失败")
+    parser.add_argument('--quiet', action='store_true', help="只输出汇总，不列出警告")
+    parser.add_argument('--report', default=None, help="JSON 报告路径")
+    args = parser.parse_args(argv)
+
+    root = os.path.abspath(args.root)
+    cache_path = args.cache if os.path.isabs(args.cache) else os.path.join(root, args.cache)
+    cache = {} if args.no_cache else load_cache(cache_path)
+    stats = {"files": 0, "formulas": 0, "checked": 0}
+    start = time.perf_counter()
+    found = []
+    for name, text in iter_sources(root, args.dirs):
+        stats["files"] += 1
+        for p in check_formulas(extract_formulas(text), cache, stats):
+            found.append((name, p))
+    if not args.no_cache and stats["checked"]:
+        save_cache(cache_path, cache)
+
+    errors = [(n, p) for n, p in found if p.severity == "error"]
+    warnings = [(n, p) for n, p in found if p.severity == "warning"]
+    for name, p in errors + ([] if args.quiet else warnings):
+        tex = p.tex if len(p.tex) <= 80 else p.tex[:77] + "..."
+        print(f"{p.severity.upper()}: {name}:{p.line}: ${tex!r}$ — {p.message}")
+    print(f"文件: {stats['files']}，公式: {stats['formulas']}（本次校验 {stats['checked']}，"
+          f"其余命中缓存），错误: {len(errors)}，警告: {len(warnings)}，"
+          f"耗时 {time.perf_counter() - start:.2f}s")
+    if args.report:
+        write_report(args.report, OrderedDict([
+            ("root", root),
+            ("stats", stats),
+            ("problems", [OrderedDict([("file", n), ("line", p.line), ("tex", p.tex),
+                                       ("severity", p.severity), ("message", p.message)])
+                          for n, p in found]),
+        ]))
+    return 1 if errors or (args.strict and warnings) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+"""
+最小的 TeX → MathML 转换，覆盖本仓库公式中的常用写法（无需 MathJax/KaTeX 等外部依赖）。
+
+支持：字母/数字/运算符、上下标、{} 分组、\\frac \\sqrt \\binom、希腊字母与常用关系/运算符号、
+\\mathcal \\mathbb \\mathbf \\mathfrak（转为 Unicode 数学字母）、\\text \\mathrm \\operatorname、
+\\left \\right、重音（\\hat \\bar \\vec …）、matrix / cases / aligned 等表格环境。
+括号不配对、命令缺参数、未知环境时抛出 TexError；未知命令按原文输出为 mtext 并记入 unknown。
+"""
+import html
+import re
+
+MATHML_NS = "http://www.w3.org/1998/Math/MathML"
+
+
+class TexError(ValueError):
+    """公式结构错误（括号不配对、缺参数、未知环境等）"""
+
+
+_TOKEN_RE = re.compile(r'\\(?:[a-zA-Z]+|.)|[a-zA-Z]|\d+(?:\.\d+)?|\s+|.', re.S)
+
+GREEK = {name: chr(code) for name, code in (
+    ("alpha", 0x3b1), ("beta", 0x3b2), ("gamma", 0x3b3), ("delta", 0x3b4), ("epsilon", 0x3f5),
+    ("varepsilon", 0x3b5), ("zeta", 0x3b6), ("eta", 0x3b7), ("theta", 0x3b8), ("vartheta", 0x3d1),
+    ("iota", 0x3b9), ("kappa", 0x3ba), ("lambda", 0x3bb), ("mu", 0x3bc), ("nu", 0x3bd),
+    ("xi", 0x3be), ("pi", 0x3c0), ("varpi", 0x3d6), ("rho", 0x3c1), ("varrho", 0x3f1),
+    ("sigma", 0x3c3), ("varsigma", 0x3c2), ("tau", 0x3c4), ("upsilon", 0x3c5), ("phi", 0x3d5),
+    ("varphi", 0x3c6), ("chi", 0x3c7), ("psi", 0x3c8), ("omega", 0x3c9),
+    ("Gamma", 0x393), ("Delta", 0x394), ("Theta", 0x398), ("Lambda", 0x39b), ("Xi", 0x39e),
+    ("Pi", 0x3a0), ("Sigma", 0x3a3), ("Upsilon", 0x3a5), ("Phi", 0x3a6), ("Psi", 0x3a8),
+    ("Omega", 0x3a9),
+)}
+
+# 作为标识符（mi）输出的符号
+IDENTIFIERS = dict(GREEK, infty="∞", partial="∂", nabla="∇", emptyset="∅", varnothing="∅",
+                   ell="ℓ", hbar="ℏ", aleph="ℵ", top="⊤", bot="⊥", Box="□", Diamond="◇")
+
+# 作为运算符（mo）输出的符号
+OPERATORS = {
+    "to": "→", "rightarrow": "→", "leftarrow": "←", "gets": "←", "leftrightarrow": "↔",
+    "Rightarrow": "⇒", "Leftarrow": "⇐", "Leftrightarrow": "⇔", "implies": "⟹", "iff": "⟺",
+    "longrightarrow": "⟶", "longmapsto": "⟼", "mapsto": "↦", "hookrightarrow": "↪",
+    "uparrow": "↑", "downarrow": "↓", "rightleftharpoons": "⇌",
+    "times": "×", "cdot": "⋅", "circ": "∘", "bullet": "∙", "div": "÷", "pm": "±", "mp": "∓",
+    "ast": "∗", "star": "⋆", "oplus": "⊕", "otimes": "⊗", "odot": "⊙", "setminus": "∖",
+    "in": "∈", "notin": "∉", "ni": "∋", "subset": "⊂", "subseteq": "⊆", "supset": "⊃",
+    "supseteq": "⊇", "subsetneq": "⊊", "cup": "∪", "cap": "∩", "sqcup": "⊔", "sqcap": "⊓",
+    "forall": "∀", "exists": "∃", "nexists": "∄", "neg": "¬", "lnot": "¬",
+    "land": "∧", "wedge": "∧", "lor": "∨", "vee": "∨",
+    "leq": "≤", "le": "≤", "geq": "≥", "ge": "≥", "neq": "≠", "ne": "≠", "ll": "≪", "gg": "≫",
+    "approx": "≈", "equiv": "≡", "sim": "∼", "simeq": "≃", "cong": "≅", "propto": "∝",
+    "prec": "≺", "succ": "≻", "preceq": "⪯", "succeq": "⪰", "sqsubseteq": "⊑", "sqsupseteq": "⊒",
+    "vdash": "⊢", "dashv": "⊣", "models": "⊨", "perp": "⊥", "parallel": "∥", "mid": "∣",
+    "triangleq": "≜", "coloneqq": "≔", "defeq": "≝", "colon": ":",
+    "langle": "⟨", "rangle": "⟩", "lceil": "⌈", "rceil": "⌉", "lfloor": "⌊", "rfloor": "⌋",
+    "lbrace": "{", "rbrace": "}", "vert": "|", "Vert": "‖",
+    "ldots": "…", "dots": "…", "cdots": "⋯", "vdots": "⋮", "ddots": "⋱",
+    "sum": "∑", "prod": "∏", "coprod": "∐", "int": "∫", "iint": "∬", "oint": "∮",
+    "bigcup": "⋃", "bigcap": "⋂", "bigvee": "⋁", "bigwedge": "⋀", "bigoplus": "⨁", "bigotimes": "⨂",
+}
+# 显示模式下上下标写在正上/正下方的大型运算符
+LIMIT_OPERATORS = {"sum", "prod", "coprod", "bigcup", "bigcap", "bigvee", "bigwedge", "bigoplus",
+                   "bigotimes", "lim", "limsup", "liminf", "max", "min", "sup", "inf", "argmax", "argmin"}
+FUNCTIONS = {"lim", "limsup", "liminf", "log", "ln", "lg", "exp", "sin", "cos", "tan", "cot",
+             "sec", "csc", "arcsin", "arccos", "arctan", "sinh", "cosh", "tanh", "max", "min",
+             "sup", "inf", "det", "dim", "ker", "deg", "arg", "gcd", "hom", "Pr", "mod",
+             "argmax", "argmin"}
+ACCENTS = {"hat": "^", "widehat": "^", "bar": "¯", "overline": "¯", "tilde": "~", "widetilde": "~",
+           "vec": "→", "dot": "˙", "ddot": "¨", "overrightarrow": "→", "check": "ˇ"}
+UNDER_ACCENTS = {"underline": "_"}
+SPACES = {",": "0.1667em", ":": "0.2222em", ";": "0.2778em", "!": "-0.1667em",
+          " ": "0.25em", "quad": "1em", "qquad": "2em"}
+ESCAPED = {"{": "{", "}": "}", "|": "‖", "%": "%", "$": "$", "&": "&", "#": "#", "_": "_"}
+BIG = {"big", "Big", "bigg", "Bigg", "bigl", "bigr", "Bigl", "Bigr", "biggl", "biggr"}
+IGNORED = {"displaystyle", "textstyle", "scriptstyle", "limits", "nolimits", "notag", "nonumber"}
+TEXT_COMMANDS = {"text", "textrm", "textit", "textbf", "mbox", "textsf", "texttt"}
+ENVIRONMENTS = {
+    "matrix": ("", ""), "pmatrix": ("(", ")"), "bmatrix": ("[", "]"), "Bmatrix": ("{", "}"),
+    "vmatrix": ("|", "|"), "Vmatrix": ("‖", "‖"), "cases": ("{", ""), "aligned": ("", ""),
+    "align": ("", ""), "align*": ("", ""), "array": ("", ""), "gathered": ("", ""),
+    "split": ("", ""), "eqnarray": ("", ""),
+}
+
+# Unicode 数学字母：(大写 A 起点, 小写 a 起点, 例外)
+_ALPHABETS = {
+    "mathcal": (0x1D49C, 0x1D4B6, {"B": "ℬ", "E": "ℰ", "F": "ℱ", "H": "ℋ", "I": "ℐ", "L": "ℒ",
+                                   "M": "ℳ", "R": "ℛ", "e": "ℯ", "g": "ℊ", "o": "ℴ"}),
+    "mathbb": (0x1D538, 0x1D552, {"C": "ℂ", "H": "ℍ", "N": "ℕ", "P": "ℙ", "Q": "ℚ", "R": "ℝ", "Z": "ℤ"}),
+    "mathbf": (0x1D400, 0x1D41A, {}),
+    "boldsymbol": (0x1D400, 0x1D41A, {}),
+    "mathfrak": (0x1D504, 0x1D51E, {"C": "ℭ", "H": "ℌ", "I": "ℑ", "R": "ℜ", "Z": "ℨ"}),
+    "mathscr": (0x1D49C, 0x1D4B6, {"B": "ℬ", "E": "ℰ", "F": "ℱ", "H": "ℋ", "I": "ℐ", "L": "ℒ",
+                                   "M": "ℳ", "R": "ℛ", "e": "ℯ", "g": "ℊ", "o": "ℴ"}),
+}
+_ALPHABETS["mathsf"] = (0x1D5A0, 0x1D5BA, {})
+_ALPHABETS["mathit"] = (0x1D434, 0x1D44E, {"h": "ℎ"})
+
+# 解析器认识的全部命令名（不含反斜杠）
+KNOWN_COMMANDS = frozenset(
+    set(IDENTIFIERS) | set(OPERATORS) | FUNCTIONS | set(ACCENTS) | set(UNDER_ACCENTS) | set(SPACES)
+    | set(ESCAPED) | BIG | IGNORED | TEXT_COMMANDS | set(_ALPHABETS)
+    | {"frac", "dfrac", "tfrac", "binom", "sqrt", "mathrm", "operatorname", "overbrace", "underbrace",
+       "left", "right", "begin", "end", "\\"})
+
+_OPERATOR_CHARS = set("+-=<>()[]|,;:!/*.?'") | {"−", "×", "÷", "·", "→", "←", "≤", "≥", "≠", "∈"}
+
+
+def _esc(text):
+    return html.escape(text, quote=False)
+
+
+def _map_alphabet(style, text):
+    upper, lower, special = _ALPHABETS[style]
+    out = []
+    for ch in text:
+        if ch in special:
+            out.append(special[ch])
+        elif 'A' <= ch <= 'Z':
+            out.append(chr(upper + ord(ch) - 65))
+        elif 'a' <= ch <= 'z':
+            out.append(chr(lower + ord(ch) - 97))
+        elif style in ("mathbf", "boldsymbol") and '0' <= ch <= '9':
+            out.append(chr(0x1D7CE + ord(ch) - 48))
+        else:
+            out.append(ch)
+    return ''.join(out)
+
+
+class _Parser:
+    def __init__(self, tex, display):
+        self.tokens = [t for t in _TOKEN_RE.findall(tex)]
+        self.pos = 0
+        self.display = display
+        self.unknown = []
+
+    def peek(self, skip_space=True):
+        while skip_space and self.pos < len(self.tokens) and self.tokens[self.pos].isspace():
+            self.pos += 1
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        tok = self.peek()
+        if tok is None:
+            raise TexError("公式意外结束")
+        self.pos += 1
+        return tok
+
+    def raw_group(self):
+        """读取 {...} 内的原文（用于 \\text、环境名等）"""
+        if self.peek() != '{':
+            tok = self.take()
+            return tok
+        self.pos += 1
+        depth = 1
+        parts = []
+        while self.pos < len(self.tokens):
+            tok = self.tokens[self.pos]
+            self.pos += 1
+            if tok == '{':
+                depth += 1
+            elif tok == '}':
+                depth -= 1
+                if depth == 0:
+                    return ''.join(parts)
+            parts.append(tok)
+        raise TexError("缺少 }")
+
+    def parse(self, stop=()):
+        """解析直到 stop 中的记号（不消耗）或结尾，返回节点列表"""
+        nodes = []
+        while True:
+            tok = self.peek()
+            if tok is None or tok in stop:
+                return nodes
+            if tok == '}':
+                raise TexError("多余的 }")
+            if tok in ('^', '_'):
+                # 无底数的上下标（如 {}^{n}）
+                nodes.append(self.scripts("<mrow></mrow>", None))
+                continue
+            base, name = self.atom()
+            if base is None:
+                continue
+            nodes.append(self.scripts(base, name))
+
+    def scripts(self, base, name):
+        sub = sup = None
+        while self.peek() in ('^', '_', "'"):
+            tok = self.take()
+            if tok == "'":
+                sup = (sup or '') + "<mo>′</mo>"
+                continue
+            arg = self.argument()
+            if tok == '^':
+                if sup is not None and not sup.startswith("<mo>′"):
+                    raise TexError("重复的上标")
+                sup = (sup or '') + arg
+            else:
+                if sub is not None:
+                    raise TexError("重复的下标")
+                sub = arg
+        if sub is None and sup is None:
+            return base
+        under = self.display and name in LIMIT_OPERATORS
+        if sub is not None and sup is not None:
+            tag = "munderover" if under else "msubsup"
+            return f"<{tag}>{base}<mrow>{sub}</mrow><mrow>{sup}</mrow></{tag}>"
+        if sub is not None:
+            tag = "munder" if under else "msub"
+            return f"<{tag}>{base}<mrow>{sub}</mrow></{tag}>"
+        tag = "mover" if under else "msup"
+        return f"<{tag}>{base}<mrow>{sup}</mrow></{tag}>"
+
+    def argument(self):
+        """命令或上下标的一个参数：{...} 分组或单个原子"""
+        tok = self.peek()
+        if tok is None:
+            raise TexError("缺少参数")
+        if tok == '{':
+            self.pos += 1
+            nodes = self.parse(stop=('}',))
+            if self.peek() != '}':
+                raise TexError("缺少 }")
+            self.pos += 1
+            return ''.join(nodes)
+        if tok in ('}', '^', '_', '&'):
+            raise TexError("缺少参数")
+        base, _ = self.atom()
+        return base or ''
+
+    def atom(self):
+        """返回 (MathML 片段, 命令名或 None)；片段为 None 表示不产生输出（如间距命令之外的忽略项）"""
+        tok = self.take()
+        if tok == '{':
+            nodes = self.parse(stop=('}',))
+            if self.peek() != '}':
+                raise TexError("缺少 }")
+            self.pos += 1
+            return f"<mrow>{''.join(nodes)}</mrow>", None
+        if tok.startswith('\\'):
+            return self.command(tok[1:])
+        if tok == '&':
+            raise TexError("& 只能用于表格环境")
+        if tok[0].isdigit():
+            return f"<mn>{tok}</mn>", None
+        if tok.isascii() and tok.isalpha():
+            return f"<mi>{tok}</mi>", None
+        if tok == '~':
+            return f'<mspace width="{SPACES[" "]}"></mspace>', None
+        if tok in _OPERATOR_CHARS:
+            return f"<mo>{_esc(tok)}</mo>", None
+        return f"<mtext>{_esc(tok)}</mtext>", None
+
+    def command(self, name):
+        if name in IGNORED:
+            return None, None
+        if name in SPACES:
+            return f'<mspace width="{SPACES[name]}"></mspace>', None
+        if name in ESCAPED:
+            return f"<mo>{_esc(ESCAPED[name])}</mo>", None
+        if name == '\\':
+            raise TexError("\\\\ 只能用于表格环境")
+        if name in IDENTIFIERS:
+            return f"<mi>{IDENTIFIERS[name]}</mi>", name
+        if name in OPERATORS:
+            attrs = ' largeop="true"' if name in LIMIT_OPERATORS and self.display else ''
+            return f"<mo{attrs}>{_esc(OPERATORS[name])}</mo>", name
+        if name in FUNCTIONS:
+            return f'<mi mathvariant="normal">{name}</mi>', name
+        if name in ("frac", "dfrac", "tfrac"):
+            num, den = self.argument(), self.argument()
+            return f"<mfrac><mrow>{num}</mrow><mrow>{den}</mrow></mfrac>", None
+        if name == "binom":
+            top, bottom = self.argument(), self.argument()
+            return (f'<mrow><mo>(</mo><mfrac linethickness="0"><mrow>{top}</mrow>'
+                    f'<mrow>{bottom}</mrow></mfrac><mo>)</mo></mrow>'), None
+        if name == "sqrt":
+            index = None
+            if self.peek() == '[':
+                self.pos += 1
+                index = ''.join(self.parse(stop=(']',)))
+                if self.peek() != ']':
+                    raise TexError("缺少 ]")
+                self.pos += 1
+            body = self.argument()
+            if index is not None:
+                return f"<mroot><mrow>{body}</mrow><mrow>{index}</mrow></mroot>", None
+            return f"<msqrt>{body}</msqrt>", None
+        if name in _ALPHABETS:
+            return f"<mi>{_esc(_map_alphabet(name, self.raw_group()))}</mi>", None
+        if name in TEXT_COMMANDS:
+            return f"<mtext>{_esc(self.raw_group())}</mtext>", None
+        if name in ("mathrm", "operatorname", "operatorname*"):
+            text = self.raw_group().replace(' ', '')
+            return f'<mi mathvariant="normal">{_esc(text)}</mi>', name
+        if name in ACCENTS:
+            body = self.argument()
+            return f'<mover accent="true"><mrow>{body}</mrow><mo>{ACCENTS[name]}</mo></mover>', None
+        if name in UNDER_ACCENTS:
+            body = self.argument()
+            return f'<munder accentunder="true"><mrow>{body}</mrow><mo>{UNDER_ACCENTS[name]}</mo></munder>', None
+        if name in ("overbrace", "underbrace"):
+            body = self.argument()
+            tag, brace = ("mover", "⏞") if name == "overbrace" else ("munder", "⏟")
+            return f"<{tag}><mrow>{body}</mrow><mo>{brace}</mo></{tag}>", None
+        if name in ("left", "right") or name in BIG:
+            delim = self.take()
+            if delim == '.':
+                return None, None
+            if delim.startswith('\\'):
+                delim = ESCAPED.get(delim[1:]) or OPERATORS.get(delim[1:])
+                if delim is None:
+                    raise TexError(f"无效的定界符: \\{name}")
+            stretchy = "true" if name in ("left", "right") else "false"
+            return f'<mo stretchy="{stretchy}">{_esc(delim)}</mo>', None
+        if name == "begin":
+            return self.environment(self.raw_group()), None
+        if name == "end":
+            raise TexError("多余的 \\end")
+        self.unknown.append(name)
+        return f"<mtext>\\{_esc(name)}</mtext>", None
+
+    def environment(self, env):
+        if env not in ENVIRONMENTS:
+            raise TexError(f"未知环境: {env}")
+        if env == "array" and self.peek() == '{':
+            self.raw_group()  # 列格式
+        rows = [[]]
+        while True:
+            cell = self.parse(stop=('&', '\\\\', '\\end'))
+            rows[-1].append(''.join(cell))
+            tok = self.peek()
+            if tok is None:
+                raise TexError(f"环境 {env} 缺少 \\end")
+            self.pos += 1
+            if tok == '&':
+                continue
+            if tok == '\\\\':
+                rows.append([])
+                continue
+            closing = self.raw_group()
+            if closing != env:
+                raise TexError(f"\\begin{{{env}}} 与 \\end{{{closing}}} 不匹配")
+            break
+        if rows[-1] == [''] and len(rows) > 1:
+            rows.pop()
+        align = ' columnalign="left"' if env in ("cases",) else ''
+        table = "<mtable{}>{}</mtable>".format(align, ''.join(
+            "<mtr>{}</mtr>".format(''.join(f"<mtd><mrow>{c}</mrow></mtd>" for c in row)) for row in rows))
+        left, right = ENVIRONMENTS[env]
+        if left or right:
+            parts = [f'<mo>{_esc(left)}</mo>' if left else '', table, f'<mo>{_esc(right)}</mo>' if right else '']
+            return f"<mrow>{''.join(parts)}</mrow>"
+        return table
+
+
+def parse(tex, display=False):
+    """返回 (MathML 主体, 未知命令列表)；结构错误抛出 TexError"""
+    parser = _Parser(tex, display)
+    nodes = parser.parse()
+    return ''.join(nodes), parser.unknown
+
+
+def to_mathml(tex, display=False):
+    """完整的 <math> 元素，附带原始 TeX 注释"""
+    body, _ = parse(tex, display)
+    mode = ' display="block"' if display else ''
+    return (f'<math xmlns="{MATHML_NS}"{mode}><semantics><mrow>{body}</mrow>'
+            f'<annotation encoding="application/x-tex">{_esc(tex)}</annotation></semantics></math>')
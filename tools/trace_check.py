@@ -0,0 +1,424 @@
+# -*- coding: utf-8 -*-
+"""
+可追踪矩阵检查：把 backup/可追踪矩阵*.csv 的各行与实际存在的文档批量对照。
+
+矩阵按列载入（每列一个编码数组 + 去重取值表），语料一次扫描建成一份索引：
+所有标题与文档名（tools.section_index 的解析规则），以及正文中的标准条款引用
+（如 “ISO/IEC 25010:2025”“IEEE 1012 6.1”）。连接按去重取值进行：各列的全部
+取值编进同一个 Aho-Corasick 自动机，对索引文本只扫描一遍；条款与日期也只对
+去重后的取值各解析一次，再按编码数组展开到各行。行数再多，代价主要是读 CSV。
+
+检查项（issue / 级别）：
+- missing_section / warning：目标/章节 不是任何标题或文档名的一部分（忽略 “4. ” 编号）
+- missing_clause / warning：标准条款所属的标准在语料中从未被引用
+- uncited_clause / info：标准有引用，但该条款号没有
+- missing_artifact、missing_report / warning：工件/证据、验证报告（按 “/” 拆成多项，任一项命中即可）找不到
+- stale_status / error：状态为 已完成 但缺少工件或报告；warning：状态为 计划中 但工件与报告都已存在
+- overdue / warning：完成日期 已过而状态不是 已完成
+- bad_date / error、bad_status / warning、bad_clause / warning：取值无法解析
+
+结果逐行流式写出（CSV 或 JSON Lines），汇总写到标准错误（--output 为文件时写到标准输出）。
+
+用法（项目根目录）：
+    python -m tools.trace_check [矩阵.csv ...] [--today 2025-06-30] [--format jsonl] [--output reports/trace.csv]
+"""
+import argparse
+import bisect
+import csv
+import datetime
+import io
+import json
+import os
+import re
+import sys
+import time
+from array import array
+from collections import OrderedDict
+
+from tools import concept_index
+from tools.multimatch import Automaton
+from tools.run_report import write_report
+from tools.section_index import build_index
+
+DEFAULT_MATRICES = ["backup/可追踪矩阵-2025升级版.csv", "backup/可追踪矩阵示例.csv"]
+DEFAULT_DIRS = concept_index.DEFAULT_DIRS + ["backup"]
+
+# 参与检查的列：内部名 → 表头
+COLUMNS = OrderedDict([
+    ("target", "目标/章节"),
+    ("clause", "标准条款"),
+    ("artifact", "工件/证据"),
+    ("report", "验证报告"),
+    ("status", "状态"),
+    ("due", "完成日期"),
+])
+DONE, ACTIVE, PLANNED = "已完成", "进行中", "计划中"
+STATUSES = (DONE, ACTIVE, PLANNED)
+ISSUES = ("missing_section", "missing_clause", "uncited_clause", "missing_artifact", "missing_report",
+          "stale_status", "overdue", "bad_date", "bad_status", "bad_clause")
+OUTPUT_FIELDS = ("file", "line", "target", "clause", "status", "due", "issue", "severity", "detail")
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d")
+
+_NUMBERING_RE = re.compile(r'^\s*\d+(?:\.\d+)*[.、]?\s*')
+_TERM_SPLIT_RE = re.compile(r'\s*[/、]\s*')
+# 矩阵中的条款：“ISO/IEC 25010 4.1”“IEEE 1012:2025 6.1”“ACM SWEBOK 8.1”
+_CLAUSE_CELL_RE = re.compile(
+    r'^\s*(?:ACM\s*)?(ISO(?:/IEC)?|IEC|IEEE|SWEBOK)(?:[ \-]?V\d+)?[ \-]?(\d{3,5})?(?::\d{4})?'
+    r'(?:\s*§?\s*(\d+(?:\.\d+)*))?\s*$')
+# 正文中的引用：条款号至少带一个点，避免把年份等数字当成条款
+_CLAUSE_REF_RE = re.compile(
+    r'(?:ACM\s*)?(ISO(?:/IEC)?|IEC|IEEE|SWEBOK)(?:[ \-]?V\d+)?[ \-]?(\d{3,5})?(?::\d{4})?'
+    r'(?:[ ]+§?[ ]?(\d+(?:\.\d+)+))?')
+
+
+def standard_key(family, number):
+    """ISO、ISO/IEC、IEC 视为同一标准族：("ISO/IEC", "25010") → "ISO 25010" """
+    family = "ISO" if family in ("ISO/IEC", "IEC") else family
+    return f"{family} {number}" if number else family
+
+
+def parse_clause(cell):
+    """(标准, 条款号或 None)；无法解析返回 None"""
+    m = _CLAUSE_CELL_RE.match(cell)
+    if not m or (m.group(1) != "SWEBOK" and not m.group(2)):
+        return None
+    return standard_key(m.group(1), m.group(2)), m.group(3)
+
+
+def parse_date(cell):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(cell.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def normalize_term(text):
+    return _NUMBERING_RE.sub('', text).strip().lower()
+
+
+def split_terms(cell):
+    """“证明脚本/日志” → ["证明脚本", "日志"]；单字项太泛，不参与匹配"""
+    return [t for t in (normalize_term(p) for p in _TERM_SPLIT_RE.split(cell)) if len(t) >= 2]
+
+
+class Matrix:
+    """按列存放的矩阵：columns[name] = (编码数组, 去重取值表)，另有 file / line 两列"""
+
+    def __init__(self):
+        self.columns = {name: (array('l'), []) for name in ("file",) + tuple(COLUMNS)}
+        self.lines = array('l')
+        self._codes = {name: {} for name in self.columns}
+        self.rows = 0
+
+    def _code(self, name, value):
+        table = self._codes[name]
+        code = table.get(value)
+        if code is None:
+            code = table[value] = len(self.columns[name][1])
+            self.columns[name][1].append(value)
+        return code
+
+    def load(self, path, label=None):
+        """追加一个 CSV 文件；表头缺少必需列时抛 ValueError"""
+        with open(path, 'r', encoding='utf-8-sig', newline='') as fh:
+            reader = csv.reader(fh)
+            header = next(reader, None) or []
+            missing = [title for title in COLUMNS.values() if title not in header]
+            if missing:
+                raise ValueError(f"{path}: 缺少列 {', '.join(missing)}")
+            # 每列：(表头位置, 取值 → 编码, 编码数组, 去重取值表)
+            columns = [(header.index(title), self._codes[name]) + self.columns[name]
+                       for name, title in COLUMNS.items()]
+            width = max(c[0] for c in columns) + 1
+            file_code = self._code("file", label or path)
+            file_codes = self.columns["file"][0]
+            lines = self.lines
+            rows = 0
+            for line, row in enumerate(reader, 2):
+                if not any(row):
+                    continue
+                if len(row) < width:
+                    row = row + [''] * (width - len(row))
+                for pos, table, codes, values in columns:
+                    value = row[pos].strip()
+                    code = table.get(value)
+                    if code is None:
+                        code = table[value] = len(values)
+                        values.append(value)
+                    codes.append(code)
+                file_codes.append(file_code)
+                lines.append(line)
+                rows += 1
+            self.rows += rows
+        return self
+
+    def cell(self, name, row):
+        codes, values = self.columns[name]
+        return values[codes[row]]
+
+
+class CorpusIndex:
+    """语料索引：标题与文档名拼成一段文本（逐项换行），另有标准/条款 → 引用文档"""
+
+    def __init__(self):
+        self.docs = []
+        self.parts = []
+        self.starts = []
+        self.owners = []
+        self.standards = {}
+        self.clauses = {}
+        self._length = 0
+
+    def _add_title(self, doc, title):
+        title = title.strip().lower()
+        if title:
+            self.parts.append(title)
+            self.starts.append(self._length)
+            self.owners.append(doc)
+            self._length += len(title) + 1
+
+    def add_document(self, rel, raw):
+        doc = len(self.docs)
+        self.docs.append(rel)
+        self._add_title(doc, os.path.splitext(rel.rsplit('/', 1)[-1])[0])
+        for h in build_index(raw).headings:
+            self._add_title(doc, h.title)
+        text = raw.decode('utf-8', 'replace')
+        for m in _CLAUSE_REF_RE.finditer(text):
+            if m.group(1) == "SWEBOK" or m.group(2):
+                key = standard_key(m.group(1), m.group(2))
+                self.standards.setdefault(key, rel)
+                if m.group(3):
+                    self.clauses.setdefault((key, m.group(3)), rel)
+
+    def build(self, root, dirs):
+        for rel, entry in concept_index.iter_documents(root, dirs):
+            if not rel.endswith('.md'):
+                continue
+            try:
+                with open(entry.path, 'rb') as fh:
+                    self.add_document(rel, fh.read())
+            except OSError:
+                continue
+        self.text = '\n'.join(self.parts)
+        return self
+
+    def find_terms(self, terms):
+        """一次扫描：{词下标: 首个命中的文档相对路径}"""
+        found = {}
+        if not terms:
+            return found
+        automaton = Automaton({term: i for i, term in enumerate(terms)})
+        starts, owners = self.starts, self.owners
+        for end, i in automaton.iter_matches(self.text):
+            if i not in found:
+                found[i] = self.docs[owners[bisect.bisect_right(starts, end - 1) - 1]]
+        return found
+
+
+def resolve_columns(matrix, corpus):
+    """对各列的去重取值做连接，返回按编码索引的结果表"""
+    targets = matrix.columns["target"][1]
+    artifacts = matrix.columns["artifact"][1]
+    reports = matrix.columns["report"][1]
+    # 三列的全部词编进同一个自动机
+    term_ids = {}
+    value_terms = {}
+    for name, values in (("target", targets), ("artifact", artifacts), ("report", reports)):
+        value_terms[name] = []
+        for value in values:
+            terms = [normalize_term(value)] if name == "target" else split_terms(value)
+            value_terms[name].append([term_ids.setdefault(t, len(term_ids)) for t in terms if t])
+    found = corpus.find_terms(list(term_ids))
+    hits = {}
+    for name, ids_per_value in value_terms.items():
+        hits[name] = [next((found[i] for i in ids if i in found), None) for ids in ids_per_value]
+
+    clauses = []
+    for cell in matrix.columns["clause"][1]:
+        parsed = parse_clause(cell) if cell else None
+        if parsed is None:
+            clauses.append(None)
+            continue
+        key, number = parsed
+        clauses.append((key, corpus.standards.get(key),
+                        corpus.clauses.get((key, number)) if number else corpus.standards.get(key)))
+    dates = [parse_date(cell) if cell else None for cell in matrix.columns["due"][1]]
+    return hits, clauses, dates
+
+
+def _row_issues(key, values, hits, clauses, dates, today):
+    """一种取值组合的问题 [(issue, severity, detail)]"""
+    t, c, a, r, s, d = key
+    target_values, clause_values, artifact_values, report_values, status_values, due_values = values
+    target_hits, artifact_hits, report_hits = hits["target"], hits["artifact"], hits["report"]
+    status = status_values[s]
+    found = []
+    if target_values[t] and target_hits[t] is None:
+        found.append(("missing_section", "warning", "没有包含该文字的标题或文档名"))
+    if clause_values[c]:
+        resolved = clauses[c]
+        if resolved is None:
+            found.append(("bad_clause", "warning", "无法解析标准条款"))
+        elif resolved[1] is None:
+            found.append(("missing_clause", "warning", f"语料中没有引用 {resolved[0]}"))
+        elif resolved[2] is None:
+            found.append(("uncited_clause", "info", f"{resolved[0]} 有引用（{resolved[1]}），该条款号没有"))
+    has_artifact = not artifact_values[a] or artifact_hits[a] is not None
+    has_report = not report_values[r] or report_hits[r] is not None
+    if not has_artifact:
+        found.append(("missing_artifact", "warning", "工件/证据 找不到对应的标题或文档"))
+    if not has_report:
+        found.append(("missing_report", "warning", "验证报告 找不到对应的标题或文档"))
+    if status and status not in STATUSES:
+        found.append(("bad_status", "warning", f"未知状态，应为 {'/'.join(STATUSES)}"))
+    elif status == DONE and not (has_artifact and has_report):
+        found.append(("stale_status", "error", "标记已完成但缺少证据"))
+    elif status == PLANNED and artifact_values[a] and report_values[r] and has_artifact and has_report:
+        found.append(("stale_status", "warning",
+                      f"证据已存在（{artifact_hits[a]}、{report_hits[r]}）但状态仍为计划中"))
+    if due_values[d]:
+        due = dates[d]
+        if due is None:
+            found.append(("bad_date", "error", "完成日期 无法解析"))
+        elif due < today and status != DONE:
+            found.append(("overdue", "warning", f"逾期 {(today - due).days} 天"))
+    return found
+
+
+def check_rows(matrix, corpus, today, only=None, counts=None):
+    """逐行产出 (文件, 行号, 其余字段元组)，字段顺序同 OUTPUT_FIELDS。
+
+    各列的连接结果只按去重取值计算一次；整行的问题再按取值组合缓存，行数远多于
+    组合数时，每行只剩一次字典查找，相同组合产出的是同一个元组。
+    counts 为 dict 时，遍历结束后填入各 issue / severity 的计数。
+    """
+    hits, clauses, dates = resolve_columns(matrix, corpus)
+    wanted = set(only or ISSUES)
+    names = tuple(COLUMNS)
+    codes = [matrix.columns[name][0] for name in names]
+    values = [matrix.columns[name][1] for name in names]
+    files, file_values = matrix.columns["file"]
+    lines = matrix.lines
+    memo = {}
+    tally = {}
+    for row, key in enumerate(zip(*codes)):
+        tails = memo.get(key)
+        if tails is None:
+            cells = tuple(v[code] for v, code in zip(values, key))
+            head = (cells[0], cells[1], cells[4], cells[5])
+            tails = memo[key] = [head + issue for issue in _row_issues(key, values, hits, clauses, dates, today)
+                                 if issue[0] in wanted]
+        if tails:
+            tally[key] = tally.get(key, 0) + 1
+            name, line = file_values[files[row]], lines[row]
+            for tail in tails:
+                yield name, line, tail
+    if counts is not None:
+        counts.update({"issues": {}, "severity": {}})
+        for key, rows in tally.items():
+            for tail in memo[key]:
+                counts["issues"][tail[4]] = counts["issues"].get(tail[4], 0) + rows
+                counts["severity"][tail[5]] = counts["severity"].get(tail[5], 0) + rows
+
+
+def _csv_text(fields):
+    buf = io.StringIO()
+    csv.writer(buf).writerow(fields)
+    return buf.getvalue()
+
+
+def write_issues(issues, out, fmt):
+    """流式写出 check_rows 的结果；相同的字段元组只格式化一次"""
+    names = {}
+    tails = {}
+    write = out.write
+    if fmt == "csv":
+        write(_csv_text(OUTPUT_FIELDS))
+        for name, line, tail in issues:
+            text = tails.get(tail)
+            if text is None:
+                text = tails[tail] = _csv_text(tail)
+            prefix = names.get(name)
+            if prefix is None:
+                prefix = names[name] = _csv_text([name])[:-2]
+            write(f"{prefix},{line},{text}")
+    else:
+        for name, line, tail in issues:
+            text = tails.get(tail)
+            if text is None:
+                # 去掉首尾的 { }，拼在 file / line 之后
+                text = tails[tail] = json.dumps(dict(zip(OUTPUT_FIELDS[2:], tail)), ensure_ascii=False)[1:]
+            prefix = names.get(name)
+            if prefix is None:
+                prefix = names[name] = '{"file": ' + json.dumps(name, ensure_ascii=False)
+            write(f'{prefix}, "line": {line}, {text}\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="可追踪矩阵与语料的批量对照检查")
+    parser.add_argument('matrices', nargs='*', default=DEFAULT_MATRICES, help="矩阵 CSV（相对路径以根目录为基准）")
+    parser.add_argument('--root', default=os.getcwd(), help="项目根目录")
+    parser.add_argument('--dirs', nargs='+', default=DEFAULT_DIRS, help="参与索引的顶层目录")
+    parser.add_argument('--today', default=None, help="判断逾期的基准日期（YYYY-MM-DD），默认今天")
+    parser.add_argument('--only', nargs='+', choices=ISSUES, default=None, help="只输出这些检查项")
+    parser.add_argument('--quiet', action='store_true', help="不输出 info 级别的结果（如 uncited_clause）")
+    parser.add_argument('--format', choices=("csv", "jsonl"), default="csv", help="结果格式")
+    parser.add_argument('--output', default='-', help="结果输出路径，- 为标准输出")
+    parser.add_argument('--report', default=None, help="JSON 汇总报告路径")
+    args = parser.parse_args(argv)
+
+    root = os.path.abspath(args.root)
+    today = parse_date(args.today) if args.today else datetime.date.today()
+    if today is None:
+        parser.error(f"无法解析日期: {args.today}")
+    start = time.perf_counter()
+    matrix = Matrix()
+    for path in args.matrices:
+        matrix.load(path if os.path.isabs(path) else os.path.join(root, path), label=path)
+    loaded = time.perf_counter()
+    corpus = CorpusIndex().build(root, args.dirs)
+    indexed = time.perf_counter()
+
+    to_stdout = args.output == '-'
+    out = sys.stdout if to_stdout else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        counts = {}
+        only = args.only or ISSUES
+        if args.quiet:
+            only = [issue for issue in only if issue != "uncited_clause"]
+        write_issues(check_rows(matrix, corpus, today, only, counts), out, args.format)
+    finally:
+        if not to_stdout:
+            out.close()
+    done = time.perf_counter()
+
+    log = sys.stderr if to_stdout else sys.stdout
+    print(f"矩阵: {matrix.rows} 行（{len(args.matrices)} 个文件），语料: {len(corpus.docs)} 个文档、"
+          f"{len(corpus.parts)} 个标题/文档名、{len(corpus.standards)} 个标准",
+          file=log)
+    for issue in ISSUES:
+        if issue in counts["issues"]:
+            print(f"  {issue}: {counts['issues'][issue]}", file=log)
+    print(f"错误: {counts['severity'].get('error', 0)}，警告: {counts['severity'].get('warning', 0)}，"
+          f"耗时 {done - start:.2f}s（载入 {loaded - start:.2f}s，索引 {indexed - loaded:.2f}s，"
+          f"连接 {done - indexed:.2f}s）", file=log)
+    if not to_stdout:
+        print(f"结果: {args.output}", file=log)
+    if args.report:
+        write_report(args.report, OrderedDict([
+            ("root", root),
+            ("today", today.isoformat()),
+            ("matrices", args.matrices),
+            ("rows", matrix.rows),
+            ("documents", len(corpus.docs)),
+            ("counts", counts),
+            ("seconds", round(done - start, 6)),
+        ]))
+    return 1 if counts["severity"].get("error") else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+基于 os.scandir 的流式目录遍历，供各工具共用。
+
+- 以生成器逐个产出文件，不先收集整棵树；内存只与目录深度和单个目录的条目数有关。
+- 文件大小与 mtime 直接取自 DirEntry.stat()（Windows 上来自 scandir 本身的数据），
+  不再另外调用 os.path.getsize / os.stat。
+- include / exclude 规则：以 / 结尾的模式匹配目录（名称或相对路径），其余匹配文件。
+- 传入 state 时记录每个目录的 mtime 与文件列表；下次遍历时 mtime 未变的目录不再
+  scandir，也不逐个 stat 其中文件，直接按记录产出（Entry.cached 为真），只检查子目录。
+  目录 mtime 只反映目录项的增删与改名：经临时文件 + os.replace 写入（本仓库各工具的写法）
+  会更新它，原地覆盖写入则不会，因此只在确认写入方式时使用 state。
+"""
+import os
+from collections import namedtuple
+from fnmatch import fnmatch
+
+# 字段名与 os.stat_result 一致，可直接传给 manifest.lookup
+Entry = namedtuple("Entry", "path rel st_size st_mtime_ns cached")
+
+DEFAULT_EXCLUDES = (
+    "backup/",
+    ".*/",          # 隐藏目录：.git、.vscode 等
+    "__pycache__/",
+    "*.zip",        # 如 FormalUnified_v1.0.0_*.zip
+)
+
+
+def _split_rules(patterns):
+    dirs = tuple(p.rstrip('/') for p in patterns if p.endswith('/'))
+    files = tuple(p for p in patterns if not p.endswith('/'))
+    return dirs, files
+
+
+def _matches(name, rel, patterns):
+    return any(fnmatch(name, p) or fnmatch(rel, p) for p in patterns)
+
+
+def is_excluded_dir(name, rel, exclude=DEFAULT_EXCLUDES):
+    """目录是否被 exclude 中的目录规则（以 / 结尾）排除；与 walk 的判断一致"""
+    return _matches(name, rel, _split_rules(exclude)[0])
+
+
+def walk(root, include=("*.md",), exclude=DEFAULT_EXCLUDES, state=None, dirs=False):
+    """
+    深度优先、按名称排序地产出 Entry；dirs 为真时目录本身也产出（st_size 为 None）。
+    state 为 {目录相对路径: {"mtime_ns", "files": {文件名: [size, mtime_ns]}, "dirs": [子目录名]}}，
+    遍历完整结束时删除已不存在目录的记录。
+    """
+    exclude_dirs, exclude_files = _split_rules(exclude)
+    include = tuple(include) if include else None
+    seen = set()
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        full_dir = os.path.join(root, *rel_dir.split('/')) if rel_dir else root
+        try:
+            dir_mtime = os.stat(full_dir).st_mtime_ns
+        except OSError:
+            continue
+        seen.add(rel_dir)
+        if dirs and rel_dir:
+            yield Entry(full_dir, rel_dir, None, dir_mtime, False)
+
+        cached = state.get(rel_dir) if state is not None else None
+        if cached and cached["mtime_ns"] == dir_mtime:
+            for name, (size, mtime) in cached["files"].items():
+                rel = f"{rel_dir}/{name}" if rel_dir else name
+                yield Entry(os.path.join(full_dir, name), rel, size, mtime, True)
+            stack.extend(f"{rel_dir}/{d}" if rel_dir else d for d in reversed(cached["dirs"]))
+            continue
+
+        files = {}
+        subdirs = []
+        try:
+            with os.scandir(full_dir) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir():
+                    if not _matches(entry.name, rel, exclude_dirs):
+                        subdirs.append(entry.name)
+                    continue
+                if not entry.is_file():
+                    continue
+                if include and not _matches(entry.name, rel, include):
+                    continue
+                if _matches(entry.name, rel, exclude_files):
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            files[entry.name] = [st.st_size, st.st_mtime_ns]
+            yield Entry(entry.path, rel, st.st_size, st.st_mtime_ns, False)
+        if state is not None:
+            state[rel_dir] = {"mtime_ns": dir_mtime, "files": files, "dirs": subdirs}
+        stack.extend(f"{rel_dir}/{d}" if rel_dir else d for d in reversed(subdirs))
+
+    if state is not None:
+        for rel_dir in [d for d in state if d not in seen]:
+            del state[rel_dir]
@@ -0,0 +1,466 @@
+# -*- coding: utf-8 -*-
+"""
+常驻监视：订阅 Modern / Analysis / Struct / View 的文件系统事件，保存后只处理变化的文件，
+使章节锚点、断链报告、概念倒排与全文检索保持最新。
+
+- 事件来源：Linux 上用 inotify（ctypes 直接调用 libc，无第三方依赖），递归监视各目录，
+  新建的子目录自动加入；其他平台、inotify 不可用或指定 --poll 时退化为定时轮询（比较 size/mtime）。
+- 去抖：事件到达后等待 --debounce 毫秒无新事件再处理，连续保存最多推迟 --max-delay 毫秒；
+  同一文件在一批内只处理一次。以 . 开头的临时文件（原子写入的中间文件）与编辑器备份文件忽略。
+- 每个变化的 Markdown 只读一次：重建其章节锚点、链接与概念、检索正排记录；
+  锚点或存在性变化时，只重新解析指向它的链接（反向链接表）。
+- 概念倒排写回 .concept_index.json；检索只重写增量段（.search_index/delta/），
+  空闲 --merge-idle 秒后（或退出时）才把增量并入主索引。
+- 术语表变化会改变全部别名，概念倒排整体重扫；inotify 队列溢出时整体重新同步。这两种情形之外不做全量扫描。
+
+用法（项目根目录）：
+    python -m tools.watch [--dirs Modern Analysis Struct View] [--poll] [--debounce 150]
+"""
+import argparse
+import ctypes
+import ctypes.util
+import os
+import posixpath
+import select
+import struct
+import sys
+import time
+from urllib.parse import unquote
+
+from tools import concept_index, link_check, search_index, walker
+from tools.section_index import build_index
+
+DEFAULT_DIRS = concept_index.DEFAULT_DIRS
+DEFAULT_LINKS_REPORT = os.path.join('reports', 'links', 'broken-links.txt')
+DEBOUNCE_MS = 150
+MAX_DELAY_MS = 800
+POLL_SECONDS = 1.0
+MERGE_IDLE = 300
+
+# inotify 常量（linux/inotify.h）
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR
+_EVENT = struct.Struct('iIII')
+
+# 事件：(相对根目录的路径, 类型)，类型为 changed / removed / dir / overflow
+CHANGED, REMOVED, DIR, OVERFLOW = "changed", "removed", "dir", "overflow"
+
+
+def _ignored_name(name):
+    return name.startswith('.') or name.endswith('~') or name.endswith(('.swp', '.swx', '.tmp'))
+
+
+def _excluded_dir(name, rel):
+    """与 walker 的默认排除规则一致：backup、隐藏目录、__pycache__"""
+    return walker.is_excluded_dir(name, rel)
+
+
+class InotifyWatcher:
+    """递归 inotify 监视；read() 返回事件列表"""
+
+    def __init__(self, root, dirs):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("libc 不支持 inotify")
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self.root = root
+        self.wds = {}
+        for top in dirs:
+            if os.path.isdir(os.path.join(root, top)):
+                self.add_tree(top)
+
+    def _add(self, rel_dir):
+        path = os.fsencode(os.path.join(self.root, *rel_dir.split('/')))
+        wd = self._libc.inotify_add_watch(self.fd, path, WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch 失败: {rel_dir}（{os.strerror(err)}；"
+                               f"可调大 fs.inotify.max_user_watches 或使用 --poll）")
+        self.wds[wd] = rel_dir
+
+    def add_tree(self, rel_dir):
+        """监视目录及其全部子目录，返回其中已有文件的 changed 事件（补上监视建立前写入的文件）"""
+        events = []
+        self._add(rel_dir)
+        for entry in walker.walk(os.path.join(self.root, *rel_dir.split('/')), include=None, dirs=True):
+            rel = f"{rel_dir}/{entry.rel}"
+            if entry.st_size is None:
+                self._add(rel)
+                events.append((rel, DIR))
+            elif not _ignored_name(posixpath.basename(rel)):
+                events.append((rel, CHANGED))
+        return events
+
+    def read(self, timeout):
+        """等待至多 timeout 秒（None 为一直等待），返回事件列表"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        events = []
+        try:
+            buf = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        pos = 0
+        while pos < len(buf):
+            wd, mask, _, length = _EVENT.unpack_from(buf, pos)
+            pos += _EVENT.size
+            name = buf[pos:pos + length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+            pos += length
+            if mask & IN_Q_OVERFLOW:
+                events.append(("", OVERFLOW))
+                continue
+            if mask & IN_IGNORED:
+                self.wds.pop(wd, None)
+                continue
+            parent = self.wds.get(wd)
+            if parent is None or not name:
+                continue
+            rel = f"{parent}/{name}"
+            if mask & IN_ISDIR:
+                if _excluded_dir(name, rel):
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    events.append((rel, DIR))
+                    try:
+                        events.extend(self.add_tree(rel))
+                    except OSError:
+                        pass  # 目录建立后又被删除
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    events.append((rel, REMOVED))
+                continue
+            if _ignored_name(name):
+                continue
+            if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                events.append((rel, CHANGED))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                events.append((rel, REMOVED))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """定时遍历并比较 size/mtime；用于没有 inotify 的平台"""
+
+    def __init__(self, root, dirs, interval=POLL_SECONDS):
+        self.root = root
+        self.dirs = dirs
+        self.interval = interval
+        self.snapshot = self._snapshot()
+        self.next_poll = time.monotonic() + interval
+
+    def _snapshot(self):
+        snapshot = {}
+        for top in self.dirs:
+            for entry in walker.walk(os.path.join(self.root, top), include=None, dirs=True):
+                if not _ignored_name(posixpath.basename(entry.rel)):
+                    snapshot[f"{top}/{entry.rel}"] = (entry.st_size, entry.st_mtime_ns)
+        return snapshot
+
+    def read(self, timeout):
+        wait = self.next_poll - time.monotonic()
+        if timeout is not None and timeout < wait:
+            time.sleep(max(timeout, 0))
+            return []
+        time.sleep(max(wait, 0))
+        self.next_poll = time.monotonic() + self.interval
+        old, new = self.snapshot, self._snapshot()
+        self.snapshot = new
+        events = []
+        for rel, (size, mtime) in new.items():
+            if old.get(rel) != (size, mtime):
+                events.append((rel, DIR if size is None else CHANGED))
+        events.extend((rel, REMOVED) for rel in old if rel not in new)
+        return events
+
+    def close(self):
+        pass
+
+
+def open_watcher(root, dirs, poll=False, interval=POLL_SECONDS):
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root, dirs)
+        except (OSError, AttributeError) as e:
+            print(f"inotify 不可用，改用轮询: {e}")
+    return PollingWatcher(root, dirs, interval)
+
+
+def link_key(source, url):
+    """链接指向的路径（与 link_check.resolve_link 相同的规范化）；外部链接返回 None"""
+    if link_check.is_external(url):
+        return None
+    path_part = url.partition('#')[0]
+    if not path_part:
+        return source
+    path_part = unquote(path_part).replace('\\', '/')
+    if path_part.startswith('/'):
+        return posixpath.normpath(path_part.lstrip('/'))
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), path_part))
+
+
+class Workspace:
+    """常驻内存的语料状态：已存在路径、各文档的锚点与链接、断链、概念倒排与检索增量"""
+
+    def __init__(self, root, dirs, index_dir, state_path, links_report):
+        self.root = root
+        self.dirs = dirs
+        self.prefixes = tuple(d.rstrip('/') + '/' for d in dirs)
+        self.index_dir = index_dir
+        self.state_path = state_path
+        self.links_report = links_report
+        self.delta = {}
+        self.masked = set()
+
+    def _full_path(self, rel):
+        return os.path.join(self.root, *rel.split('/'))
+
+    def load(self):
+        """启动（或 inotify 溢出后）的一次全量同步"""
+        self.existing, markdown = link_check.walk_tree(self.root)
+        self.links, self.anchors, self.broken, self.inbound = {}, {}, {}, {}
+        self.documents = set()
+        for rel in markdown:
+            if rel.startswith(self.prefixes):
+                self.documents.add(rel)
+                _, links, anchors, error = link_check.parse_file(self.root, rel)
+                self.anchors[rel] = anchors
+                if not error:
+                    self._set_links(rel, links)
+        for rel in self.links:
+            self._resolve(rel)
+        self.state = concept_index.load_state(self.state_path)
+        concept_index.update_index(self.root, self.dirs, self.state)
+        self._reload_matcher()
+        concept_index.save_state(self.state_path, self.state)
+        search_index.update_index(self.root, self.dirs, self.index_dir)
+        self.delta, self.masked = {}, set()
+        self.write_links_report()
+
+    def _reload_matcher(self):
+        self.pattern, self.alias_to_concept = concept_index.build_matcher(self.state["concepts"])
+
+    def _set_links(self, rel, links):
+        for key in {link_key(rel, url) for _, url in self.links.get(rel, ())}:
+            sources = self.inbound.get(key)
+            if sources is not None:
+                sources.discard(rel)
+        self.links[rel] = links
+        for key in {link_key(rel, url) for _, url in links}:
+            if key is not None:
+                self.inbound.setdefault(key, set()).add(rel)
+
+    def _resolve(self, rel):
+        self.broken[rel] = link_check.find_broken(self.root, rel, self.links.get(rel, ()), self.existing, self.anchors)
+
+    def _affected(self, rels):
+        """指向这些路径（或以其为 README 的目录）的文档"""
+        found = set()
+        for rel in rels:
+            found |= self.inbound.get(rel, set())
+            if posixpath.basename(rel) == 'README.md':
+                found |= self.inbound.get(posixpath.dirname(rel), set())
+        return found
+
+    def apply(self, events):
+        """处理一批去抖后的事件 {rel: 类型}，返回统计"""
+        stats = {"changed": 0, "removed": 0, "relinked": 0, "concepts": "增量"}
+        touched = set()       # 存在性或锚点变化的路径
+        changed_md = []
+        removed_md = []
+        for rel, kind in events.items():
+            if kind == DIR:
+                self.existing.add(rel)
+                touched.add(rel)
+            elif kind == REMOVED:
+                gone = [p for p in self.existing if p == rel or p.startswith(rel + '/')]
+                for p in gone:
+                    self.existing.discard(p)
+                    if p.endswith('.md') and p.startswith(self.prefixes):
+                        removed_md.append(p)
+                touched.update(gone)
+            elif kind == CHANGED:
+                if not os.path.isfile(self._full_path(rel)):
+                    continue
+                if rel not in self.existing:
+                    self.existing.add(rel)
+                    touched.add(rel)
+                if rel.endswith('.md'):
+                    changed_md.append(rel)
+
+        for rel in removed_md:
+            self.documents.discard(rel)
+            self._set_links(rel, [])
+            for table in (self.links, self.anchors, self.broken, self.delta):
+                table.pop(rel, None)
+            self.state["docs"].pop(rel, None)
+            self.masked.add(rel)
+            stats["removed"] += 1
+
+        glossary = concept_index.GLOSSARY in changed_md or concept_index.GLOSSARY in removed_md
+        for rel in changed_md:
+            path = self._full_path(rel)
+            try:
+                with open(path, 'rb') as fh:
+                    raw = fh.read()
+                st = os.stat(path)
+            except OSError:
+                continue
+            try:
+                text = raw.decode('utf-8-sig')
+            except UnicodeDecodeError:
+                text = None
+            anchors = build_index(raw).anchors()
+            if text is not None:
+                anchors.update(link_check.html_anchors(text))
+            if anchors != self.anchors.get(rel):
+                touched.add(rel)
+            self.anchors[rel] = anchors
+            self.documents.add(rel)
+            self._set_links(rel, link_check.extract_links(text) if text is not None else [])
+            self._resolve(rel)
+            if not glossary:
+                entry = concept_index.scan_document(raw, self.pattern, self.alias_to_concept)
+                entry["size"], entry["mtime_ns"] = st.st_size, st.st_mtime_ns
+                self.state["docs"][rel] = entry
+            self.delta[rel] = search_index.scan_document(raw)
+            self.masked.add(rel)
+            stats["changed"] += 1
+
+        relink = self._affected(touched) - set(changed_md)
+        for rel in relink:
+            if rel in self.links:
+                self._resolve(rel)
+        stats["relinked"] = len(relink)
+
+        if glossary:
+            # 术语表变化：别名全部改变，只能整体重扫
+            concept_index.update_index(self.root, self.dirs, self.state)
+            self._reload_matcher()
+            stats["concepts"] = "整体重扫"
+        if changed_md or removed_md:
+            concept_index.save_state(self.state_path, self.state)
+            search_index.write_delta(self.index_dir, self.delta, self.masked)
+            self.write_links_report()
+        return stats
+
+    def merge(self):
+        """把检索增量段并入主索引"""
+        if self.delta or self.masked:
+            search_index.update_index(self.root, self.dirs, self.index_dir)
+            self.delta, self.masked = {}, set()
+            return True
+        return False
+
+    def broken_count(self):
+        return sum(len(b) for b in self.broken.values())
+
+    def write_links_report(self):
+        broken = [b for rel in sorted(self.broken) for b in self.broken[rel]]
+        link_check.write_reports(self.root, self.links_report, len(self.documents), broken)
+
+
+def run(workspace, watcher, debounce=DEBOUNCE_MS / 1000, max_delay=MAX_DELAY_MS / 1000,
+        merge_idle=MERGE_IDLE, once=False):
+    """事件循环；once 为真时处理完第一批事件即返回（便于测试）"""
+    pending = {}
+    first = deadline = None
+    last_batch = time.monotonic()
+    while True:
+        now = time.monotonic()
+        if pending:
+            timeout = max(deadline - now, 0)
+        elif workspace.delta or workspace.masked:
+            timeout = max(last_batch + merge_idle - now, 0)
+        else:
+            timeout = None
+        events = watcher.read(timeout)
+        now = time.monotonic()
+        if any(kind == OVERFLOW for _, kind in events):
+            print("事件队列溢出，重新全量同步", flush=True)
+            workspace.load()
+            pending, first = {}, None
+            continue
+        for rel, kind in events:
+            if rel.startswith(workspace.prefixes):
+                pending[rel] = kind
+        if events and pending:
+            if first is None:
+                first = now
+            deadline = min(now + debounce, first + max_delay)
+        if pending and now >= deadline:
+            started = time.perf_counter()
+            before = workspace.broken_count()
+            stats = workspace.apply(pending)
+            elapsed = time.perf_counter() - started
+            names = ' '.join(f"{'-' if k == REMOVED else '~'}{posixpath.basename(r)}" for r, k in list(pending.items())[:5])
+            more = f" 等 {len(pending)} 项" if len(pending) > 5 else ""
+            print(f"[{time.strftime('%H:%M:%S')}] {names}{more}：更新 {stats['changed']}，删除 {stats['removed']}，"
+                  f"重解析反向链接 {stats['relinked']}，断链 {before}→{workspace.broken_count()}，"
+                  f"概念{stats['concepts']}，检索增量 {len(workspace.delta)} 个文档，"
+                  f"处理 {elapsed * 1000:.0f} ms，保存后 {(now - first) * 1000 + elapsed * 1000:.0f} ms", flush=True)
+            pending, first = {}, None
+            last_batch = time.monotonic()
+            if once:
+                return
+        elif not pending and (workspace.delta or workspace.masked) and now - last_batch >= merge_idle:
+            started = time.perf_counter()
+            workspace.merge()
+            print(f"[{time.strftime('%H:%M:%S')}] 检索增量已并入主索引，耗时 {time.perf_counter() - started:.2f}s",
+                  flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="监视语料目录，保存后增量更新锚点、断链、概念与检索索引")
+    parser.add_argument('--root', default=os.getcwd(), help="项目根目录")
+    parser.add_argument('--dirs', nargs='+', default=DEFAULT_DIRS, help="监视的顶层目录")
+    parser.add_argument('--index', default=search_index.DEFAULT_INDEX, help="检索索引目录")
+    parser.add_argument('--state', default=concept_index.DEFAULT_STATE, help="概念倒排状态文件")
+    parser.add_argument('--links-report', default=DEFAULT_LINKS_REPORT, help="断链报告路径")
+    parser.add_argument('--poll', action='store_true', help="不用 inotify，定时轮询")
+    parser.add_argument('--interval', type=float, default=POLL_SECONDS, help="轮询间隔（秒）")
+    parser.add_argument('--debounce', type=int, default=DEBOUNCE_MS, help="去抖等待（毫秒）")
+    parser.add_argument('--max-delay', type=int, default=MAX_DELAY_MS, help="连续事件时最多推迟（毫秒）")
+    parser.add_argument('--merge-idle', type=float, default=MERGE_IDLE, help="空闲多少秒后合并检索增量段")
+    args = parser.parse_args(argv)
+
+    root = os.path.abspath(args.root)
+    absolute = lambda p: p if os.path.isabs(p) else os.path.join(root, p)
+    workspace = Workspace(root, args.dirs, absolute(args.index), absolute(args.state), absolute(args.links_report))
+    started = time.perf_counter()
+    # 先建立监视再做初始同步：同步期间的保存留在事件队列（或轮询快照的差异）中，进入事件循环后补处理
+    watcher = open_watcher(root, args.dirs, args.poll, args.interval)
+    workspace.load()
+    print(f"初始同步完成：文档 {len(workspace.documents)}，断链 {workspace.broken_count()}，"
+          f"耗时 {time.perf_counter() - started:.2f}s；"
+          f"{'inotify 监视 ' + str(len(watcher.wds)) + ' 个目录' if isinstance(watcher, InotifyWatcher) else '轮询模式'}，"
+          f"Ctrl+C 退出", flush=True)
+    try:
+        run(workspace, watcher, args.debounce / 1000, args.max_delay / 1000, args.merge_idle)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        if workspace.merge():
+            print("检索增量已并入主索引")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())